@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Микро-бенчмарк отрисовки часов и прогресс бара: поточечная отрисовка против нынешней.
+
+Запуск: python bench/bench_draw.py (OPi.GPIO и oled заменяются фейками из fakes.py).
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import fakes # pylint: disable=wrong-import-position
+fakes.install()
+
+from PIL import Image, ImageDraw # pylint: disable=wrong-import-position
+from pay_gate import pay_gate # pylint: disable=wrong-import-position
+from pay_gate.charset import sevenSegLarge # pylint: disable=wrong-import-position
+
+def drawCharPoints(display, char, x, y, font):
+    """Прежняя отрисовка символа по одной точке."""
+    draw = ImageDraw.Draw(display)
+    data = font.glyph_data(char)
+    for sx in range(0, font.width):
+        for sy in range(0, font.bands):
+            dy = y
+            chdata = data[sx + sy * font.width]
+            for bit in [0, 1, 2, 3, 4, 5, 6, 7]:
+                draw.point(((sx + x), ((8 * sy) + dy)), fill=(255 if ((chdata >> bit) & 0x01) != 0 else 0))
+                dy += 1
+
+def drawProgressPoints(display, seconds, totalSeconds):
+    """Прежняя отрисовка прогресс бара по одной точке."""
+    y = 31 if display.height < 64 else 56
+    draw = ImageDraw.Draw(display)
+    for py in range(y - 3, y + 4):
+        draw.point((10, py), fill=255)
+        draw.point((117, py), fill=255)
+    if seconds > 0 and totalSeconds > 0:
+        progress = float(float(seconds) / float(totalSeconds) * 107.0)
+        for x in range(107):
+            for py in range(y - 1, y + 2):
+                draw.point((x + 10, py), fill=255 if x <= progress else 0)
+
+def checkProgress():
+    """Полная и пошаговая отрисовка должны совпадать с поточечной."""
+    for total in (1, 7, 60, 107, 300, 3599):
+        a = Image.new('1', (128, 64))
+        b = Image.new('1', (128, 64))
+        c = Image.new('1', (128, 64))
+        last = None
+        for sec in range(total + 3):
+            drawProgressPoints(a, sec, total)
+            pay_gate.drawProgress(b, sec, total)
+            last = pay_gate.drawProgress(c, sec, total, last)
+            if not a.tobytes() == b.tobytes() == c.tobytes():
+                print('MISMATCH at {} of {} sec'.format(sec, total))
+                return False
+    return True
+
+def runProgress(draw, number):
+    """Время отрисовки прогресс бара в миллисекундах."""
+    screen = Image.new('1', (128, 64))
+    seconds = iter(range(10 ** 9))
+    return timeit.timeit(lambda: draw(screen, next(seconds) % 600, 600), number=number) * 1000 / number
+
+def runProgressIncremental(number):
+    """Время пошаговой отрисовки прогресс бара в миллисекундах."""
+    screen = Image.new('1', (128, 64))
+    state = {'sec': 0, 'last': None}
+    def step():
+        state['sec'] = (state['sec'] + 1) % 600
+        state['last'] = pay_gate.drawProgress(screen, state['sec'], 600, state['last'] if state['sec'] else None)
+    return timeit.timeit(step, number=number) * 1000 / number
+
+def run(draw_char, number):
+    """Время одного кадра drawTime в миллисекундах."""
+    screen = Image.new('1', (128, 64))
+    pay_gate._drawChar = draw_char # pylint: disable=protected-access
+    seconds = iter(range(10 ** 9))
+    total = timeit.timeit(lambda: pay_gate.drawTime(screen, next(seconds) % 36000, 0, 16, sevenSegLarge), number=number)
+    return total * 1000 / number
+
+def main():
+    """Сравнение и проверка совпадения результата."""
+    glyph_draw = pay_gate._drawChar # pylint: disable=protected-access
+    for sec in range(0, 36000, 17):
+        a = Image.new('1', (128, 64))
+        b = Image.new('1', (128, 64))
+        pay_gate._drawChar = drawCharPoints # pylint: disable=protected-access
+        pay_gate.drawTime(a, sec, 0, 16, sevenSegLarge)
+        pay_gate._drawChar = glyph_draw # pylint: disable=protected-access
+        pay_gate.drawTime(b, sec, 0, 16, sevenSegLarge)
+        if a.tobytes() != b.tobytes():
+            print('MISMATCH at {} sec'.format(sec))
+            return 1
+
+    if not checkProgress():
+        return 1
+
+    points = run(drawCharPoints, 200)
+    glyphs = run(glyph_draw, 5000)
+    print('drawTime per-point: {:8.3f} ms/frame'.format(points))
+    print('drawTime glyphs:    {:8.3f} ms/frame'.format(glyphs))
+    print('speedup:            {:8.1f}x'.format(points / glyphs))
+
+    points = runProgress(drawProgressPoints, 500)
+    rects = runProgress(pay_gate.drawProgress, 20000)
+    incremental = runProgressIncremental(20000)
+    print('drawProgress per-point:   {:8.4f} ms/frame'.format(points))
+    print('drawProgress rectangles:  {:8.4f} ms/frame'.format(rects))
+    print('drawProgress incremental: {:8.4f} ms/frame'.format(incremental))
+    print('speedup:                  {:8.1f}x'.format(points / incremental))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Бенчмарк демона без платы: дисплей, GPIO, IMAP и Telegram заменены фейками из fakes.py.
+
+Меряет скорость отрисовки кадров отсчёта, байты, отправленные на дисплей,
+разбор писем, запись журнала работы и задержку от прихода письма с
+оплатой до включения реле через настоящие потоки check_mail и check_work
+при медленном API Telegram, в конце - стоимость метрик и их сводку.
+
+Запуск: python bench/bench_gate.py [--frames N] [--mails N] [--payments N]
+"""
+
+import os
+import sys
+import time
+import shutil
+import timeit
+import logging
+import argparse
+import tempfile
+import threading
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import fakes # pylint: disable=wrong-import-position
+fakes.install()
+
+from PIL import ImageFont # pylint: disable=wrong-import-position
+from pay_gate import pay_gate # pylint: disable=wrong-import-position
+from pay_gate.display import FrameDiff # pylint: disable=wrong-import-position
+from pay_gate.ledger import PaymentLedger # pylint: disable=wrong-import-position
+from pay_gate.mail import MailSession # pylint: disable=wrong-import-position
+from pay_gate.metrics import Registry # pylint: disable=wrong-import-position
+from pay_gate.scheduler import Scheduler # pylint: disable=wrong-import-position
+from pay_gate.settings import gateSettings # pylint: disable=wrong-import-position
+
+QR_NUM = 5
+
+def setup(lib_dir):
+    """Один проезд с фейковым дисплеем, журнал и реестр оплат во временной папке."""
+    pay_gate.LIB_DIR = lib_dir
+    pay_gate.settings = pay_gate.settings._replace(qr_num=QR_NUM)
+    pay_gate.loadGates(gateSettings({'QR': {'url': 'https://example.com/qr/{}'}}, pay_gate.settings))
+    gate = next(iter(pay_gate.gates.values()))
+    gate.oled = FrameDiff(fakes.FakeSsd1306())
+    gate.setup()
+    try:
+        pay_gate.FONT2 = ImageFont.truetype(os.path.join(os.path.dirname(pay_gate.__file__), 'fonts/C&C Red Alert [INET].ttf'), 15)
+    except OSError:
+        pay_gate.FONT2 = ImageFont.load_default()
+    pay_gate.ledger = PaymentLedger(os.path.join(lib_dir, 'payments.log'))
+    pay_gate.ledger.load()
+    # Telegram отвечает медленно: рабочая петля и почта не должны этого замечать
+    pay_gate.bot = fakes.FakeBot(delay=0.5)
+    pay_gate.outbox.start(pay_gate.sendMessage)
+    return gate
+
+def benchFrames(gate, frames):
+    """Кадры отсчёта через stepWork с подставленным временем: кадров в секунду и байт на кадр."""
+    timers = Scheduler()
+    device = gate.oled.device
+    sent = gate.oled.bytes_sent
+    bus = device.bytes
+    length = 600
+    done = 0
+    start = time.perf_counter()
+    while done < frames:
+        gate.start(length)
+        now = time.monotonic()
+        for sec in range(min(length - 1, frames - done)):
+            pay_gate.stepWork(gate, timers, {'frame'}, now + sec)
+            done += 1
+        gate.stop()
+        pay_gate.stepWork(gate, timers, set(), now + length)
+    elapsed = time.perf_counter() - start
+    print('frames:            {:8d}'.format(frames))
+    print('frame rate:        {:8.1f} fps ({:.3f} ms/frame)'.format(frames / elapsed, elapsed * 1000 / frames))
+    print('display bytes:     {:8.1f} B/frame (full frame {} B), {:.1f} B/frame on the bus'.format(
+        (gate.oled.bytes_sent - sent) / frames, gate.oled.width * gate.oled.pages, (device.bytes - bus) / frames))
+
+def benchParse(number):
+    """Разбор текста письма шаблонами."""
+    content = 'Код подтверждения: 123456. Сумма: 150.00 RUB. QR: {}.\r\n'.format(QR_NUM)
+    sender = 'Bank <noreply@bank.example>'
+    total = timeit.timeit(lambda: pay_gate.settings.parser.parse(sender, 'Оплата по QR', content), number=number)
+    print('payment parse:     {:8.4f} ms/mail'.format(total * 1000 / number))
+
+def benchMail(gate, server, mails):
+    """Пачка писем с вложениями: выборка, разбор, учёт оплат и пометка одной сессией."""
+    for num in range(mails):
+        server.box.deliver(fakes.bankMail(700000 + num, 1, QR_NUM, attachment=64 * 1024))
+    session = MailSession('127.0.0.1', 'login', 'password', port=server.port, ssl=False)
+    session.connect()
+    start = time.perf_counter()
+    uids = session.search_unseen()
+    pay_gate.processMail(session, uids)
+    elapsed = time.perf_counter() - start
+    session.close()
+    print('mail batch:        {:8.3f} ms/mail ({} mails with 64K attachments)'.format(elapsed * 1000 / mails, len(uids)))
+    gate.stop()
+    gate.save(None)
+
+def benchJournal(gate, number):
+    """Запись изменения работы в журнал с fsync."""
+    gate.start(600)
+    start = time.perf_counter()
+    for num in range(number):
+        gate.work_length = 600 + num
+        gate.save('bench')
+    elapsed = time.perf_counter() - start
+    gate.stop()
+    gate.save(None)
+    print('journal save:      {:8.3f} ms/save'.format(elapsed * 1000 / number))
+
+def benchLatency(gate, server, payments):
+    """Задержка от письма с оплатой в ящике до включения реле."""
+    pay_gate.settings = pay_gate.settings._replace(imap_server='127.0.0.1', email_port=server.port, email_ssl=False)
+    pay_gate.mail_thread = threading.Thread(target=pay_gate.check_mail, name='check_mail')
+    pay_gate.mail_thread.e = threading.Event()
+    pay_gate.work_thread = threading.Thread(target=pay_gate.check_work, name='check_work')
+    pay_gate.work_thread.e = threading.Event()
+    pay_gate.mail_thread.start()
+    pay_gate.work_thread.start()
+    on = fakes.GPIO.HIGH if gate.invert else fakes.GPIO.LOW
+    latencies = []
+    lost = 0
+    try:
+        # первое соединение с сервером в замер не входит
+        time.sleep(0.5)
+        for num in range(payments):
+            sent = time.perf_counter()
+            server.box.deliver(fakes.bankMail(900000 + num, 1, QR_NUM))
+            switched = fakes.GPIO.wait(gate.pin, on, 5)
+            if switched is None:
+                lost += 1
+            else:
+                latencies.append((switched - sent) * 1000)
+            gate.stop()
+            gate.save(None)
+            pay_gate.wakeWork()
+    finally:
+        for thread in (pay_gate.mail_thread, pay_gate.work_thread):
+            thread.stop = True
+            thread.e.set()
+        pay_gate.interruptMail()
+        for thread in (pay_gate.mail_thread, pay_gate.work_thread):
+            thread.join()
+    if latencies:
+        print('payment to relay:  {:8.2f} ms median, {:.2f} ms max ({} payments, {} lost)'.format(
+            statistics.median(latencies), max(latencies), len(latencies), lost))
+    else:
+        print('payment to relay:  no payments detected')
+    stats = pay_gate.outbox.stats()
+    print('bot messages:      {:8d} sent, {} queued, {} coalesced (API answers in {} s)'.format(
+        stats['sent'], pay_gate.outbox.pending(), stats['coalesced'], pay_gate.bot.delay))
+
+def benchMetrics(number):
+    """Стоимость учёта значения в гистограмме и сборки ответа /metrics."""
+    histogram = Registry().histogram('bench_seconds', 'bench', label='gate')
+    observe = timeit.timeit(lambda: histogram.observe(0.001, '1'), number=number)
+    render = timeit.timeit(pay_gate.metrics.render, number=100)
+    print('metrics observe:   {:8.2f} us/value, render {:.3f} ms'.format(observe * 1e6 / number, render * 10))
+    for line in pay_gate.metrics.summary():
+        print('  ' + line)
+
+def main():
+    """Запуск всех замеров."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=3000, help='кадров отсчёта')
+    parser.add_argument('--mails', type=int, default=50, help='писем в пачке')
+    parser.add_argument('--payments', type=int, default=20, help='оплат для замера задержки')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    lib_dir = tempfile.mkdtemp(prefix='pay_gate_bench_')
+    server = fakes.FakeImapServer().start()
+    try:
+        gate = setup(lib_dir)
+        benchFrames(gate, args.frames)
+        benchParse(20000)
+        benchMail(gate, server, args.mails)
+        benchJournal(gate, 200)
+        benchLatency(gate, server, args.payments)
+        benchMetrics(100000)
+    finally:
+        server.stop()
+        shutil.rmtree(lib_dir, ignore_errors=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
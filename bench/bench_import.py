@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Отчёт о времени импорта pay_gate по данным python -X importtime.
+
+Показывает общее время импорта модуля, самые дорогие модули и то, какие
+тяжёлые зависимости (telegram, imaplib, qrcode) при импорте не грузятся,
+а откладываются до запуска бота, почты или генерации QR кода.
+
+Запуск: python bench/bench_import.py [число строк]. Без OPi.GPIO и oled вместо них
+подкладываются пустые модули-заглушки, их импорт в отчёте почти ничего не стоит.
+"""
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import subprocess
+import importlib.util
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RE_LINE = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)$')
+DEFERRED = ('telegram', 'telegram.ext', 'imaplib', 'email.header', 'pay_gate.mail', 'qrcode')
+
+# заглушки модулей платы: только имена, которые pay_gate берёт при импорте
+STUBS = {
+    'OPi/__init__.py': '',
+    'OPi/GPIO.py': 'BOARD = 10\nOUT = 0\nIN = 1\nHIGH = 1\nLOW = 0\n',
+    'oled/__init__.py': '',
+    'oled/device.py': 'class ssd1306:\n    pass\n\nclass sh1106:\n    pass\n',
+}
+STUB_DIR = None
+
+def stubModules():
+    """Папка с заглушками OPi.GPIO и oled.device, если настоящих нет, иначе None."""
+    if importlib.util.find_spec('OPi') is not None and importlib.util.find_spec('oled') is not None:
+        return None
+    path = tempfile.mkdtemp(prefix='pay_gate_stubs')
+    for name, text in STUBS.items():
+        os.makedirs(os.path.join(path, os.path.dirname(name)), exist_ok=True)
+        with open(os.path.join(path, name), 'w') as f:
+            f.write(text)
+    return path
+
+def importTime(code):
+    """Запуск code в новом интерпретаторе.
+
+    Возвращает [(модуль, собственное, общее время мкс, глубина)] и вывод
+    программы, или None, если импорт не удался.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, STUB_DIR, env.get('PYTHONPATH')]))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=False)
+    if proc.returncode != 0:
+        return None
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = RE_LINE.match(line)
+        if m is not None:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows, proc.stdout
+
+def main():
+    """Печать отчёта."""
+    global STUB_DIR
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    STUB_DIR = stubModules()
+    try:
+        report(top)
+    finally:
+        if STUB_DIR is not None:
+            shutil.rmtree(STUB_DIR, ignore_errors=True)
+
+def report(top):
+    """Отчёт о времени импорта, top - сколько самых дорогих модулей показать."""
+    code = 'import sys, pay_gate.pay_gate; print(" ".join(m for m in {!r} if m in sys.modules))'.format(DEFERRED)
+    result = importTime(code)
+    if result is None:
+        sys.exit('Unable to import pay_gate.pay_gate')
+    rows, loaded = result
+    total = dict((name, cumulative) for name, _own, cumulative, _depth in rows)
+    print('import pay_gate.pay_gate: {:.1f} ms'.format(total.get('pay_gate.pay_gate', 0) / 1000.0))
+    print('deferred modules loaded at import: {}'.format(loaded.strip() or 'none'))
+    print('\nslowest modules (own time):')
+    for name, own, cumulative, _depth in sorted(rows, key=lambda row: -row[1])[:top]:
+        print('  {:8.1f} ms {:8.1f} ms  {}'.format(own / 1000.0, cumulative / 1000.0, name))
+    print('\ndeferred to later startup stages:')
+    for name in ('telegram.ext', 'pay_gate.mail', 'qrcode'):
+        result = importTime('import ' + name)
+        if result is None:
+            print('  {:>8}     {} (not installed)'.format('-', name))
+            continue
+        cost = [cumulative for module, _own, cumulative, _depth in result[0] if module == name]
+        if cost:
+            print('  {:8.1f} ms  {}'.format(cost[0] / 1000.0, name))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""Заменители железа и сетевых сервисов для бенчмарков без платы.
+
+install() подкладывает в sys.modules модули OPi.GPIO и oled.device,
+поэтому вызывать его нужно до импорта pay_gate.pay_gate. FakeImapServer
+- локальный IMAP сервер без SSL, отдающий заранее собранные письма банка
+и поддерживающий IDLE. FakeBot записывает отправленные сообщения вместо
+Telegram.
+"""
+
+import sys
+import time
+import types
+import select
+import socket
+import threading
+import socketserver
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.mime.application import MIMEApplication
+from email.header import Header
+
+IDLE_POLL = 0.002                                        # шаг опроса сокета и ящика в IDLE, секунд
+
+class FakeGPIO(types.ModuleType):
+    """Модуль OPi.GPIO, запоминающий состояние ног и время их переключения."""
+
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    HIGH = 1
+    LOW = 0
+
+    def __init__(self):
+        super().__init__('OPi.GPIO')
+        self.pins = {}
+        self.changed = threading.Condition()
+
+    def setwarnings(self, _flag):
+        pass
+
+    def setmode(self, _mode):
+        pass
+
+    def setup(self, pin, _direction):
+        self.pins.setdefault(pin, (None, time.perf_counter()))
+
+    def output(self, pin, value):
+        with self.changed:
+            self.pins[pin] = (value, time.perf_counter())
+            self.changed.notify_all()
+
+    def cleanup(self):
+        self.pins = {}
+
+    def wait(self, pin, value, timeout):
+        """Ожидание состояния ноги. Возвращает время переключения по perf_counter или None."""
+        deadline = time.perf_counter() + timeout
+        with self.changed:
+            while True:
+                state = self.pins.get(pin)
+                if state is not None and state[0] == value:
+                    return state[1]
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    return None
+                self.changed.wait(left)
+
+class FakeSsd1306:
+    """Дисплей ssd1306, считающий переданные по шине байты."""
+
+    def __init__(self, port=0, address=0x3C, width=128, height=64):
+        self.port = port
+        self.address = address
+        self.width = width
+        self.height = height
+        self.bytes = 0
+        self.frames = 0
+
+    def display(self, image):
+        self.bytes += self.width * self.height // 8
+        self.frames += 1
+
+    def command(self, *cmd):
+        self.bytes += len(cmd)
+
+    def data(self, data):
+        self.bytes += len(data)
+        self.frames += 1
+
+GPIO = FakeGPIO()
+
+def install():
+    """Подмена модулей платы заменителями."""
+    opi = types.ModuleType('OPi')
+    opi.GPIO = GPIO
+    sys.modules['OPi'] = opi
+    sys.modules['OPi.GPIO'] = GPIO
+    oled = types.ModuleType('oled')
+    device = types.ModuleType('oled.device')
+    device.ssd1306 = FakeSsd1306
+    device.sh1106 = FakeSsd1306
+    oled.device = device
+    sys.modules['oled'] = oled
+    sys.modules['oled.device'] = device
+    for board in ('orangepi', 'orangepi.zero', 'orangepi.zeroplus2'):
+        module = types.ModuleType(board)
+        module.BOARD = FakeGPIO.BOARD
+        sys.modules[board] = module
+    sys.modules['orangepi'].zero = sys.modules['orangepi.zero']
+    sys.modules['orangepi'].zeroplus2 = sys.modules['orangepi.zeroplus2']
+
+class FakeBot:
+    """Бот Telegram, запоминающий сообщения с временем отправки. delay - время ответа API в секундах."""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None, parse_mode=None, disable_web_page_preview=None, **_kwargs):
+        if self.delay > 0:
+            time.sleep(self.delay)
+        self.messages.append((time.perf_counter(), chat_id, text))
+
+def bankMail(code, pay, qr_num, attachment=0):
+    """Письмо банка об оплате: text/plain и text/html, при attachment - вложение такого размера."""
+    text = 'Код подтверждения: {}. Сумма: {:.2f} RUB. QR: {}.\r\n'.format(code, pay, qr_num)
+    alternative = MIMEMultipart('alternative')
+    alternative.attach(MIMEText(text, 'plain', 'utf-8'))
+    alternative.attach(MIMEText('<html><body><p>{}</p></body></html>'.format(text), 'html', 'utf-8'))
+    if attachment > 0:
+        msg = MIMEMultipart('mixed')
+        msg.attach(alternative)
+        msg.attach(MIMEApplication(b'\0' * attachment, Name='receipt.pdf'))
+    else:
+        msg = alternative
+    msg['From'] = 'Bank <noreply@bank.example>'
+    msg['Subject'] = Header('Оплата по QR', 'utf-8').encode()
+    return msg
+
+def _quote(value):
+    if value is None:
+        return 'NIL'
+    return '"{}"'.format(value.replace('\\', '\\\\').replace('"', '\\"'))
+
+def bodyStructure(msg):
+    """BODYSTRUCTURE письма в синтаксисе IMAP."""
+    if msg.is_multipart():
+        return '({} {})'.format(''.join(bodyStructure(part) for part in msg.get_payload()), _quote(msg.get_content_subtype().upper()))
+    payload = msg.get_payload().encode('ascii')
+    params = ' '.join('{} {}'.format(_quote(key.upper()), _quote(value)) for key, value in msg.get_params()[1:]) or None
+    fields = '{} {} {} NIL NIL {} {}'.format(
+        _quote(msg.get_content_maintype().upper()), _quote(msg.get_content_subtype().upper()),
+        '({})'.format(params) if params else 'NIL', _quote((msg['Content-Transfer-Encoding'] or '7bit').upper()), len(payload))
+    if msg.get_content_maintype() == 'text':
+        fields += ' {}'.format(payload.count(b'\n'))
+    return '({})'.format(fields)
+
+def section(msg, path):
+    """Закодированное содержимое секции письма по номеру вида 1.2."""
+    for num in path.split('.'):
+        if msg.is_multipart():
+            msg = msg.get_payload()[int(num) - 1]
+    return msg.get_payload().encode('ascii')
+
+class _Handler(socketserver.StreamRequestHandler):
+    seen = 0
+
+    def setup(self):
+        super().setup()
+        # без TCP_NODELAY ответы из нескольких строк ждут задержанный ACK клиента
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send(self, line):
+        self.wfile.write((line if isinstance(line, bytes) else line.encode('utf-8')) + b'\r\n')
+
+    def handle(self):
+        box = self.server.box
+        self.send('* OK [CAPABILITY IMAP4rev1 IDLE UIDPLUS] fake server ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            parts = line.decode('utf-8').strip().split(' ', 2)
+            if len(parts) < 2:
+                continue
+            tag, cmd = parts[0], parts[1].upper()
+            rest = parts[2] if len(parts) > 2 else ''
+            if cmd == 'CAPABILITY':
+                self.send('* CAPABILITY IMAP4rev1 IDLE UIDPLUS')
+            elif cmd == 'SELECT':
+                self.seen = box.generation
+                self.send('* {} EXISTS'.format(len(box.messages)))
+                self.send('* OK [UIDVALIDITY {}] UIDs valid'.format(box.uidvalidity))
+                self.send('{} OK [READ-WRITE] SELECT completed'.format(tag))
+                continue
+            elif cmd == 'UID':
+                self.uid(rest)
+            elif cmd == 'IDLE':
+                self.idle(tag)
+                continue
+            elif cmd in ('CLOSE', 'EXPUNGE'):
+                box.expunge()
+            elif cmd == 'LOGOUT':
+                self.send('* BYE')
+                self.send('{} OK LOGOUT completed'.format(tag))
+                return
+            self.send('{} OK {} completed'.format(tag, cmd))
+
+    def uid(self, rest):
+        box = self.server.box
+        sub, args = (rest.split(' ', 1) + [''])[:2]
+        sub = sub.upper()
+        if sub == 'SEARCH':
+            self.send('* SEARCH {}'.format(' '.join(str(uid) for uid in box.unseen())).rstrip())
+        elif sub == 'FETCH':
+            uids, query = args.split(' ', 1)
+            for seq, uid, msg in box.select(uids):
+                items = ['UID {}'.format(uid)]
+                literals = []
+                if 'INTERNALDATE' in query:
+                    items.append('INTERNALDATE "{}"'.format(time.strftime('%d-%b-%Y %H:%M:%S +0000', time.gmtime(box.received[uid]))))
+                if 'BODYSTRUCTURE' in query:
+                    items.append('BODYSTRUCTURE {}'.format(bodyStructure(msg)))
+                if 'HEADER.FIELDS' in query:
+                    header = 'From: {}\r\nSubject: {}\r\n\r\n'.format(msg['From'], msg['Subject']).encode('utf-8')
+                    items.append('BODY[HEADER.FIELDS (FROM SUBJECT)] {{{}}}'.format(len(header)))
+                    literals.append(header)
+                for part in query.split('BODY.PEEK[')[1:]:
+                    name, _sep, origin = part.partition(']')
+                    if name.startswith('HEADER'):
+                        continue
+                    limit = int(origin.split('.')[1].split('>')[0]) if origin.startswith('<') else None
+                    data = section(msg, name)[:limit]
+                    items.append('BODY[{}]<0> {{{}}}'.format(name, len(data)))
+                    literals.append(data)
+                # литералы идут после своих элементов, imaplib ждёт их сразу за {n}
+                out = '* {} FETCH ('.format(seq).encode('utf-8')
+                pending = list(literals)
+                for item in items:
+                    out += item.encode('utf-8') + b' '
+                    if item.endswith('}'):
+                        out = out[:-1] + b'\r\n' + pending.pop(0) + b' '
+                self.send(out[:-1] + b')')
+        elif sub == 'STORE':
+            box.store(args.split(' ', 1)[0])
+        elif sub == 'EXPUNGE':
+            box.expunge(args.strip())
+
+    def idle(self, tag):
+        box = self.server.box
+        self.send('+ idling')
+        sock = self.connection
+        while True:
+            # как настоящий сервер, сообщаем и о письмах, пришедших до начала IDLE
+            with box.changed:
+                if box.generation == self.seen:
+                    box.changed.wait(IDLE_POLL)
+                if box.generation != self.seen:
+                    self.seen = box.generation
+                    self.send('* {} EXISTS'.format(len(box.messages)))
+            ready, _w, _x = select.select([sock], [], [], IDLE_POLL)
+            if ready:
+                break
+        line = self.rfile.readline()
+        if line.strip().upper() == b'DONE':
+            self.send('{} OK IDLE terminated'.format(tag))
+
+class Mailbox:
+    """Содержимое ящика фейкового сервера."""
+
+    def __init__(self):
+        self.uidvalidity = 1
+        self.next_uid = 1
+        self.messages = {}
+        self.flags = {}
+        self.received = {}
+        self.generation = 0
+        self.changed = threading.Condition()
+
+    def deliver(self, msg):
+        """Новое письмо в ящик, клиенты в IDLE получают уведомление."""
+        with self.changed:
+            uid = self.next_uid
+            self.next_uid += 1
+            self.messages[uid] = msg
+            self.flags[uid] = set()
+            self.received[uid] = time.time()
+            self.generation += 1
+            self.changed.notify_all()
+        return uid
+
+    def unseen(self):
+        with self.changed:
+            return [uid for uid in self.messages if '\\Seen' not in self.flags[uid]]
+
+    def select(self, uid_set):
+        with self.changed:
+            uids = [int(uid) for uid in uid_set.split(',')]
+            order = sorted(self.messages)
+            return [(order.index(uid) + 1, uid, self.messages[uid]) for uid in uids if uid in self.messages]
+
+    def store(self, uid_set):
+        with self.changed:
+            for uid in uid_set.split(','):
+                if int(uid) in self.flags:
+                    self.flags[int(uid)].update(('\\Seen', '\\Deleted'))
+
+    def expunge(self, uid_set=None):
+        with self.changed:
+            uids = self.flags if uid_set is None else [int(uid) for uid in uid_set.split(',') if int(uid) in self.flags]
+            for uid in [uid for uid in uids if '\\Deleted' in self.flags[uid]]:
+                del self.messages[uid]
+                del self.flags[uid]
+                del self.received[uid]
+
+class FakeImapServer(socketserver.ThreadingTCPServer):
+    """IMAP сервер на 127.0.0.1 со случайным портом, работает в своём потоке."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.box = Mailbox()
+        self.port = self.server_address[1]
+        self.thread = threading.Thread(target=self.serve_forever, name='fake_imap', daemon=True)
+
+    def start(self):
+        """Запуск сервера."""
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Остановка сервера."""
+        self.shutdown()
+        self.server_close()
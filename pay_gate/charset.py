@@ -1,234 +1,446 @@
-dotmatrix = [[0x60, 0x60, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0x60, 0x60, 0xdb, 0xdb,
-              0x0, 0xc0, 0xc0, 0x0, 0x18, 0x18, 0x0, 0x3, 0x3, 0x0, 0xdb, 0xdb, 0x6, 0x6, 0x0, 0x30,
-              0x30, 0x0, 0x30, 0x30, 0x0, 0x30, 0x30, 0x0, 0x6, 0x6],
-             [0x0, 0x0, 0x0, 0x60, 0x60, 0x0, 0x6c, 0x6c, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-              0x0, 0x0, 0x0, 0x0, 0xdb, 0xdb, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x30,
-              0x30, 0x0, 0x36, 0x36, 0x0, 0x30, 0x30, 0x0, 0x0, 0x0],
-             [0x60, 0x60, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0x60, 0x60, 0x0, 0x0,
-              0x0, 0x0, 0x0, 0x0, 0xc0, 0xc0, 0x0, 0x18, 0x18, 0x0, 0x3, 0x3, 0x30, 0x30, 0x0, 0x36,
-              0x36, 0x0, 0x30, 0x30, 0x0, 0x30, 0x30, 0x0, 0x30, 0x30],
-             [0x60, 0x60, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0x60, 0x60, 0x0, 0x0,
-              0x0, 0x0, 0x0, 0x0, 0x18, 0x18, 0x0, 0x18, 0x18, 0x0, 0xc3, 0xc3, 0x6, 0x6, 0x0, 0x30,
-              0x30, 0x0, 0x30, 0x30, 0x0, 0x30, 0x30, 0x0, 0x6, 0x6],
-             [0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x60, 0x60, 0x0, 0x6c, 0x6c, 0x0, 0x0, 0x0, 0xd8, 0xd8,
-              0x0, 0xc3, 0xc3, 0x0, 0xc0, 0xc0, 0x0, 0xdb, 0xdb, 0x0, 0xc0, 0xc0, 0x0, 0x0, 0x0, 0x0,
-              0x0, 0x0, 0x0, 0x0, 0x0, 0x36, 0x36, 0x0, 0x0, 0x0],
-             [0x6c, 0x6c, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x3, 0x3,
-              0x0, 0x3, 0x3, 0x0, 0x3, 0x3, 0x0, 0x3, 0x3, 0x0, 0xd8, 0xd8, 0x6, 0x6, 0x0, 0x30,
-              0x30, 0x0, 0x30, 0x30, 0x0, 0x30, 0x30, 0x0, 0x6, 0x6],
-             [0x0, 0x0, 0x0, 0x60, 0x60, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0x0, 0x0, 0xdb, 0xdb,
-              0x0, 0x18, 0x18, 0x0, 0x18, 0x18, 0x0, 0x18, 0x18, 0x0, 0xc0, 0xc0, 0x6, 0x6, 0x0, 0x30,
-              0x30, 0x0, 0x30, 0x30, 0x0, 0x30, 0x30, 0x0, 0x6, 0x6],
-             [0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0x6c, 0x6c, 0x0, 0x0,
-              0x0, 0xc0, 0xc0, 0x0, 0x18, 0x18, 0x0, 0x3, 0x3, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x36,
-              0x36, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0],
-             [0x60, 0x60, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0x60, 0x60, 0xc3, 0xc3,
-              0x0, 0x18, 0x18, 0x0, 0x18, 0x18, 0x0, 0x18, 0x18, 0x0, 0xc3, 0xc3, 0x6, 0x6, 0x0, 0x30,
-              0x30, 0x0, 0x30, 0x30, 0x0, 0x30, 0x30, 0x0, 0x6, 0x6],
-             [0x60, 0x60, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0xc, 0xc, 0x0, 0x60, 0x60, 0x3, 0x3,
-              0x0, 0x18, 0x18, 0x0, 0x18, 0x18, 0x0, 0x18, 0x18, 0x0, 0xdb, 0xdb, 0x0, 0x0, 0x0, 0x30,
-              0x30, 0x0, 0x30, 0x30, 0x0, 0x6, 0x6, 0x0, 0x0, 0x0],
-             [0x0, 0x0, 0x0, 0x60, 0x60, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-              0x0, 0xc3, 0xc3, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x6,
-              0x6, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0],
-             [14, 3, 18, 11]]
-
-dotmatrixLarge = [[0xc0, 0xc0, 0xc0, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0,
-                   0xc0, 0xc0, 0xc0, 0xdd, 0xdd, 0xdd, 0x0, 0x0, 0x0, 0x0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0x1c,
-                   0x1c, 0x1c, 0x0, 0xdd, 0xdd, 0xdd, 0xdd, 0xdd, 0xdd, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1, 0x1,
-                   0x1, 0x0, 0x0, 0x0, 0x0, 0x0, 0xdd, 0xdd, 0xdd, 0x1, 0x1, 0x1, 0x0, 0x1c, 0x1c, 0x1c,
-                   0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1, 0x1, 0x1],
-                  [0x0, 0x0, 0x0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0xdc, 0xdc, 0xdc, 0x0, 0x0, 0x0, 0x0, 0x0,
-                   0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x1, 0x1, 0x1, 0x0, 0xdd, 0xdd, 0xdd, 0x0, 0x0,
-                   0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xdd, 0xdd,
-                   0xdd, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x1c, 0x1c, 0x1c,
-                   0x0, 0x1d, 0x1d, 0x1d, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x0, 0x0, 0x0],
-                  [0xc0, 0xc0, 0xc0, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0,
-                   0xc0, 0xc0, 0xc0, 0x1, 0x1, 0x1, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xc0,
-                   0xc0, 0xc0, 0x0, 0x1d, 0x1d, 0x1d, 0x0, 0x0, 0x0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0x1c, 0x1c,
-                   0x1c, 0x0, 0x1, 0x1, 0x1, 0x0, 0x0, 0x0, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1d, 0x1d, 0x1d,
-                   0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c],
-                  [0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0xdc, 0xdc, 0xdc, 0x0,
-                   0x1c, 0x1c, 0x1c, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0xc1,
-                   0xc1, 0xc1, 0x0, 0x0, 0x0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                   0x0, 0x0, 0x1, 0x1, 0x1, 0x0, 0xdc, 0xdc, 0xdc, 0x1, 0x1, 0x1, 0x0, 0x1c, 0x1c, 0x1c,
-                   0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1, 0x1, 0x1],
-                  [0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0xdc, 0xdc, 0xdc, 0x0,
-                   0x0, 0x0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1, 0x1, 0x1, 0x0, 0xdd,
-                   0xdd, 0xdd, 0x0, 0x0, 0x0, 0x0, 0x1d, 0x1d, 0x1d, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c,
-                   0x1c, 0x0, 0xdd, 0xdd, 0xdd, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                   0x0, 0x0, 0x0, 0x0, 0x0, 0x1d, 0x1d, 0x1d, 0x0, 0x0, 0x0, 0x0],
-                  [0xdc, 0xdc, 0xdc, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0,
-                   0x1c, 0x1c, 0x1c, 0x1d, 0x1d, 0x1d, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c,
-                   0x1c, 0x1c, 0x0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                   0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xdd, 0xdd, 0xdd, 0x1, 0x1, 0x1, 0x0, 0x1c, 0x1c, 0x1c,
-                   0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1, 0x1, 0x1],
-                  [0x0, 0x0, 0x0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0,
-                   0x0, 0x0, 0x0, 0xdc, 0xdc, 0xdc, 0x0, 0xc1, 0xc1, 0xc1, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0xc0,
-                   0xc0, 0xc0, 0x0, 0x0, 0x0, 0x0, 0xdd, 0xdd, 0xdd, 0x0, 0x1, 0x1, 0x1, 0x0, 0x1, 0x1,
-                   0x1, 0x0, 0x1, 0x1, 0x1, 0x0, 0xdc, 0xdc, 0xdc, 0x1, 0x1, 0x1, 0x0, 0x1c, 0x1c, 0x1c,
-                   0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1, 0x1, 0x1],
-                  [0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0,
-                   0xdc, 0xdc, 0xdc, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0x1c,
-                   0x1c, 0x1c, 0x0, 0x1, 0x1, 0x1, 0x0, 0x0, 0x0, 0x0, 0xdc, 0xdc, 0xdc, 0x0, 0x1, 0x1,
-                   0x1, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x1d, 0x1d, 0x1d,
-                   0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0],
-                  [0xc0, 0xc0, 0xc0, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0,
-                   0xc0, 0xc0, 0xc0, 0x1d, 0x1d, 0x1d, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0xc0,
-                   0xc0, 0xc0, 0x0, 0x1d, 0x1d, 0x1d, 0xdc, 0xdc, 0xdc, 0x0, 0x1, 0x1, 0x1, 0x0, 0x1, 0x1,
-                   0x1, 0x0, 0x1, 0x1, 0x1, 0x0, 0xdc, 0xdc, 0xdc, 0x1, 0x1, 0x1, 0x0, 0x1c, 0x1c, 0x1c,
-                   0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1, 0x1, 0x1],
-                  [0xc0, 0xc0, 0xc0, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1c, 0x1c, 0x1c, 0x0,
-                   0xc0, 0xc0, 0xc0, 0x1d, 0x1d, 0x1d, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0xc0,
-                   0xc0, 0xc0, 0x0, 0xdd, 0xdd, 0xdd, 0x0, 0x0, 0x0, 0x0, 0x1, 0x1, 0x1, 0x0, 0x1, 0x1,
-                   0x1, 0x0, 0xc1, 0xc1, 0xc1, 0x0, 0x1d, 0x1d, 0x1d, 0x0, 0x0, 0x0, 0x0, 0x1c, 0x1c, 0x1c,
-                   0x0, 0x1c, 0x1c, 0x1c, 0x0, 0x1, 0x1, 0x1, 0x0, 0x0, 0x0, 0x0],
-                  [0x0, 0x0, 0xc0, 0xc0, 0xc0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                   0x0, 0x0, 0x0, 0x0, 0x0, 0x1d, 0x1d, 0x1d, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                   0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xdc, 0xdc, 0xdc, 0x0, 0x0, 0x0, 0x0, 0x0,
-                   0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x1, 0x1, 0x1, 0x0, 0x0,
-                   0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0],
-                  [19, 4, 22, 10]]
-
-sevenSeg = [[0xf8, 0xfc, 0xfa, 0xf7, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf7, 0xfa, 0xfc, 0xf8,
-             0xc3, 0xe7, 0xc3, 0x81, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x81, 0xc3, 0xe7, 0xc3,
-             0x1f, 0x3f, 0x5f, 0xef, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xef, 0x5f, 0x3f, 0x1f],
-            [0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xf0, 0xf8, 0xfc, 0xf8,
-             0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x81, 0xc3, 0xe7, 0xc3,
-             0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xf, 0x1f, 0x3f, 0x1f],
-            [0x0, 0x0, 0x2, 0x7, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf7, 0xfa, 0xfc, 0xf8,
-             0xc0, 0xe0, 0xd8, 0xbc, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3d, 0x1b, 0x7, 0x3,
-             0x1f, 0x3f, 0x5f, 0xef, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xe0, 0x40, 0x0, 0x0],
-            [0x0, 0x0, 0x2, 0x7, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf7, 0xfa, 0xfc, 0xf8,
-             0x0, 0x0, 0x18, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0xbd, 0xdb, 0xe7, 0xc3,
-             0x0, 0x0, 0x40, 0xe0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xef, 0x5f, 0x3f, 0x1f],
-            [0xf8, 0xfc, 0xf8, 0xf0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xf0, 0xf8, 0xfc, 0xf8,
-             0x3, 0x7, 0x1b, 0x3d, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0xbd, 0xdb, 0xe7, 0xc3,
-             0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xf, 0x1f, 0x3f, 0x1f],
-            [0xf8, 0xfc, 0xfa, 0xf7, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0x7, 0x2, 0x0, 0x0,
-             0x3, 0x7, 0x1b, 0x3d, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0xbc, 0xd8, 0xe0, 0xc0,
-             0x0, 0x0, 0x40, 0xe0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xef, 0x5f, 0x3f, 0x1f],
-            [0xf8, 0xfc, 0xfa, 0xf7, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0x7, 0x2, 0x0, 0x0,
-             0xc3, 0xe7, 0xdb, 0xbd, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0xbc, 0xd8, 0xe0, 0xc0,
-             0x1f, 0x3f, 0x5f, 0xef, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xef, 0x5f, 0x3f, 0x1f],
-            [0x0, 0x0, 0x2, 0x7, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf7, 0xfa, 0xfc, 0xf8,
-             0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x81, 0xc3, 0xe7, 0xc3,
-             0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xf, 0x1f, 0x3f, 0x1f],
-            [0xf8, 0xfc, 0xfa, 0xf7, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf7, 0xfa, 0xfc, 0xf8,
-             0xc3, 0xe7, 0xdb, 0xbd, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0xbd, 0xdb, 0xe7, 0xc3,
-             0x1f, 0x3f, 0x5f, 0xef, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xef, 0x5f, 0x3f, 0x1f],
-            [0xf8, 0xfc, 0xfa, 0xf7, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf, 0xf7, 0xfa, 0xfc, 0xf8,
-             0x3, 0x7, 0x1b, 0x3d, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0xbd, 0xdb, 0xe7, 0xc3,
-             0x0, 0x0, 0x40, 0xe0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xf0, 0xef, 0x5f, 0x3f, 0x1f],
-            [0x0, 0x0, 0x80, 0xc0, 0x80, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-             0x0, 0x0, 0x81, 0xc3, 0x81, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-             0x0, 0x0, 0x1, 0x3, 0x1, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0],
-            [16, 3, 18, 9]]
-
-sevenSegLarge = [[0xc0, 0xe0, 0xc8, 0x9c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x9c, 0xc8, 0xe0,
-                  0xc0, 0x3f, 0x7f, 0x3f, 0x1f, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x1f, 0x3f,
-                  0x7f, 0x3f, 0xfc, 0xfe, 0xfc, 0xf8, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xf8,
-                  0xfc, 0xfe, 0xfc, 0x3, 0x7, 0x13, 0x39, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c,
-                  0x39, 0x13, 0x7, 0x3],
-                 [0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x80, 0xc0, 0xe0,
-                  0xc0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x1f, 0x3f,
-                  0x7f, 0x3f, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xf8,
-                  0xfc, 0xfe, 0xfc, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                  0x1, 0x3, 0x7, 0x3],
-                 [0x0, 0x0, 0x8, 0x1c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x9c, 0xc8, 0xe0,
-                  0xc0, 0x0, 0x0, 0x0, 0x80, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0x9f, 0x3f,
-                  0x7f, 0x3f, 0xfc, 0xfe, 0xfc, 0xf9, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x1,
-                  0x0, 0x0, 0x0, 0x3, 0x7, 0x13, 0x39, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c,
-                  0x38, 0x10, 0x0, 0x0],
-                 [0x0, 0x0, 0x8, 0x1c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x9c, 0xc8, 0xe0,
-                  0xc0, 0x0, 0x0, 0x0, 0x80, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0x9f, 0x3f,
-                  0x7f, 0x3f, 0x0, 0x0, 0x0, 0x1, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0xf9,
-                  0xfc, 0xfe, 0xfc, 0x0, 0x0, 0x10, 0x38, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c,
-                  0x39, 0x13, 0x7, 0x3],
-                 [0xc0, 0xe0, 0xc0, 0x80, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x80, 0xc0, 0xe0,
-                  0xc0, 0x3f, 0x7f, 0x3f, 0x9f, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0x9f, 0x3f,
-                  0x7f, 0x3f, 0x0, 0x0, 0x0, 0x1, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0xf9,
-                  0xfc, 0xfe, 0xfc, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                  0x1, 0x3, 0x7, 0x3],
-                 [0xc0, 0xe0, 0xc8, 0x9c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x1c, 0x8, 0x0,
-                  0x0, 0x3f, 0x7f, 0x3f, 0x9f, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0x80, 0x0,
-                  0x0, 0x0, 0x0, 0x0, 0x0, 0x1, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0xf9,
-                  0xfc, 0xfe, 0xfc, 0x0, 0x0, 0x10, 0x38, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c,
-                  0x39, 0x13, 0x7, 0x3],
-                 [0xc0, 0xe0, 0xc8, 0x9c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x1c, 0x8, 0x0,
-                  0x0, 0x3f, 0x7f, 0x3f, 0x9f, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0x80, 0x0,
-                  0x0, 0x0, 0xfc, 0xfe, 0xfc, 0xf9, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0xf9,
-                  0xfc, 0xfe, 0xfc, 0x3, 0x7, 0x13, 0x39, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c,
-                  0x39, 0x13, 0x7, 0x3],
-                 [0x0, 0x0, 0x8, 0x1c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x9c, 0xc8, 0xe0,
-                  0xc0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x1f, 0x3f,
-                  0x7f, 0x3f, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xf8,
-                  0xfc, 0xfe, 0xfc, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                  0x1, 0x3, 0x7, 0x3],
-                 [0xc0, 0xe0, 0xc8, 0x9c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x9c, 0xc8, 0xe0,
-                  0xc0, 0x3f, 0x7f, 0x3f, 0x9f, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0x9f, 0x3f,
-                  0x7f, 0x3f, 0xfc, 0xfe, 0xfc, 0xf9, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0xf9,
-                  0xfc, 0xfe, 0xfc, 0x3, 0x7, 0x13, 0x39, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c,
-                  0x39, 0x13, 0x7, 0x3],
-                 [0xc0, 0xe0, 0xc8, 0x9c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x9c, 0xc8, 0xe0,
-                  0xc0, 0x3f, 0x7f, 0x3f, 0x9f, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0xc0, 0x9f, 0x3f,
-                  0x7f, 0x3f, 0x0, 0x0, 0x0, 0x1, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0x3, 0xf9,
-                  0xfc, 0xfe, 0xfc, 0x0, 0x0, 0x10, 0x38, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c, 0x3c,
-                  0x39, 0x13, 0x7, 0x3],
-                 [0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                  0x0, 0x8, 0x1c, 0x1c, 0x8, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                  0x0, 0x0, 0x10, 0x38, 0x38, 0x10, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
-                  0x0, 0x0, 0x0, 0x0],
-                 [17, 4, 23, 9]]
-
-# Pixel width, Pixel Height, Byte height, Pixel stride, Colon stride
-fiveBySevenFullset = [[5, 7, 1, 6, 0],
-                      [0x3e, 0x51, 0x49, 0x45, 0x3e],
-                      [0x0, 0x42, 0x7f, 0x40, 0x0],
-                      [0x42, 0x61, 0x51, 0x49, 0x46],
-                      [0x21, 0x41, 0x45, 0x4b, 0x31],
-                      [0x18, 0x14, 0x12, 0x7f, 0x10],
-                      [0x27, 0x45, 0x45, 0x45, 0x39],
-                      [0x3c, 0x4a, 0x49, 0x49, 0x30],
-                      [0x1, 0x71, 0x9, 0x5, 0x3],
-                      [0x36, 0x49, 0x49, 0x49, 0x36],
-                      [0x6, 0x49, 0x49, 0x29, 0x1e],
-                      [0x7e, 0x11, 0x11, 0x11, 0x7e],
-                      [0x7f, 0x49, 0x49, 0x49, 0x36],
-                      [0x3e, 0x41, 0x41, 0x41, 0x22],
-                      [0x7f, 0x41, 0x41, 0x41, 0x3e],
-                      [0x7f, 0x49, 0x49, 0x49, 0x41],
-                      [0x7f, 0x9, 0x9, 0x9, 0x1],
-                      [0x3e, 0x41, 0x49, 0x49, 0x7a],
-                      [0x7f, 0x8, 0x8, 0x8, 0x7f],
-                      [0x0, 0x41, 0x7f, 0x41, 0x0],
-                      [0x20, 0x40, 0x41, 0x3f, 0x1],
-                      [0x7f, 0x8, 0x14, 0x22, 0x41],
-                      [0x7f, 0x40, 0x40, 0x40, 0x40],
-                      [0x7f, 0x2, 0xc, 0x2, 0x7f],
-                      [0x7f, 0x4, 0x8, 0x10, 0x7f],
-                      [0x3e, 0x41, 0x41, 0x41, 0x3e],
-                      [0x7f, 0x9, 0x9, 0x9, 0x6],
-                      [0x3e, 0x41, 0x51, 0x21, 0x5e],
-                      [0x7f, 0x9, 0x19, 0x29, 0x46],
-                      [0x46, 0x49, 0x49, 0x49, 0x31],
-                      [0x1, 0x1, 0x7f, 0x1, 0x1],
-                      [0x3f, 0x40, 0x40, 0x40, 0x3f],
-                      [0x1f, 0x20, 0x40, 0x20, 0x1f],
-                      [0x3f, 0x40, 0x38, 0x40, 0x3f],
-                      [0x63, 0x14, 0x8, 0x14, 0x63],
-                      [0x7, 0x8, 0x70, 0x8, 0x7],
-                      [0x61, 0x51, 0x49, 0x45, 0x43]]
-
-sevenByNine = [[7, 9, 2, 8, 0],
-               [0xfe, 0xff, 0x21, 0x11, 0x9, 0xff, 0xfe, 0x0, 0x1, 0x1, 0x1, 0x1, 0x1, 0x0],
-               [0x0, 0x4, 0xff, 0xff, 0x0, 0x0, 0x0, 0x1, 0x1, 0x1, 0x1, 0x1, 0x1, 0x0],
-               [0x2, 0x83, 0xc1, 0x61, 0x31, 0x1f, 0xe, 0x1, 0x1, 0x1, 0x1, 0x1, 0x1, 0x1],
-               [0x82, 0x83, 0x1, 0x11, 0x11, 0xff, 0xee, 0x0, 0x1, 0x1, 0x1, 0x1, 0x1, 0x0],
-               [0x30, 0x38, 0x2c, 0x26, 0xff, 0xff, 0x20, 0x0, 0x0, 0x0, 0x0, 0x1, 0x1, 0x0],
-               [0x8f, 0x8f, 0x9, 0x9, 0x9, 0xf9, 0xf1, 0x0, 0x1, 0x1, 0x1, 0x1, 0x1, 0x0],
-               [0xfe, 0xff, 0x9, 0x9, 0x9, 0xfb, 0xf2, 0x0, 0x1, 0x1, 0x1, 0x1, 0x1, 0x0],
-               [0x1, 0xe1, 0xf1, 0x19, 0xd, 0x7, 0x3, 0x0, 0x1, 0x1, 0x0, 0x0, 0x0, 0x0],
-               [0xee, 0xff, 0x11, 0x11, 0x11, 0xff, 0xee, 0x0, 0x1, 0x1, 0x1, 0x1, 0x1, 0x0],
-               [0x9e, 0xbf, 0x21, 0x21, 0x21, 0xff, 0xfe, 0x0, 0x1, 0x1, 0x1, 0x1, 0x1, 0x0]]
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""Растровые шрифты для OLED дисплея.
+
+Символ хранится столбцами по 8 точек (младший бит сверху), полосами по
+8 строк: сначала столбцы верхней полосы, затем следующей. Данные всех
+символов шрифта лежат подряд в одном неизменяемом bytes.
+"""
+
+from PIL import Image
+
+class BitmapFont:
+    """Растровый шрифт с явными размерами.
+
+    width и height - размер символа в точках, chars - строка символов в
+    порядке их данных в data, stride - шаг до следующего символа, advances
+    - свой шаг для отдельных символов (например двоеточия в часах).
+    Строчные буквы рисуются заглавными, если строчных в шрифте нет,
+    неизвестные символы - пробелом.
+    """
+
+    def __init__(self, width, height, chars, data, stride=None, advances=None):
+        self.width = width
+        self.height = height
+        self.bands = (height + 7) // 8
+        self.chars = chars
+        self.data = data
+        self.stride = stride if stride is not None else width + 1
+        self.line_height = height + 1
+        self.advances = advances or {}
+        self.index = dict((char, num) for num, char in enumerate(chars))
+        self.glyphs = {}
+        size = width * self.bands
+        if len(data) != size * len(chars):
+            raise ValueError('Font data is {} bytes, expected {}'.format(len(data), size * len(chars)))
+
+    def __repr__(self):
+        return 'BitmapFont({}x{}, {!r})'.format(self.width, self.height, self.chars)
+
+    def _char(self, char):
+        if char in self.index:
+            return char
+        if char.upper() in self.index:
+            return char.upper()
+        return None
+
+    def glyph_data(self, char):
+        """Байты символа: столбцы полосами, как описано в модуле."""
+        num = self.index[char]
+        size = self.width * self.bands
+        return self.data[num * size:(num + 1) * size]
+
+    def glyph(self, char):
+        """1-битная картинка символа width x height, включая погашенные точки."""
+        image = self.glyphs.get(char)
+        if image is None:
+            data = self.glyph_data(char)
+            image = Image.new('1', (self.width, self.height))
+            image.putdata([255 if (data[x + (y // 8) * self.width] >> (y % 8)) & 0x01 else 0
+                           for y in range(self.height) for x in range(self.width)])
+            self.glyphs[char] = image
+        return image
+
+    def advance(self, char):
+        """Шаг после символа в точках."""
+        return self.advances.get(char, self.stride)
+
+    def textsize(self, text):
+        """Размер строки (можно многострочной) в точках."""
+        lines = text.split('\n')
+        width = 0
+        for line in lines:
+            chars = [self._char(char) for char in line]
+            if len(chars) > 0:
+                width = max(width, sum(self.advance(char) for char in chars[:-1]) + self.width)
+        return width, len(lines) * self.line_height - 1
+
+    def draw(self, image, xy, text, fill=255, opaque=False):
+        """Отрисовка строки text на image с левым верхним углом xy.
+
+        opaque - символ рисуется вместе с погашенными точками и затирает
+        то, что было под ним (так рисуются часы поверх прошлого кадра),
+        иначе рисуются только точки символа цветом fill.
+        """
+        x, y = int(xy[0]), int(xy[1])
+        for line in text.split('\n'):
+            pos = x
+            for char in line:
+                char = self._char(char)
+                if char is not None:
+                    glyph = self.glyph(char)
+                    if opaque:
+                        image.paste(glyph, (pos, y))
+                    else:
+                        image.paste(fill, (pos, y, pos + self.width, y + self.height), glyph)
+                pos += self.advance(char)
+            y += self.line_height
+
+# Точечные символы 14x24: цифры и двоеточие для часов
+dotmatrix = BitmapFont(14, 24, '0123456789:', (
+    # 0
+    b'\x60\x60\x00\x0c\x0c\x00\x0c\x0c\x00\x0c\x0c\x00\x60\x60\xdb\xdb'
+    b'\x00\xc0\xc0\x00\x18\x18\x00\x03\x03\x00\xdb\xdb\x06\x06\x00\x30'
+    b'\x30\x00\x30\x30\x00\x30\x30\x00\x06\x06'
+    # 1
+    b'\x00\x00\x00\x60\x60\x00\x6c\x6c\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\xdb\xdb\x00\x00\x00\x00\x00\x00\x00\x00\x00\x30'
+    b'\x30\x00\x36\x36\x00\x30\x30\x00\x00\x00'
+    # 2
+    b'\x60\x60\x00\x0c\x0c\x00\x0c\x0c\x00\x0c\x0c\x00\x60\x60\x00\x00'
+    b'\x00\x00\x00\x00\xc0\xc0\x00\x18\x18\x00\x03\x03\x30\x30\x00\x36'
+    b'\x36\x00\x30\x30\x00\x30\x30\x00\x30\x30'
+    # 3
+    b'\x60\x60\x00\x0c\x0c\x00\x0c\x0c\x00\x0c\x0c\x00\x60\x60\x00\x00'
+    b'\x00\x00\x00\x00\x18\x18\x00\x18\x18\x00\xc3\xc3\x06\x06\x00\x30'
+    b'\x30\x00\x30\x30\x00\x30\x30\x00\x06\x06'
+    # 4
+    b'\x00\x00\x00\x00\x00\x00\x60\x60\x00\x6c\x6c\x00\x00\x00\xd8\xd8'
+    b'\x00\xc3\xc3\x00\xc0\xc0\x00\xdb\xdb\x00\xc0\xc0\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x36\x36\x00\x00\x00'
+    # 5
+    b'\x6c\x6c\x00\x0c\x0c\x00\x0c\x0c\x00\x0c\x0c\x00\x0c\x0c\x03\x03'
+    b'\x00\x03\x03\x00\x03\x03\x00\x03\x03\x00\xd8\xd8\x06\x06\x00\x30'
+    b'\x30\x00\x30\x30\x00\x30\x30\x00\x06\x06'
+    # 6
+    b'\x00\x00\x00\x60\x60\x00\x0c\x0c\x00\x0c\x0c\x00\x00\x00\xdb\xdb'
+    b'\x00\x18\x18\x00\x18\x18\x00\x18\x18\x00\xc0\xc0\x06\x06\x00\x30'
+    b'\x30\x00\x30\x30\x00\x30\x30\x00\x06\x06'
+    # 7
+    b'\x0c\x0c\x00\x0c\x0c\x00\x0c\x0c\x00\x0c\x0c\x00\x6c\x6c\x00\x00'
+    b'\x00\xc0\xc0\x00\x18\x18\x00\x03\x03\x00\x00\x00\x00\x00\x00\x36'
+    b'\x36\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    # 8
+    b'\x60\x60\x00\x0c\x0c\x00\x0c\x0c\x00\x0c\x0c\x00\x60\x60\xc3\xc3'
+    b'\x00\x18\x18\x00\x18\x18\x00\x18\x18\x00\xc3\xc3\x06\x06\x00\x30'
+    b'\x30\x00\x30\x30\x00\x30\x30\x00\x06\x06'
+    # 9
+    b'\x60\x60\x00\x0c\x0c\x00\x0c\x0c\x00\x0c\x0c\x00\x60\x60\x03\x03'
+    b'\x00\x18\x18\x00\x18\x18\x00\x18\x18\x00\xdb\xdb\x00\x00\x00\x30'
+    b'\x30\x00\x30\x30\x00\x06\x06\x00\x00\x00'
+    # :
+    b'\x00\x00\x00\x60\x60\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\xc3\xc3\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x06'
+    b'\x06\x00\x00\x00\x00\x00\x00\x00\x00\x00'),
+    stride=18, advances={':': 11})
+
+# Точечные символы 19x32: цифры и двоеточие для часов
+dotmatrixLarge = BitmapFont(19, 32, '0123456789:', (
+    # 0
+    b'\xc0\xc0\xc0\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00'
+    b'\xc0\xc0\xc0\xdd\xdd\xdd\x00\x00\x00\x00\x00\xc0\xc0\xc0\x00\x1c'
+    b'\x1c\x1c\x00\xdd\xdd\xdd\xdd\xdd\xdd\x00\x1c\x1c\x1c\x00\x01\x01'
+    b'\x01\x00\x00\x00\x00\x00\xdd\xdd\xdd\x01\x01\x01\x00\x1c\x1c\x1c'
+    b'\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x01\x01\x01'
+    # 1
+    b'\x00\x00\x00\x00\xc0\xc0\xc0\x00\xdc\xdc\xdc\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x01\x01\x01\x00\xdd\xdd\xdd\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xdd\xdd'
+    b'\xdd\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x1c\x1c\x1c'
+    b'\x00\x1d\x1d\x1d\x00\x1c\x1c\x1c\x00\x00\x00\x00'
+    # 2
+    b'\xc0\xc0\xc0\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00'
+    b'\xc0\xc0\xc0\x01\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\xc0'
+    b'\xc0\xc0\x00\x1d\x1d\x1d\x00\x00\x00\x00\xc0\xc0\xc0\x00\x1c\x1c'
+    b'\x1c\x00\x01\x01\x01\x00\x00\x00\x00\x1c\x1c\x1c\x00\x1d\x1d\x1d'
+    b'\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c'
+    # 3
+    b'\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\xdc\xdc\xdc\x00'
+    b'\x1c\x1c\x1c\x00\x00\x00\x00\x00\x00\x00\x00\x1c\x1c\x1c\x00\xc1'
+    b'\xc1\xc1\x00\x00\x00\x00\xc0\xc0\xc0\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x01\x01\x01\x00\xdc\xdc\xdc\x01\x01\x01\x00\x1c\x1c\x1c'
+    b'\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x01\x01\x01'
+    # 4
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\xc0\xc0\xc0\x00\xdc\xdc\xdc\x00'
+    b'\x00\x00\x00\xc0\xc0\xc0\x00\x1c\x1c\x1c\x00\x01\x01\x01\x00\xdd'
+    b'\xdd\xdd\x00\x00\x00\x00\x1d\x1d\x1d\x00\x1c\x1c\x1c\x00\x1c\x1c'
+    b'\x1c\x00\xdd\xdd\xdd\x00\x1c\x1c\x1c\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x1d\x1d\x1d\x00\x00\x00\x00'
+    # 5
+    b'\xdc\xdc\xdc\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00'
+    b'\x1c\x1c\x1c\x1d\x1d\x1d\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x1c'
+    b'\x1c\x1c\x00\xc0\xc0\xc0\xc0\xc0\xc0\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\xdd\xdd\xdd\x01\x01\x01\x00\x1c\x1c\x1c'
+    b'\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x01\x01\x01'
+    # 6
+    b'\x00\x00\x00\x00\xc0\xc0\xc0\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00'
+    b'\x00\x00\x00\xdc\xdc\xdc\x00\xc1\xc1\xc1\x00\xc0\xc0\xc0\x00\xc0'
+    b'\xc0\xc0\x00\x00\x00\x00\xdd\xdd\xdd\x00\x01\x01\x01\x00\x01\x01'
+    b'\x01\x00\x01\x01\x01\x00\xdc\xdc\xdc\x01\x01\x01\x00\x1c\x1c\x1c'
+    b'\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x01\x01\x01'
+    # 7
+    b'\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00'
+    b'\xdc\xdc\xdc\x00\x00\x00\x00\x00\x00\x00\x00\xc0\xc0\xc0\x00\x1c'
+    b'\x1c\x1c\x00\x01\x01\x01\x00\x00\x00\x00\xdc\xdc\xdc\x00\x01\x01'
+    b'\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x1d\x1d\x1d'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    # 8
+    b'\xc0\xc0\xc0\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00'
+    b'\xc0\xc0\xc0\x1d\x1d\x1d\x00\xc0\xc0\xc0\x00\xc0\xc0\xc0\x00\xc0'
+    b'\xc0\xc0\x00\x1d\x1d\x1d\xdc\xdc\xdc\x00\x01\x01\x01\x00\x01\x01'
+    b'\x01\x00\x01\x01\x01\x00\xdc\xdc\xdc\x01\x01\x01\x00\x1c\x1c\x1c'
+    b'\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x01\x01\x01'
+    # 9
+    b'\xc0\xc0\xc0\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00\x1c\x1c\x1c\x00'
+    b'\xc0\xc0\xc0\x1d\x1d\x1d\x00\xc0\xc0\xc0\x00\xc0\xc0\xc0\x00\xc0'
+    b'\xc0\xc0\x00\xdd\xdd\xdd\x00\x00\x00\x00\x01\x01\x01\x00\x01\x01'
+    b'\x01\x00\xc1\xc1\xc1\x00\x1d\x1d\x1d\x00\x00\x00\x00\x1c\x1c\x1c'
+    b'\x00\x1c\x1c\x1c\x00\x01\x01\x01\x00\x00\x00\x00'
+    # :
+    b'\x00\x00\xc0\xc0\xc0\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x1d\x1d\x1d\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\xdc\xdc\xdc\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x01\x01\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'),
+    stride=22, advances={':': 10})
+
+# Семисегментные символы 16x24: цифры и двоеточие для часов
+sevenSeg = BitmapFont(16, 24, '0123456789:', (
+    # 0
+    b'\xf8\xfc\xfa\xf7\x0f\x0f\x0f\x0f\x0f\x0f\x0f\x0f\xf7\xfa\xfc\xf8'
+    b'\xc3\xe7\xc3\x81\x00\x00\x00\x00\x00\x00\x00\x00\x81\xc3\xe7\xc3'
+    b'\x1f\x3f\x5f\xef\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xef\x5f\x3f\x1f'
+    # 1
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xf0\xf8\xfc\xf8'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x81\xc3\xe7\xc3'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x0f\x1f\x3f\x1f'
+    # 2
+    b'\x00\x00\x02\x07\x0f\x0f\x0f\x0f\x0f\x0f\x0f\x0f\xf7\xfa\xfc\xf8'
+    b'\xc0\xe0\xd8\xbc\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3d\x1b\x07\x03'
+    b'\x1f\x3f\x5f\xef\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xe0\x40\x00\x00'
+    # 3
+    b'\x00\x00\x02\x07\x0f\x0f\x0f\x0f\x0f\x0f\x0f\x0f\xf7\xfa\xfc\xf8'
+    b'\x00\x00\x18\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\xbd\xdb\xe7\xc3'
+    b'\x00\x00\x40\xe0\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xef\x5f\x3f\x1f'
+    # 4
+    b'\xf8\xfc\xf8\xf0\x00\x00\x00\x00\x00\x00\x00\x00\xf0\xf8\xfc\xf8'
+    b'\x03\x07\x1b\x3d\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\xbd\xdb\xe7\xc3'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x0f\x1f\x3f\x1f'
+    # 5
+    b'\xf8\xfc\xfa\xf7\x0f\x0f\x0f\x0f\x0f\x0f\x0f\x0f\x07\x02\x00\x00'
+    b'\x03\x07\x1b\x3d\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\xbc\xd8\xe0\xc0'
+    b'\x00\x00\x40\xe0\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xef\x5f\x3f\x1f'
+    # 6
+    b'\xf8\xfc\xfa\xf7\x0f\x0f\x0f\x0f\x0f\x0f\x0f\x0f\x07\x02\x00\x00'
+    b'\xc3\xe7\xdb\xbd\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\xbc\xd8\xe0\xc0'
+    b'\x1f\x3f\x5f\xef\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xef\x5f\x3f\x1f'
+    # 7
+    b'\x00\x00\x02\x07\x0f\x0f\x0f\x0f\x0f\x0f\x0f\x0f\xf7\xfa\xfc\xf8'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x81\xc3\xe7\xc3'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x0f\x1f\x3f\x1f'
+    # 8
+    b'\xf8\xfc\xfa\xf7\x0f\x0f\x0f\x0f\x0f\x0f\x0f\x0f\xf7\xfa\xfc\xf8'
+    b'\xc3\xe7\xdb\xbd\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\xbd\xdb\xe7\xc3'
+    b'\x1f\x3f\x5f\xef\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xef\x5f\x3f\x1f'
+    # 9
+    b'\xf8\xfc\xfa\xf7\x0f\x0f\x0f\x0f\x0f\x0f\x0f\x0f\xf7\xfa\xfc\xf8'
+    b'\x03\x07\x1b\x3d\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\xbd\xdb\xe7\xc3'
+    b'\x00\x00\x40\xe0\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xf0\xef\x5f\x3f\x1f'
+    # :
+    b'\x00\x00\x80\xc0\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x81\xc3\x81\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x01\x03\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'),
+    stride=18, advances={':': 9})
+
+# Семисегментные символы 17x32: цифры и двоеточие для часов
+sevenSegLarge = BitmapFont(17, 32, '0123456789:', (
+    # 0
+    b'\xc0\xe0\xc8\x9c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x9c\xc8\xe0'
+    b'\xc0\x3f\x7f\x3f\x1f\x00\x00\x00\x00\x00\x00\x00\x00\x00\x1f\x3f'
+    b'\x7f\x3f\xfc\xfe\xfc\xf8\x00\x00\x00\x00\x00\x00\x00\x00\x00\xf8'
+    b'\xfc\xfe\xfc\x03\x07\x13\x39\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c'
+    b'\x39\x13\x07\x03'
+    # 1
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\xc0\xe0'
+    b'\xc0\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x1f\x3f'
+    b'\x7f\x3f\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xf8'
+    b'\xfc\xfe\xfc\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x01\x03\x07\x03'
+    # 2
+    b'\x00\x00\x08\x1c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x9c\xc8\xe0'
+    b'\xc0\x00\x00\x00\x80\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\x9f\x3f'
+    b'\x7f\x3f\xfc\xfe\xfc\xf9\x03\x03\x03\x03\x03\x03\x03\x03\x03\x01'
+    b'\x00\x00\x00\x03\x07\x13\x39\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c'
+    b'\x38\x10\x00\x00'
+    # 3
+    b'\x00\x00\x08\x1c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x9c\xc8\xe0'
+    b'\xc0\x00\x00\x00\x80\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\x9f\x3f'
+    b'\x7f\x3f\x00\x00\x00\x01\x03\x03\x03\x03\x03\x03\x03\x03\x03\xf9'
+    b'\xfc\xfe\xfc\x00\x00\x10\x38\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c'
+    b'\x39\x13\x07\x03'
+    # 4
+    b'\xc0\xe0\xc0\x80\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\xc0\xe0'
+    b'\xc0\x3f\x7f\x3f\x9f\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\x9f\x3f'
+    b'\x7f\x3f\x00\x00\x00\x01\x03\x03\x03\x03\x03\x03\x03\x03\x03\xf9'
+    b'\xfc\xfe\xfc\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x01\x03\x07\x03'
+    # 5
+    b'\xc0\xe0\xc8\x9c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x1c\x08\x00'
+    b'\x00\x3f\x7f\x3f\x9f\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\x80\x00'
+    b'\x00\x00\x00\x00\x00\x01\x03\x03\x03\x03\x03\x03\x03\x03\x03\xf9'
+    b'\xfc\xfe\xfc\x00\x00\x10\x38\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c'
+    b'\x39\x13\x07\x03'
+    # 6
+    b'\xc0\xe0\xc8\x9c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x1c\x08\x00'
+    b'\x00\x3f\x7f\x3f\x9f\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\x80\x00'
+    b'\x00\x00\xfc\xfe\xfc\xf9\x03\x03\x03\x03\x03\x03\x03\x03\x03\xf9'
+    b'\xfc\xfe\xfc\x03\x07\x13\x39\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c'
+    b'\x39\x13\x07\x03'
+    # 7
+    b'\x00\x00\x08\x1c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x9c\xc8\xe0'
+    b'\xc0\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x1f\x3f'
+    b'\x7f\x3f\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xf8'
+    b'\xfc\xfe\xfc\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x01\x03\x07\x03'
+    # 8
+    b'\xc0\xe0\xc8\x9c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x9c\xc8\xe0'
+    b'\xc0\x3f\x7f\x3f\x9f\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\x9f\x3f'
+    b'\x7f\x3f\xfc\xfe\xfc\xf9\x03\x03\x03\x03\x03\x03\x03\x03\x03\xf9'
+    b'\xfc\xfe\xfc\x03\x07\x13\x39\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c'
+    b'\x39\x13\x07\x03'
+    # 9
+    b'\xc0\xe0\xc8\x9c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x9c\xc8\xe0'
+    b'\xc0\x3f\x7f\x3f\x9f\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\x9f\x3f'
+    b'\x7f\x3f\x00\x00\x00\x01\x03\x03\x03\x03\x03\x03\x03\x03\x03\xf9'
+    b'\xfc\xfe\xfc\x00\x00\x10\x38\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c\x3c'
+    b'\x39\x13\x07\x03'
+    # :
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x08\x1c\x1c\x08\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x10\x38\x38\x10\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00'),
+    stride=23, advances={':': 9})
+
+# Шрифт 5x7: цифры, латинские заглавные буквы и знаки для текста
+fiveBySevenFullset = BitmapFont(5, 7, '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ .:-/!%', (
+    # 0
+    b'\x3e\x51\x49\x45\x3e'
+    # 1
+    b'\x00\x42\x7f\x40\x00'
+    # 2
+    b'\x42\x61\x51\x49\x46'
+    # 3
+    b'\x21\x41\x45\x4b\x31'
+    # 4
+    b'\x18\x14\x12\x7f\x10'
+    # 5
+    b'\x27\x45\x45\x45\x39'
+    # 6
+    b'\x3c\x4a\x49\x49\x30'
+    # 7
+    b'\x01\x71\x09\x05\x03'
+    # 8
+    b'\x36\x49\x49\x49\x36'
+    # 9
+    b'\x06\x49\x49\x29\x1e'
+    # A
+    b'\x7e\x11\x11\x11\x7e'
+    # B
+    b'\x7f\x49\x49\x49\x36'
+    # C
+    b'\x3e\x41\x41\x41\x22'
+    # D
+    b'\x7f\x41\x41\x41\x3e'
+    # E
+    b'\x7f\x49\x49\x49\x41'
+    # F
+    b'\x7f\x09\x09\x09\x01'
+    # G
+    b'\x3e\x41\x49\x49\x7a'
+    # H
+    b'\x7f\x08\x08\x08\x7f'
+    # I
+    b'\x00\x41\x7f\x41\x00'
+    # J
+    b'\x20\x40\x41\x3f\x01'
+    # K
+    b'\x7f\x08\x14\x22\x41'
+    # L
+    b'\x7f\x40\x40\x40\x40'
+    # M
+    b'\x7f\x02\x0c\x02\x7f'
+    # N
+    b'\x7f\x04\x08\x10\x7f'
+    # O
+    b'\x3e\x41\x41\x41\x3e'
+    # P
+    b'\x7f\x09\x09\x09\x06'
+    # Q
+    b'\x3e\x41\x51\x21\x5e'
+    # R
+    b'\x7f\x09\x19\x29\x46'
+    # S
+    b'\x46\x49\x49\x49\x31'
+    # T
+    b'\x01\x01\x7f\x01\x01'
+    # U
+    b'\x3f\x40\x40\x40\x3f'
+    # V
+    b'\x1f\x20\x40\x20\x1f'
+    # W
+    b'\x3f\x40\x38\x40\x3f'
+    # X
+    b'\x63\x14\x08\x14\x63'
+    # Y
+    b'\x07\x08\x70\x08\x07'
+    # Z
+    b'\x61\x51\x49\x45\x43'
+    # ' '
+    b'\x00\x00\x00\x00\x00'
+    # .
+    b'\x00\x60\x60\x00\x00'
+    # :
+    b'\x00\x36\x36\x00\x00'
+    # -
+    b'\x08\x08\x08\x08\x08'
+    # /
+    b'\x20\x10\x08\x04\x02'
+    # !
+    b'\x00\x00\x5f\x00\x00'
+    # %
+    b'\x23\x13\x08\x64\x62'),
+    stride=6)
+
+# Шрифт 7x9: цифры
+sevenByNine = BitmapFont(7, 9, '0123456789', (
+    # 0
+    b'\xfe\xff\x21\x11\x09\xff\xfe\x00\x01\x01\x01\x01\x01\x00'
+    # 1
+    b'\x00\x04\xff\xff\x00\x00\x00\x01\x01\x01\x01\x01\x01\x00'
+    # 2
+    b'\x02\x83\xc1\x61\x31\x1f\x0e\x01\x01\x01\x01\x01\x01\x01'
+    # 3
+    b'\x82\x83\x01\x11\x11\xff\xee\x00\x01\x01\x01\x01\x01\x00'
+    # 4
+    b'\x30\x38\x2c\x26\xff\xff\x20\x00\x00\x00\x00\x01\x01\x00'
+    # 5
+    b'\x8f\x8f\x09\x09\x09\xf9\xf1\x00\x01\x01\x01\x01\x01\x00'
+    # 6
+    b'\xfe\xff\x09\x09\x09\xfb\xf2\x00\x01\x01\x01\x01\x01\x00'
+    # 7
+    b'\x01\xe1\xf1\x19\x0d\x07\x03\x00\x01\x01\x00\x00\x00\x00'
+    # 8
+    b'\xee\xff\x11\x11\x11\xff\xee\x00\x01\x01\x01\x01\x01\x00'
+    # 9
+    b'\x9e\xbf\x21\x21\x21\xff\xfe\x00\x01\x01\x01\x01\x01\x00'),
+    stride=8)
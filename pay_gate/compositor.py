@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Сборка экрана проезда из слоёв."""
+
+import threading
+from PIL import Image, ImageChops, ImageDraw
+
+# слои снизу вверх и области экрана, которые они занимают (None - весь экран)
+LAYOUT = (
+    ('background', None),                                # логотип или заставка
+    ('header', (0, 0, 128, 16)),                         # строка "Pay time" над часами
+    ('clock', (0, 16, 128, 48)),                         # часы отсчёта
+    ('progress', (0, 53, 128, 60)),                      # прогресс бар
+    ('overlay', None),                                   # сообщения поверх всего
+)
+
+class Layer:
+    """Слой: своя 1-битная картинка размером с экран, ключ входных данных и видимость."""
+
+    def __init__(self, name, size, box=None):
+        self.name = name
+        self.box = box if box is not None else (0, 0) + tuple(size)
+        self.image = Image.new('1', size)
+        self.key = None
+        self.visible = False
+
+    def clear(self):
+        """Очистка области слоя."""
+        ImageDraw.Draw(self.image).rectangle([self.box[:2], (self.box[2] - 1, self.box[3] - 1)], fill=0)
+
+class Compositor:
+    """Экран, собранный из слоёв.
+
+    Слой перерисовывается функцией paint только при смене ключа его
+    входных данных (ключ None - перерисовка всегда) и отмечает свою
+    область изменившейся. compose() собирает в target только изменившиеся
+    области: видимые слои в них складываются через логическое ИЛИ.
+    Рисовать в слой можно из любого потока, сборка и изменения слоёв
+    идут под одной блокировкой.
+    """
+
+    def __init__(self, target, layout=LAYOUT):
+        self.target = target
+        self.order = [Layer(name, target.size, box) for name, box in layout]
+        self.layers = dict((layer.name, layer) for layer in self.order)
+        self.dirty = []
+        self.lock = threading.RLock()
+
+    def update(self, name, key, paint, clear=True):
+        """Перерисовка слоя name вызовом paint(картинка слоя), если key изменился.
+
+        clear=False оставляет прежнее содержимое (для пошаговой отрисовки),
+        скрытый слой очищается всегда. Возвращает True, если слой перерисован.
+        """
+        layer = self.layers[name]
+        with self.lock:
+            if layer.visible and key is not None and layer.key == key:
+                return False
+            if clear or not layer.visible:
+                layer.clear()
+            paint(layer.image)
+            layer.key = key
+            layer.visible = True
+            self._touch(layer.box)
+            return True
+
+    def image(self, name, image):
+        """Слой name - готовая картинка image во весь экран, или скрыть его при None."""
+        if image is None:
+            self.hide(name)
+        else:
+            self.update(name, None, lambda layer: layer.paste(image, (0, 0)))
+
+    def hide(self, *names):
+        """Скрыть слои."""
+        with self.lock:
+            for name in names:
+                layer = self.layers[name]
+                if layer.visible:
+                    layer.visible = False
+                    layer.key = None
+                    self._touch(layer.box)
+
+    def only(self, *names):
+        """Скрыть все слои, кроме names."""
+        self.hide(*[layer.name for layer in self.order if layer.name not in names])
+
+    def _touch(self, box):
+        if box not in self.dirty:
+            self.dirty.append(box)
+
+    def compose(self):
+        """Сборка изменившихся областей в target. Возвращает True, если что-то собрано."""
+        with self.lock:
+            if len(self.dirty) <= 0:
+                return False
+            for box in self.dirty:
+                out = None
+                for layer in self.order:
+                    if not layer.visible or not _overlaps(layer.box, box):
+                        continue
+                    part = layer.image.crop(box)
+                    out = part if out is None else ImageChops.logical_or(out, part)
+                if out is None:
+                    out = Image.new('1', (box[2] - box[0], box[3] - box[1]))
+                self.target.paste(out, box[:2])
+            self.dirty = []
+            return True
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
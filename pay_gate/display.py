@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Отправка на OLED дисплей только изменившихся областей кадра."""
+
+import threading
+from PIL import Image
+
+COLUMNADDR = 0x21                                        # команда ssd1306: окно по столбцам
+PAGEADDR = 0x22                                          # команда ssd1306: окно по страницам
+
+# разворот битов в байте: у PIL старший бит слева, у контроллера младший бит сверху
+_REVERSE = bytes(int('{:08b}'.format(i)[::-1], 2) for i in range(256))
+
+class FrameDiff:
+    """Обёртка над устройством ssd1306, помнящая последний отправленный кадр.
+
+    Кадр раскладывается на страницы по 8 строк, как в памяти контроллера.
+    В каждой изменившейся странице ищется диапазон изменившихся столбцов,
+    и только он отправляется через окно COLUMNADDR/PAGEADDR. Неизменный
+    кадр не отправляется вовсе. Для контроллеров без оконной адресации
+    (sh1106) нужно передать partial=False - тогда кадр отправляется
+    целиком, но только если он изменился.
+    """
+
+    def __init__(self, device, width=128, height=64, partial=True):
+        self.device = device
+        self.width = width
+        self.pages = height // 8
+        self.partial = partial and hasattr(device, 'command') and hasattr(device, 'data')
+        self.last = None
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+    def framebuffer(self, image):
+        """Кадр в виде списка страниц, каждая - bytes по одному байту на столбец."""
+        if image.mode != '1':
+            image = image.convert('1')
+        # после транспонирования строка - это столбец экрана, байт в ней - страница
+        columns = image.transpose(Image.TRANSPOSE).tobytes().translate(_REVERSE)
+        return [columns[page::self.pages] for page in range(self.pages)]
+
+    def display(self, image):
+        """Вывод кадра с отправкой только изменений."""
+        pages = self.framebuffer(image)
+        with self.lock:
+            if self.last is None or not self.partial:
+                if pages != self.last:
+                    self.device.display(image if image.mode == '1' else image.convert('1'))
+                    self.bytes_sent += self.width * self.pages
+                    self.last = pages
+                return
+            for page in range(self.pages):
+                old = self.last[page]
+                new = pages[page]
+                if old == new:
+                    continue
+                # первый и последний отличающийся байт по старшему и младшему биту XOR
+                diff = int.from_bytes(old, 'big') ^ int.from_bytes(new, 'big')
+                first = self.width - 1 - (diff.bit_length() - 1) // 8
+                last = self.width - 1 - ((diff & -diff).bit_length() - 1) // 8
+                self.device.command(COLUMNADDR, first, last, PAGEADDR, page, page)
+                self.device.data(list(new[first:last + 1]))
+                self.bytes_sent += 6 + last - first + 1
+            self.last = pages
+
+    def invalidate(self):
+        """Забыть отправленный кадр, следующий уйдёт целиком (например после сброса дисплея)."""
+        with self.lock:
+            self.last = None
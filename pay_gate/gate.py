@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""Проезд: реле, QR код оплаты, текущая работа и свой дисплей."""
+
+import io
+import sys
+import time
+import logging
+import threading
+from PIL import Image
+from pay_gate.compositor import Compositor
+if sys.platform != 'win32':
+    from OPi import GPIO
+
+logger = logging.getLogger()
+
+class Gate:
+    """Один проезд, управляемый демоном.
+
+    Хранит ногу реле, номер QR для сопоставления оплат, коэффициент
+    оплаты, текущую работу (начало по настенным часам и длительность),
+    журнал работы и свой дисплей по адресу oled_address на шине I2C.
+    Проезд может быть без дисплея (oled_address None). Почта, бот,
+    рабочая петля и кэш заставок у всех проездов общие.
+
+    Экран собирается из слоёв layers (фон, заголовок, часы, прогресс,
+    сообщение), show() собирает изменившиеся слои и выводит кадр. Каждый
+    show() публикует снимок экрана с номером версии - копию картинки,
+    которую больше никто не меняет, поэтому другие потоки читают её,
+    пока рабочая петля рисует следующий кадр.
+
+    Работу меняют почта, рабочая петля и бот. Решение "запустить или
+    продлить", проверка конца работы вместе с остановкой и запись в
+    журнал делаются под lock, иначе оплата, пришедшая в момент
+    остановки, теряется.
+    """
+
+    def __init__(self, gate_id, pin, qr_num, qr_code='', invert=False, coef=0.8, bonus=0, journal=None, logo_file=None, oled_address=None):
+        self.id = gate_id
+        self.pin = pin
+        self.invert = invert
+        self.qr_num = qr_num
+        self.qr_code = qr_code
+        self.coef = coef
+        self.bonus = bonus
+        self.journal = journal
+        self.logo_file = logo_file
+        self.oled_address = oled_address
+        self.oled = None
+        self.screen = Image.new('1', (128, 64))
+        self.layers = Compositor(self.screen)
+        self.logo_img = Image.new('1', (128, 64))
+        self.work_start = float(0)
+        self.work_length = float(0)
+        self.lock = threading.RLock()
+        # состояние рабочей петли
+        self.session = None
+        self.mono_start = 0
+        self.frame = None
+        self.progress = None
+        # снимки экрана для бота
+        self.snapshot = (0, self.screen.copy())
+        self.shown = threading.Condition()
+        self.png = (None, b'')
+        self.png_lock = threading.Lock()
+
+    def __repr__(self):
+        return 'Gate({!r}, pin={}, qr={})'.format(self.id, self.pin, self.qr_num)
+
+    @property
+    def working(self):
+        """Идёт ли работа."""
+        return self.work_start != 0 and self.work_length != 0
+
+    def elapsed(self):
+        """Сколько секунд прошло с начала работы."""
+        return time.time() - self.work_start
+
+    def pay_length(self, pay):
+        """Длительность работы в секундах за оплату pay."""
+        return int((60 * pay) * self.coef) + self.bonus
+
+    def setup(self):
+        """Настройка ноги реле, реле выключено."""
+        GPIO.setup(self.pin, GPIO.OUT)
+        GPIO.output(self.pin, GPIO.LOW if self.invert else GPIO.HIGH)
+
+    def relay_on(self):
+        """Включение реле."""
+        logger.info('Relay On (gate %s)', self.id)
+        try:
+            GPIO.output(self.pin, GPIO.HIGH if self.invert else GPIO.LOW)
+        except Exception:
+            pass
+
+    def relay_off(self):
+        """Выключение реле."""
+        logger.info('Relay Off (gate %s)', self.id)
+        try:
+            GPIO.output(self.pin, GPIO.LOW if self.invert else GPIO.HIGH)
+        except Exception:
+            pass
+
+    def start(self, length):
+        """Запуск работы на length секунд."""
+        with self.lock:
+            self.work_start = time.time()
+            self.work_length = length
+            self.relay_on()
+
+    def extend(self, length):
+        """Продление идущей работы на length секунд."""
+        with self.lock:
+            self.work_length += length
+
+    def stop(self):
+        """Остановка работы."""
+        with self.lock:
+            self.work_start = 0
+            self.work_length = 0
+            self.relay_off()
+
+    def save(self, starter):
+        """Запись изменения состояния работы в журнал."""
+        if self.journal is None:
+            return
+        with self.lock:
+            if self.working:
+                if self.journal.active:
+                    self.journal.extend(int(self.work_length), starter)
+                else:
+                    self.journal.start(int(self.work_length), starter)
+            else:
+                self.journal.stop(starter)
+
+    def load(self):
+        """Восстановление прерванной работы из журнала, True если работа продолжена."""
+        if self.journal is None:
+            return False
+        state = self.journal.load()
+        if state is None:
+            return False
+        _starter, length, elapsed = state
+        self.work_length = length
+        self.work_start = time.time() - elapsed
+        logger.info('Restoring work of gate %s: %d of %d sec elapsed', self.id, int(elapsed), int(length))
+        self.relay_on()
+        return True
+
+    def show(self):
+        """Сборка слоёв, вывод экрана проезда на его дисплей и публикация снимка."""
+        # сборка, снимок и вывод - под блокировкой слоёв, чтобы кадры из разных потоков не перемешались
+        with self.layers.lock:
+            self.layers.compose()
+            # копия в разы дешевле tobytes, поэтому версия растёт при каждом выводе без сравнения кадров
+            with self.shown:
+                self.snapshot = (self.snapshot[0] + 1, self.screen.copy())
+                self.shown.notify_all()
+            if self.oled is None:
+                return
+            try:
+                self.oled.display(self.screen)
+            except Exception:
+                pass
+
+    def png_snapshot(self):
+        """Последний снимок экрана в PNG: (версия, данные).
+
+        PNG кодируется только при смене версии, повторные запросы
+        отдают готовые данные.
+        """
+        with self.png_lock:
+            snapshot = self.snapshot
+            if self.png[0] != snapshot[0]:
+                data = io.BytesIO()
+                snapshot[1].save(data, format='PNG')
+                self.png = (snapshot[0], data.getvalue())
+            return self.png
+
+    def wait_snapshot(self, version, timeout):
+        """Ожидание снимка новее version не дольше timeout секунд, None если его нет."""
+        with self.shown:
+            self.shown.wait_for(lambda: self.snapshot[0] != version, timeout)
+            return self.snapshot if self.snapshot[0] != version else None
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""Журнал состояния работы, переживающий отключение питания."""
+
+import os
+import json
+import time
+import logging
+import threading
+
+TICK_INTERVAL = 5                                        # как часто запоминать отработанное время, секунд
+SYNC_INTERVAL = 30                                       # как часто сбрасывать отметки на диск, секунд
+COMPACT_LINES = 1000                                     # после стольких строк журнал сжимается до одного снимка
+
+logger = logging.getLogger()
+
+def bootId():
+    """Идентификатор текущей загрузки ядра, пустая строка если неизвестен."""
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+class WorkJournal:
+    """Журнал событий start/extend/stop и отметок отработанного времени.
+
+    Строки JSON только дописываются. События работы сразу сбрасываются
+    на диск с fsync, отметки копятся и сбрасываются раз в SYNC_INTERVAL.
+    Каждая запись хранит монотонное и настенное время и id загрузки.
+    Отработанное время после перезапуска в той же загрузке считается по
+    монотонным часам. После перезагрузки берётся последняя отметка, и
+    время без питания клиенту не засчитывается.
+
+    legacy - work.json прежних версий: пока журнала нет, незавершённая
+    работа из него переносится в журнал записью start.
+    """
+
+    def __init__(self, path, legacy=None):
+        self.path = path
+        self.legacy = legacy
+        self.boot = bootId()
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.lines = 0
+        self.last_tick = 0
+        self.last_sync = 0
+        self.active = False
+        self.length = 0
+        self.starter = None
+        self.elapsed_base = 0
+        self.mono_base = 0
+
+    def elapsed(self):
+        """Отработанное в текущей сессии время, секунд."""
+        if not self.active:
+            return 0
+        return self.elapsed_base + (time.monotonic() - self.mono_base)
+
+    def _record(self, event, **fields):
+        record = {
+            'ev': event,
+            'wall': round(time.time(), 3),
+            'mono': round(time.monotonic(), 3),
+            'boot': self.boot,
+            'elapsed': round(self.elapsed(), 3)
+        }
+        record.update(fields)
+        return json.dumps(record) + '\n'
+
+    def _write(self, line, sync):
+        self.buffer.append(line)
+        if sync:
+            self._sync()
+
+    def _sync(self):
+        if len(self.buffer) <= 0:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(self.buffer))
+            f.flush()
+            os.fsync(f.fileno())
+        self.lines += len(self.buffer)
+        self.buffer = []
+        self.last_sync = time.monotonic()
+        if self.lines >= COMPACT_LINES:
+            self.compact()
+
+    def start(self, length, starter):
+        """Начало работы."""
+        with self.lock:
+            self.active = True
+            self.length = length
+            self.starter = starter
+            self.elapsed_base = 0
+            self.mono_base = time.monotonic()
+            self.last_tick = self.mono_base
+            self._write(self._record('start', length=length, starter=starter), True)
+
+    def extend(self, length, starter):
+        """Изменение длительности идущей работы."""
+        with self.lock:
+            self.length = length
+            self._write(self._record('extend', length=length, starter=starter), True)
+
+    def stop(self, starter):
+        """Окончание работы."""
+        with self.lock:
+            self._write(self._record('stop', starter=starter), True)
+            self.active = False
+            self.length = 0
+
+    def tick(self):
+        """Отметка отработанного времени, вызывается на каждом кадре."""
+        with self.lock:
+            if not self.active:
+                return
+            now = time.monotonic()
+            if now - self.last_tick < TICK_INTERVAL:
+                return
+            self.last_tick = now
+            self._write(self._record('tick'), now - self.last_sync >= SYNC_INTERVAL)
+
+    def flush(self):
+        """Сброс накопленных отметок на диск, например при остановке демона."""
+        with self.lock:
+            self._sync()
+
+    def compact(self):
+        """Замена журнала одним снимком текущего состояния через атомарное переименование."""
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self._record('snapshot', active=self.active, length=self.length, starter=self.starter))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+        self.lines = 1
+
+    def load(self):
+        """Восстановление состояния из журнала.
+
+        Возвращает (кто запустил, длительность, отработано секунд) для
+        незавершённой работы или None.
+        """
+        state = None
+        broken = False
+        lines = 0
+        if not os.path.isfile(self.path) and self.legacy is not None:
+            return self._migrate()
+        if os.path.isfile(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # оборванная при отключении питания строка
+                        broken = True
+                        continue
+                    state = self._replay(state, record)
+        with self.lock:
+            self.lines = lines
+            self.active = False
+            if state is not None and state['active']:
+                elapsed = state['elapsed']
+                if self.boot and state['boot'] == self.boot:
+                    # та же загрузка: монотонные часы не сбрасывались
+                    elapsed += max(time.monotonic() - state['mono'], 0)
+                if elapsed < state['length']:
+                    self.active = True
+                    self.length = state['length']
+                    self.starter = state['starter']
+                    self.elapsed_base = elapsed
+                    self.mono_base = time.monotonic()
+                    self.last_tick = self.mono_base
+            if broken or lines >= COMPACT_LINES:
+                self.compact()
+            if self.active:
+                return (self.starter, self.length, self.elapsed_base)
+        return None
+
+    def _migrate(self):
+        """Перенос незавершённой работы из work.json, как её читали прежние версии."""
+        try:
+            with open(self.legacy) as json_file:
+                data = json.load(json_file)
+            start = float(data['start'])
+            length = int(data['length'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        # прежние версии считали время по настенным часам, вместе с временем без питания
+        elapsed = time.time() - start
+        if start <= 0 or length <= 0 or elapsed >= length:
+            return None
+        with self.lock:
+            self.active = True
+            self.length = length
+            self.starter = data.get('starter')
+            self.elapsed_base = max(elapsed, 0)
+            self.mono_base = time.monotonic()
+            self.last_tick = self.mono_base
+            self._write(self._record('start', length=length, starter=self.starter), True)
+        logger.info('Work moved from %s to journal: %d of %d sec elapsed', self.legacy, int(elapsed), length)
+        return (self.starter, self.length, self.elapsed_base)
+
+    @staticmethod
+    def _replay(state, record):
+        event = record.get('ev')
+        if event in ('start', 'snapshot'):
+            state = {'active': record.get('active', True), 'length': record.get('length', 0), 'starter': record.get('starter')}
+        elif state is None:
+            return None
+        elif event == 'stop':
+            state['active'] = False
+        elif event == 'extend':
+            state['length'] = record.get('length', state['length'])
+        state['elapsed'] = record.get('elapsed', 0)
+        state['mono'] = record.get('mono', 0)
+        state['boot'] = record.get('boot', '')
+        return state
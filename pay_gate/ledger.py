@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Журнал зачтённых платежей для защиты от повторного зачёта."""
+
+import os
+import json
+import time
+import logging
+
+RETENTION = 180 * 24 * 3600                              # сколько секунд помнить платёж
+COMPACT_RATIO = 2                                        # переписывать файл, когда мёртвых строк больше живых в столько раз
+
+logger = logging.getLogger()
+
+class PaymentLedger:
+    """Файл платежей, в который только дописываются строки JSON.
+
+    В памяти держатся словари по коду подтверждения и по UID письма,
+    поэтому проверка на повтор стоит O(1). Записи старше RETENTION
+    выбрасываются при сжатии файла.
+    """
+
+    def __init__(self, path, retention=RETENTION):
+        self.path = path
+        self.retention = retention
+        self.codes = {}
+        self.uids = {}
+        self.records = []
+        self.lines = 0
+
+    def load(self):
+        """Чтение журнала с диска и построение индекса."""
+        self.codes = {}
+        self.uids = {}
+        self.records = []
+        self.lines = 0
+        broken = False
+        if os.path.isfile(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    self.lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # оборванная при отключении питания строка
+                        broken = True
+                        continue
+                    self._index(record)
+        if broken:
+            self.compact()
+        self._expire()
+        logger.info('Payment ledger loaded: %d records', len(self.records))
+
+    def _index(self, record):
+        self.records.append(record)
+        if record.get('code'):
+            self.codes[record['code']] = record
+        if record.get('uid'):
+            self.uids[record['uid']] = record
+
+    def _expire(self):
+        oldest = time.time() - self.retention
+        if len(self.records) > 0 and self.records[0].get('time', 0) < oldest:
+            self.records = [r for r in self.records if r.get('time', 0) >= oldest]
+            self.codes = {r['code']: r for r in self.records if r.get('code')}
+            self.uids = {r['uid']: r for r in self.records if r.get('uid')}
+        if self.lines > COMPACT_RATIO * max(len(self.records), 1):
+            self.compact()
+
+    def seen(self, code, uid=None):
+        """Был ли уже зачтён платёж с таким кодом или из такого письма."""
+        return (code is not None and code in self.codes) or (uid is not None and uid in self.uids)
+
+    def add(self, code, uid, pay, qr_num, length):
+        """Запись зачтённого платежа. Возвращает False для повтора."""
+        if self.seen(code, uid):
+            return False
+        record = {
+            'time': int(time.time()),
+            'code': code,
+            'uid': uid,
+            'pay': pay,
+            'qr': qr_num,
+            'length': length
+        }
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.lines += 1
+        self._index(record)
+        self._expire()
+        return True
+
+    def compact(self):
+        """Перезапись файла только живыми записями через атомарное переименование."""
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.lines = len(self.records)
+        logger.info('Payment ledger compacted to %d records', self.lines)
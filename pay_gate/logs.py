@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""Работа с папкой логов для команд бота."""
+
+import os
+import io
+import re
+import time
+import zlib
+import gzip
+import lzma
+import queue
+import atexit
+import shutil
+import fnmatch
+import logging
+import logging.handlers
+import threading
+import collections
+
+PAGE_SIZE = 10                                           # файлов на страницу в /logs list
+CHUNK_SIZE = 64 * 1024                                   # размер блока чтения логов
+GREP_LIMIT = 200                                         # сколько последних совпадений отдаёт grep
+SEEK_LINES = 100                                         # сколько строк без отметки времени пропускать при поиске
+RE_LINE_TIME = re.compile(rb'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+RE_TEXT_TIME = re.compile(RE_LINE_TIME.pattern.decode('ascii'))
+RE_SINCE = re.compile(r'^\d{4}-\d{2}-\d{2}(?:[T ]\d{2}(?::\d{2}){0,2})?$')
+
+def sizeText(size):
+    """Размер файла в читаемом виде."""
+    for unit in ('B', 'K', 'M'):
+        if size < 1024:
+            return '{:.0f}{}'.format(size, unit) if unit == 'B' else '{:.1f}{}'.format(size, unit)
+        size /= 1024.0
+    return '{:.1f}G'.format(size)
+
+class LogIndex:
+    """Список файлов папки логов, отсортированный от новых к старым.
+
+    Папка перечитывается, только когда меняется её mtime (создание,
+    удаление, ротация файлов). Отфильтрованные по маске списки тоже
+    кэшируются, страница выдаётся срезом. Размеры файлов на странице
+    уточняются при каждом запросе, потому что текущий лог растёт.
+    """
+
+    def __init__(self, path, page_size=PAGE_SIZE):
+        self.path = path
+        self.page_size = page_size
+        self.dir_mtime = None
+        self.entries = []
+        self.filtered = {}
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Перечитать папку, если она изменилась."""
+        mtime = os.stat(self.path).st_mtime_ns
+        with self.lock:
+            if mtime == self.dir_mtime:
+                return
+            entries = []
+            for entry in os.scandir(self.path):
+                if entry.is_file():
+                    entries.append((entry.name, entry.stat().st_mtime))
+            # порядок устойчив: по времени изменения на момент чтения папки, при равенстве по имени
+            entries.sort(key=lambda item: (-item[1], item[0]))
+            self.entries = [name for name, _mtime in entries]
+            self.filtered = {}
+            self.dir_mtime = mtime
+
+    def page(self, page, pattern=None):
+        """Страница списка: [(имя, размер, mtime)] и признак наличия следующей страницы."""
+        self.refresh()
+        with self.lock:
+            if pattern:
+                names = self.filtered.get(pattern)
+                if names is None:
+                    names = self.filtered[pattern] = [name for name in self.entries if fnmatch.fnmatch(name, pattern)]
+            else:
+                names = self.entries
+            start = page * self.page_size
+            chunk = names[start:start + self.page_size]
+            more = len(names) > start + self.page_size
+        items = []
+        for name in chunk:
+            try:
+                st = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            items.append((name, st.st_size, st.st_mtime))
+        return items, more
+
+class CompressingReader(io.RawIOBase):
+    """Файл, который при чтении отдаёт сжатое содержимое другого файла.
+
+    Сжатие идёт кусками по мере чтения, вторая копия на диске не
+    создаётся, в памяти держится только ещё не прочитанный хвост.
+    """
+
+    def __init__(self, path, method='gz'):
+        super().__init__()
+        self.src = open(path, 'rb')
+        self.compressor = lzma.LZMACompressor() if method == 'xz' else zlib.compressobj(9, zlib.DEFLATED, 31)
+        self.pending = b''
+        self.done = False
+        self.name = os.path.basename(path) + '.' + method
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while len(self.pending) < len(b) and not self.done:
+            chunk = self.src.read(CHUNK_SIZE)
+            if chunk:
+                self.pending += self.compressor.compress(chunk)
+            else:
+                self.pending += self.compressor.flush()
+                self.done = True
+        n = min(len(b), len(self.pending))
+        b[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+    def close(self):
+        self.src.close()
+        super().close()
+
+def openLog(path):
+    """Открытие лога на чтение текстом, в том числе сжатого после ротации."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    if path.endswith('.xz'):
+        return lzma.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+def tail(path, count):
+    """Последние count строк файла. Обычный файл читается блоками с конца."""
+    if path.endswith(('.gz', '.xz')):
+        with openLog(path) as f:
+            return [line.rstrip('\n') for line in collections.deque(f, maxlen=count)]
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        while pos > 0 and data.count(b'\n') <= count:
+            step = min(CHUNK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode('utf-8', 'replace').splitlines()
+    return lines[-count:] if count > 0 else []
+
+def _lineTime(f):
+    """Время из первой строки с отметкой времени, начиная с текущей позиции."""
+    for _ in range(SEEK_LINES):
+        line = f.readline()
+        if not line:
+            return None
+        m = RE_LINE_TIME.match(line)
+        if m is not None:
+            return m.group(1).decode('ascii')
+    return None
+
+def _seekSince(f, since):
+    """Бинарный поиск в хронологическом логе позиции первой строки не раньше since."""
+    f.seek(0, os.SEEK_END)
+    lo = 0
+    hi = f.tell()
+    while hi - lo > CHUNK_SIZE:
+        mid = (lo + hi) // 2
+        f.seek(mid)
+        f.readline()
+        stamp = _lineTime(f)
+        if stamp is None or stamp >= since:
+            hi = mid
+        else:
+            lo = mid
+    f.seek(lo)
+    if lo > 0:
+        f.readline()
+
+def grep(path, pattern, since=None, limit=GREP_LIMIT):
+    """Последние limit строк файла, подходящих под регулярное выражение.
+
+    Если задано since (начало отметки времени, например 2020-09-28 13:04),
+    строки раньше него пропускаются, а в несжатом файле до нужного места
+    выполняется бинарный поиск.
+    """
+    try:
+        regex = re.compile(pattern)
+    except re.error:
+        regex = re.compile(re.escape(pattern))
+    if since:
+        since = since.replace('T', ' ')
+    matches = collections.deque(maxlen=limit)
+    if path.endswith(('.gz', '.xz')):
+        f = openLog(path)
+    else:
+        raw = open(path, 'rb')
+        if since:
+            _seekSince(raw, since)
+        f = io.TextIOWrapper(raw, encoding='utf-8', errors='replace')
+    stamp = None
+    with f:
+        for line in f:
+            m = RE_TEXT_TIME.match(line)
+            if m is not None:
+                stamp = m.group(1)
+            # строки без отметки (трассировки) относятся ко времени предыдущей
+            if since and (stamp is None or stamp < since):
+                continue
+            if regex.search(line):
+                matches.append(line.rstrip('\n'))
+    return list(matches)
+
+class RotatingLogHandler(logging.handlers.BaseRotatingHandler):
+    """Файловый лог с ротацией по размеру и по времени.
+
+    Старый файл переименовывается в имя.ГГГГ-ММ-ДД_ЧЧММСС, при compress
+    сжимается в .gz, хранится не больше backup_count старых файлов.
+    Рассчитан на работу в потоке QueueListener, поэтому сжатие не
+    задерживает потоки, пишущие в лог.
+    """
+
+    def __init__(self, filename, max_bytes=0, when='midnight', backup_count=0, compress=False):
+        super().__init__(filename, 'a', encoding='utf-8')
+        self.max_bytes = max_bytes
+        self.when = when
+        self.backup_count = backup_count
+        self.compress = compress
+        self.rollover_at = self._nextRollover(time.time())
+
+    def _nextRollover(self, now):
+        if self.when == 'midnight':
+            t = time.localtime(now)
+            return time.mktime((t.tm_year, t.tm_mon, t.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+        if isinstance(self.when, (int, float)) and self.when > 0:
+            return now + self.when
+        return None
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.stream.tell() >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        now = time.time()
+        if os.path.isfile(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            name = '{}.{}'.format(self.baseFilename, time.strftime('%Y-%m-%d_%H%M%S', time.localtime(now)))
+            num = 1
+            while os.path.exists(name) or os.path.exists(name + '.gz'):
+                name = '{}.{}_{}'.format(self.baseFilename, time.strftime('%Y-%m-%d_%H%M%S', time.localtime(now)), num)
+                num += 1
+            os.rename(self.baseFilename, name)
+            if self.compress:
+                try:
+                    with open(name, 'rb') as src, gzip.open(name + '.gz', 'wb') as dst:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                    os.remove(name)
+                except OSError:
+                    pass
+            self._removeOld()
+        self.rollover_at = self._nextRollover(now)
+        self.stream = self._open()
+
+    def _removeOld(self):
+        if self.backup_count <= 0:
+            return
+        folder, base = os.path.split(self.baseFilename)
+        old = []
+        for entry in os.scandir(folder):
+            if entry.is_file() and entry.name.startswith(base + '.'):
+                old.append((entry.stat().st_mtime, entry.name))
+        old.sort()
+        for _mtime, name in old[:-self.backup_count]:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+def startLogging(formatter, *handlers):
+    """Перевод корневого логгера на очередь с отдельным потоком записи.
+
+    Возвращает QueueListener, которому позже можно заменить handlers.
+    """
+    log_queue = queue.Queue(-1)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(stopLogging, listener)
+    return listener
+
+def stopLogging(listener):
+    """Запись оставшихся в очереди сообщений и остановка потока записи."""
+    if listener._thread is not None: # pylint: disable=protected-access
+        listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""Долгоживущая IMAP сессия с поддержкой IDLE."""
+
+import imaplib
+import logging
+import re
+import select
+import socket
+import time
+import base64
+import binascii
+import quopri
+from email.parser import BytesHeaderParser
+
+IDLE_TIMEOUT = 90                                        # перезапуск IDLE, он же keepalive: NAT на 3G забывает молчащее соединение через 2-5 минут
+READ_TIMEOUT = 30                                        # сколько ждать ответа сервера, потом соединение считается оборванным
+RECONNECT_MIN = 5                                        # минимальная пауза перед переподключением
+RECONNECT_MAX = 300                                      # максимальная пауза перед переподключением
+
+BODY_LIMIT = 8192                                        # сколько байт текстовой части письма скачивать максимум
+HEADER_FIELDS = 'BODY.PEEK[HEADER.FIELDS (FROM SUBJECT)]'
+
+# лексемы ответа FETCH: скобки, строка в кавычках, литерал {n}, атом (в т.ч. BODY[...]<n>)
+RE_TOKEN = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|\{(\d+)\}|([^\s()"\[]+(?:\[[^\]]*\](?:<\d+>)?)?))')
+RE_UNQUOTE = re.compile(rb'\\(.)')
+RE_ORIGIN = re.compile(r'<\d+>$')
+OPEN = object()
+CLOSE = object()
+
+logger = logging.getLogger()
+
+class MailSession:
+    """Одно соединение с IMAP сервером на всё время работы демона."""
+
+    def __init__(self, server, login, password, mailbox='inbox', port=None, ssl=True):
+        self.server = server
+        self.port = port
+        self.ssl = ssl
+        self.login = login
+        self.password = password
+        self.mailbox = mailbox
+        self.mail = None
+        self.has_idle = False
+        self.uidvalidity = ''
+        self.backoff = RECONNECT_MIN
+        self.waker = None
+
+    def connect(self):
+        """Подключение, авторизация и выбор папки."""
+        if self.ssl:
+            mail = imaplib.IMAP4_SSL(self.server, self.port or imaplib.IMAP4_SSL_PORT)
+        else:
+            mail = imaplib.IMAP4(self.server, self.port or imaplib.IMAP4_PORT)
+        # без таймаута тихо оборванное соединение заметно только через ~15 минут повторов TCP,
+        # а timeout= у IMAP4 появился лишь в Python 3.9
+        mail.socket().settimeout(READ_TIMEOUT)
+        try:
+            mail.login(self.login, self.password)
+            result, _data = mail.select(self.mailbox)
+            if result.lower() != 'ok':
+                raise imaplib.IMAP4.error('Unable to select {}'.format(self.mailbox))
+        except Exception:
+            self._shutdown(mail)
+            raise
+        self.mail = mail
+        self.has_idle = 'IDLE' in mail.capabilities
+        _result, data = mail.response('UIDVALIDITY')
+        self.uidvalidity = toStr(data[0]) if data and data[0] else ''
+        self.backoff = RECONNECT_MIN
+        # пара сокетов, чтобы прервать IDLE из другого потока
+        self.waker = socket.socketpair()
+        logger.info('IMAP connected, IDLE %s', 'supported' if self.has_idle else 'not supported')
+
+    def close(self):
+        """Закрытие соединения без исключений."""
+        if self.mail is not None:
+            self._shutdown(self.mail)
+            self.mail = None
+        if self.waker is not None:
+            for sock in self.waker:
+                sock.close()
+            self.waker = None
+
+    def interrupt(self):
+        """Прервать ожидание в IDLE из другого потока: при остановке или смене настроек."""
+        waker = self.waker
+        if waker is not None:
+            try:
+                waker[1].send(b'\0')
+            except OSError:
+                pass
+
+    @staticmethod
+    def _shutdown(mail):
+        try:
+            if mail.state == 'SELECTED':
+                mail.close()
+            mail.logout()
+        except Exception:
+            try:
+                mail.shutdown()
+            except Exception:
+                pass
+
+    @property
+    def connected(self):
+        """Есть ли живое соединение."""
+        return self.mail is not None
+
+    def fail(self, e, er):
+        """Сброс соединения после ошибки и ожидание с нарастающей паузой."""
+        logger.error("IMAP session error: %s", er)
+        self.close()
+        e.wait(timeout=self.backoff)
+        self.backoff = min(self.backoff * 2, RECONNECT_MAX)
+
+    def uid_key(self, uid):
+        """Уникальный ключ письма с учётом UIDVALIDITY ящика."""
+        return '{}:{}'.format(self.uidvalidity, toStr(uid))
+
+    def search_unseen(self):
+        """Список UID непрочитанных писем."""
+        result, data = self.mail.uid('search', None, "NOT SEEN")
+        if result.lower() != 'ok':
+            raise imaplib.IMAP4.error('UID SEARCH failed')
+        return data[0].split()
+
+    def fetch(self, uids, query):
+        """Выполнение UID FETCH для нескольких писем одной командой.
+
+        Возвращает словарь {uid: {ключ ответа: значение}}.
+        """
+        if len(uids) <= 0:
+            return {}
+        result, data = self.mail.uid('fetch', b','.join(uids), query)
+        if result.lower() != 'ok':
+            raise imaplib.IMAP4.error('UID FETCH failed')
+        messages = {}
+        for item in parseResponse(data):
+            if not isinstance(item, list):
+                continue
+            items = {}
+            for i in range(0, len(item) - 1, 2):
+                items[RE_ORIGIN.sub('', toStr(item[i]).upper())] = item[i + 1]
+            if 'UID' in items:
+                messages[items['UID']] = items
+        return messages
+
+    def fetch_texts(self, uids):
+        """Получение заголовков и текстовой части писем без скачивания вложений.
+
+        Сначала одной командой запрашиваются BODYSTRUCTURE и заголовки,
+        затем только секции text/plain, не больше BODY_LIMIT байт каждая.
+        Возвращает список (uid, заголовки, текст, время прихода на сервер)
+        по возрастанию UID, время - по time.time() или None.
+        """
+        metas = self.fetch(uids, '(UID INTERNALDATE BODYSTRUCTURE {})'.format(HEADER_FIELDS))
+        texts = {}
+        groups = {}
+        for uid, items in metas.items():
+            header = b''
+            for key, value in items.items():
+                if key.startswith('BODY[HEADER') and isinstance(value, bytes):
+                    header = value
+            parts = textParts(items.get('BODYSTRUCTURE'))
+            texts[uid] = (BytesHeaderParser().parsebytes(header), parts, [], internalDate(items.get('INTERNALDATE')))
+            # письма с одинаковым набором секций забираем одной командой
+            groups.setdefault(tuple(part[0] for part in parts), []).append(uid)
+
+        for sections, group in groups.items():
+            if len(sections) <= 0:
+                continue
+            query = '(UID {})'.format(' '.join('BODY.PEEK[{}]<0.{}>'.format(section, BODY_LIMIT) for section in sections))
+            for uid, items in self.fetch(group, query).items():
+                if uid not in texts:
+                    continue
+                for section, encoding, charset in texts[uid][1]:
+                    data = items.get('BODY[{}]'.format(section))
+                    if isinstance(data, bytes):
+                        texts[uid][2].append(decodePart(data, encoding, charset))
+
+        return [(uid, texts[uid][0], ''.join(texts[uid][2]), texts[uid][3]) for uid in sorted(texts, key=int)]
+
+    def mark_deleted(self, uids):
+        """Пометка писем прочитанными и удалёнными одной командой UID STORE и их удаление.
+
+        Сессия не закрывается после каждой проверки, поэтому удаляем сразу:
+        с UIDPLUS - только эти письма через UID EXPUNGE, иначе EXPUNGE.
+        """
+        if len(uids) <= 0:
+            return
+        uid_set = b','.join(uids)
+        self.mail.uid('STORE', uid_set, '+FLAGS', '(\\Seen \\Deleted)')
+        if 'UIDPLUS' in self.mail.capabilities:
+            self.mail.uid('EXPUNGE', uid_set)
+        else:
+            self.mail.expunge()
+
+    def wait(self, e, interval):
+        """Ожидание новых писем. Через IDLE, если сервер умеет, иначе NOOP раз в interval секунд.
+
+        IDLE прерывается interrupt(), ожидание без IDLE - событием e.
+        """
+        if self.has_idle:
+            return self._idle(e, IDLE_TIMEOUT)
+        if e.wait(timeout=interval):
+            return False
+        self.mail.noop()
+        return True
+
+    def _idle(self, e, timeout):
+        mail = self.mail
+        tag = mail._new_tag() # pylint: disable=protected-access
+        mail.send(tag + b' IDLE\r\n')
+        resp = mail.readline()
+        if not resp.startswith(b'+'):
+            raise imaplib.IMAP4.error('IDLE rejected: {}'.format(resp))
+        sock = mail.socket()
+        deadline = time.monotonic() + timeout
+        changed = False
+        try:
+            while not changed and not e.is_set():
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                if not _buffered(mail):
+                    ready, _w, _x = select.select([sock, self.waker[0]], [], [], left)
+                    if self.waker[0] in ready:
+                        self.waker[0].recv(64)
+                        break
+                    if not ready:
+                        continue
+                line = mail.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort('socket EOF during IDLE')
+                # любое нетривиальное уведомление (EXISTS, RECENT, EXPUNGE, FETCH) - повод заглянуть в ящик
+                changed = line.startswith(b'* ') and not line.startswith(b'* OK')
+        finally:
+            mail.send(b'DONE\r\n')
+            while True:
+                line = mail.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort('socket EOF after IDLE')
+                if line.startswith(tag):
+                    break
+            # ответ на тег прочитан вручную, сам imaplib запись о команде не удалит
+            mail.tagged_commands.pop(tag, None)
+        return changed
+
+def _buffered(mail):
+    """Есть ли данные, уже прочитанные imaplib в буфер или расшифрованные SSL.
+
+    select их не видит: уведомление, пришедшее одним пакетом с ответом
+    на IDLE, иначе пролежало бы в буфере до конца IDLE. Проверка идёт
+    неблокирующим peek, потом сокету возвращается таймаут чтения.
+    """
+    sock = mail.socket()
+    timeout = sock.gettimeout()
+    sock.settimeout(0)
+    try:
+        return len(mail.file.peek(1)) > 0
+    except (OSError, ValueError):
+        # у SSL сокета без данных - SSLWantReadError
+        return False
+    finally:
+        sock.settimeout(timeout)
+
+def toStr(value):
+    """Значение из ответа сервера в виде строки."""
+    if isinstance(value, bytes):
+        return value.decode('ascii', 'replace')
+    return '' if value is None else str(value)
+
+def internalDate(value):
+    """INTERNALDATE письма в секундах по time.time() или None."""
+    if not isinstance(value, bytes):
+        return None
+    parsed = imaplib.Internaldate2tuple(b'INTERNALDATE "' + value + b'"')
+    return time.mktime(parsed) if parsed is not None else None
+
+def _tokens(data):
+    for item in data:
+        if isinstance(item, tuple):
+            text, literal = item
+        else:
+            text, literal = item, None
+        pos = 0
+        while pos < len(text):
+            m = RE_TOKEN.match(text, pos)
+            if m is None or m.end() == pos:
+                break
+            pos = m.end()
+            if m.group(1) is not None:
+                yield OPEN
+            elif m.group(2) is not None:
+                yield CLOSE
+            elif m.group(3) is not None:
+                yield RE_UNQUOTE.sub(rb'\1', m.group(3))
+            elif m.group(4) is not None:
+                # содержимое литерала imaplib отдаёт вторым элементом кортежа
+                yield literal
+                literal = None
+            elif m.group(5) is not None:
+                yield None if m.group(5).upper() == b'NIL' else m.group(5)
+
+def parseResponse(data):
+    """Разбор ответа imaplib на FETCH во вложенные списки."""
+    stack = [[]]
+    for token in _tokens(data):
+        if token is OPEN:
+            stack.append([])
+        elif token is CLOSE:
+            if len(stack) > 1:
+                lst = stack.pop()
+                stack[-1].append(lst)
+        else:
+            stack[-1].append(token)
+    while len(stack) > 1:
+        lst = stack.pop()
+        stack[-1].append(lst)
+    return stack[0]
+
+def textParts(body, section=''):
+    """Поиск секций text/plain в BODYSTRUCTURE.
+
+    Возвращает список (номер секции, кодировка передачи, кодировка текста).
+    """
+    if not isinstance(body, list) or len(body) <= 0:
+        return []
+    if isinstance(body[0], list):
+        parts = []
+        i = 0
+        while i < len(body) and isinstance(body[i], list):
+            parts += textParts(body[i], '{}.{}'.format(section, i + 1) if section else str(i + 1))
+            i += 1
+        return parts
+    if len(body) < 6 or toStr(body[0]).lower() != 'text' or toStr(body[1]).lower() != 'plain':
+        return []
+    charset = 'ascii'
+    params = body[2] if isinstance(body[2], list) else []
+    for i in range(0, len(params) - 1, 2):
+        if toStr(params[i]).lower() == 'charset':
+            charset = toStr(params[i + 1])
+    return [(section or '1', toStr(body[5]).lower(), charset)]
+
+def decodePart(data, encoding, charset):
+    """Декодирование (возможно обрезанной) текстовой секции."""
+    try:
+        if encoding == 'base64':
+            data = b''.join(data.split())
+            data = base64.b64decode(data[:len(data) - len(data) % 4])
+        elif encoding == 'quoted-printable':
+            data = quopri.decodestring(data)
+    except (binascii.Error, ValueError):
+        return ''
+    try:
+        return data.decode(charset, 'replace')
+    except LookupError:
+        return data.decode('utf-8', 'replace')
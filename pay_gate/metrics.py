@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""Счётчики, значения и гистограммы работы демона с выдачей в формате Prometheus."""
+
+import time
+import bisect
+import logging
+import threading
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DELAY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+
+logger = logging.getLogger()
+
+def _labels(label, value):
+    if label is None or value is None:
+        return ''
+    return '{{{}="{}"}}'.format(label, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """Общая часть метрик: имя, описание и необязательная метка.
+
+    Значения хранятся по значению метки (None - без метки). Если задана
+    функция fn, значения вычисляются только при чтении метрики: она
+    возвращает число или словарь {значение метки: число}.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name, doc, label=None, fn=None):
+        self.name = name
+        self.doc = doc
+        self.label = label
+        self.fn = fn
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def collect(self):
+        """Снимок значений {значение метки: число}."""
+        if self.fn is not None:
+            try:
+                values = self.fn()
+            except Exception as e:
+                logger.warning('Unable to collect metric %s: %s', self.name, e)
+                return {}
+            return values if isinstance(values, dict) else {None: values}
+        with self.lock:
+            return dict(self.values)
+
+    def render(self):
+        """Строки метрики в текстовом формате Prometheus."""
+        lines = ['# HELP {} {}'.format(self.name, self.doc), '# TYPE {} {}'.format(self.name, self.kind)]
+        for key, value in sorted(self.collect().items(), key=lambda item: str(item[0])):
+            lines.append('{}{} {}'.format(self.name, _labels(self.label, key), _number(value)))
+        return lines
+
+    def summary(self):
+        """Краткое значение для сообщения бота."""
+        values = self.collect()
+        if len(values) <= 0:
+            return '0'
+        if list(values) == [None]:
+            return _number(values[None])
+        return ', '.join('{}={}'.format(key, _number(value)) for key, value in sorted(values.items(), key=lambda item: str(item[0])))
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, label=None):
+        """Увеличение счётчика."""
+        with self.lock:
+            self.values[label] = self.values.get(label, 0) + amount
+
+class Gauge(Metric):
+    """Текущее значение."""
+
+    kind = 'gauge'
+
+    def set(self, value, label=None):
+        """Установка значения."""
+        with self.lock:
+            self.values[label] = value
+
+class Histogram(Metric):
+    """Распределение значений по заранее заданным корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, doc, buckets=TIME_BUCKETS, label=None):
+        super().__init__(name, doc, label)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, label=None):
+        """Учёт одного значения."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(label)
+            if state is None:
+                state = self.values[label] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, label=None):
+        """Контекстный менеджер, учитывающий время выполнения блока в секундах."""
+        return _Timer(self, label)
+
+    def collect(self):
+        with self.lock:
+            return dict((key, (list(state[0]), state[1], state[2])) for key, state in self.values.items())
+
+    def render(self):
+        lines = ['# HELP {} {}'.format(self.name, self.doc), '# TYPE {} histogram'.format(self.name)]
+        for key, (counts, total, count) in sorted(self.collect().items(), key=lambda item: str(item[0])):
+            extra = '{}="{}",'.format(self.label, key) if self.label is not None and key is not None else ''
+            cumulative = 0
+            for bound, num in zip(self.buckets + (float('inf'),), counts):
+                cumulative += num
+                lines.append('{}_bucket{{{}le="{}"}} {}'.format(self.name, extra, _number(bound), cumulative))
+            lines.append('{}_sum{} {}'.format(self.name, _labels(self.label, key), _number(total)))
+            lines.append('{}_count{} {}'.format(self.name, _labels(self.label, key), count))
+        return lines
+
+    def quantile(self, q, label=None):
+        """Оценка квантиля сверху: граница корзины, в которую он попал."""
+        state = self.collect().get(label)
+        if state is None or state[2] <= 0:
+            return None
+        need = q * state[2]
+        cumulative = 0
+        for bound, num in zip(self.buckets + (float('inf'),), state[0]):
+            cumulative += num
+            if cumulative >= need:
+                return bound
+        return float('inf')
+
+    def summary(self):
+        parts = []
+        for key, (_counts, total, count) in sorted(self.collect().items(), key=lambda item: str(item[0])):
+            if count <= 0:
+                continue
+            text = 'n={} avg={:.4g} p95<={}'.format(count, total / count, _number(self.quantile(0.95, key)))
+            parts.append(text if key is None else '{}: {}'.format(key, text))
+        return '; '.join(parts) if parts else 'n=0'
+
+class _Timer:
+    def __init__(self, histogram, label):
+        self.histogram = histogram
+        self.label = label
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc):
+        self.histogram.observe(time.perf_counter() - self.start, self.label)
+        return False
+
+class Registry:
+    """Набор метрик демона в порядке регистрации."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, doc, label=None, fn=None):
+        """Регистрация счётчика."""
+        return self._add(Counter(name, doc, label, fn))
+
+    def gauge(self, name, doc, label=None, fn=None):
+        """Регистрация значения."""
+        return self._add(Gauge(name, doc, label, fn))
+
+    def histogram(self, name, doc, buckets=TIME_BUCKETS, label=None):
+        """Регистрация гистограммы."""
+        return self._add(Histogram(name, doc, buckets, label))
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Все метрики по строке на каждую, для сообщения бота."""
+        return ['{}: {}'.format(metric.name, metric.summary()) for metric in self.metrics]
+
+def serveMetrics(registry, host='127.0.0.1', port=9108):
+    """Запуск HTTP сервера, отдающего метрики по GET /metrics, в отдельном потоке.
+
+    Метрики собираются только при запросе, пока их никто не читает, сервер
+    только ждёт соединений. Возвращает сервер, остановка - shutdown().
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer # pylint: disable=import-outside-toplevel
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self): # pylint: disable=invalid-name
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args): # pylint: disable=redefined-builtin
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
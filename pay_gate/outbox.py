@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""Очередь исходящих сообщений Telegram с отдельным потоком отправки."""
+
+import time
+import logging
+import threading
+
+QUEUE_LIMIT = 100                                        # сколько сообщений держать в очереди, старые выбрасываются
+RETRY_MIN = 1                                            # первая пауза перед повтором после сетевой ошибки
+RETRY_MAX = 60                                           # наибольшая пауза перед повтором
+PRIVATE_LIMIT = (1, 1.0)                                 # лимит Telegram для личного чата: сообщений за секунд
+GROUP_LIMIT = (20, 60.0)                                 # лимит для группы или канала
+GLOBAL_LIMIT = (30, 1.0)                                 # лимит на все чаты бота
+
+logger = logging.getLogger()
+
+class RateLimit:
+    """Ведро токенов: не больше count сообщений за period секунд, подряд - не больше burst."""
+
+    def __init__(self, count, period, burst=1):
+        self.rate = count / period
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def delay(self, now):
+        """Сколько секунд ждать до разрешения отправки."""
+        self._refill(now)
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        """Учёт отправленного сообщения."""
+        self._refill(now)
+        self.tokens -= 1
+
+class _Message:
+    __slots__ = ('chat_id', 'text', 'key', 'attempts', 'not_before')
+
+    def __init__(self, chat_id, text, key):
+        self.chat_id = chat_id
+        self.text = text
+        self.key = key
+        self.attempts = 0
+        self.not_before = 0
+
+class Outbox:
+    """Очередь сообщений в чаты, которую разбирает поток отправки.
+
+    put() никогда не ждёт сети: сообщение кладётся в очередь, поток
+    отправляет его с учётом лимитов Telegram на чат и на бота. Сообщение
+    с ключом key заменяет ещё не отправленное с тем же ключом в том же
+    чате - так устаревшие уведомления об оставшемся времени не копятся.
+    После сетевой ошибки сообщение повторяется с нарастающей паузой, после
+    RetryAfter - через указанное сервером время, прочие ошибки его
+    выбрасывают. Сообщения, поставленные до start(), ждут запуска потока.
+    """
+
+    def __init__(self, limit=QUEUE_LIMIT):
+        self.limit = limit
+        self.queue = []
+        self.cond = threading.Condition()
+        self.send = None
+        self.retry = (OSError,)
+        self.chats = {}
+        self.total = RateLimit(*GLOBAL_LIMIT)
+        self.thread = None
+        self.stopping = False
+        self.deadline = 0
+        self.counts = {'sent': 0, 'failed': 0, 'dropped': 0, 'coalesced': 0}
+
+    def put(self, chat_id, text, key=None):
+        """Постановка сообщения в очередь."""
+        with self.cond:
+            if key is not None:
+                for msg in self.queue:
+                    if msg.key == key and msg.chat_id == chat_id:
+                        msg.text = text
+                        self.counts['coalesced'] += 1
+                        return
+            if len(self.queue) >= self.limit:
+                dropped = self.queue.pop(0)
+                self.counts['dropped'] += 1
+                logger.warning('Message queue is full, dropped: %s', dropped.text)
+            self.queue.append(_Message(chat_id, text, key))
+            self.cond.notify()
+
+    def cancel(self, chat_id, key):
+        """Удаление из очереди неотправленного сообщения с ключом key."""
+        with self.cond:
+            self.queue = [msg for msg in self.queue if msg.key != key or msg.chat_id != chat_id]
+
+    def pending(self):
+        """Число сообщений в очереди."""
+        with self.cond:
+            return len(self.queue)
+
+    def stats(self):
+        """Счётчики отправленных, не отправленных, выброшенных и заменённых сообщений."""
+        with self.cond:
+            return dict(self.counts)
+
+    def start(self, send, retry=(OSError,)):
+        """Запуск потока отправки. send(chat_id, text) отправляет одно сообщение,
+        retry - исключения, после которых отправку надо повторить."""
+        self.send = send
+        self.retry = retry
+        self.thread = threading.Thread(target=self._run, name='outbox', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        """Остановка потока, оставшиеся сообщения отправляются не дольше timeout секунд."""
+        if self.thread is None:
+            return
+        with self.cond:
+            self.stopping = True
+            self.deadline = time.monotonic() + timeout
+            self.cond.notify()
+        self.thread.join(timeout + 1)
+
+    def _limit(self, chat_id):
+        limit = self.chats.get(chat_id)
+        if limit is None:
+            # у групп и каналов id отрицательный, у имён каналов - @name
+            group = not isinstance(chat_id, int) or chat_id < 0
+            limit = self.chats[chat_id] = RateLimit(*(GROUP_LIMIT if group else PRIVATE_LIMIT))
+        return limit
+
+    def _next(self, now):
+        """Первое сообщение, которое можно отправить сейчас, или время ожидания до него."""
+        best = None
+        wait = None
+        seen = set()
+        for msg in self.queue:
+            # порядок внутри чата сохраняется: кандидат - только первое сообщение чата
+            if msg.chat_id in seen:
+                continue
+            seen.add(msg.chat_id)
+            delay = max(msg.not_before - now, self._limit(msg.chat_id).delay(now), self.total.delay(now))
+            if wait is None or delay < wait:
+                best, wait = msg, delay
+        return best, wait
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while True:
+                    now = time.monotonic()
+                    if self.stopping and (len(self.queue) <= 0 or now >= self.deadline):
+                        return
+                    msg, wait = self._next(now)
+                    if msg is not None and wait <= 0:
+                        break
+                    if self.stopping:
+                        wait = min(wait, self.deadline - now)
+                    self.cond.wait(wait)
+                self.queue.remove(msg)
+                self._limit(msg.chat_id).take(now)
+                self.total.take(now)
+            try:
+                self.send(msg.chat_id, msg.text)
+            except Exception as e:
+                self._failed(msg, e)
+            else:
+                with self.cond:
+                    self.counts['sent'] += 1
+
+    def _failed(self, msg, e):
+        retry_after = getattr(e, 'retry_after', None)
+        with self.cond:
+            if retry_after is None and not isinstance(e, self.retry):
+                self.counts['failed'] += 1
+                logger.warning('Unable to send message: %s', e)
+                return
+            if msg.key is not None and any(other.key == msg.key and other.chat_id == msg.chat_id for other in self.queue):
+                # пока отправляли, его уже заменило более новое
+                self.counts['coalesced'] += 1
+                return
+            msg.attempts += 1
+            if retry_after is not None:
+                delay = float(retry_after)
+            else:
+                delay = min(RETRY_MIN * 2 ** (msg.attempts - 1), RETRY_MAX)
+            logger.warning('Unable to send message, retry in %.1f sec: %s', delay, e)
+            msg.not_before = time.monotonic() + delay
+            # в начало очереди, чтобы не нарушить порядок сообщений чата
+            self.queue.insert(0, msg)
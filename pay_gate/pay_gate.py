@@ -5,8 +5,6 @@
 import sys
 import os
 import logging
-import imaplib
-import email
 import threading
 import time
 import re
@@ -15,41 +13,30 @@ import gettext
 import traceback
 import html
 import json
-import random
 import tempfile
 import socket
-import shutil
+import signal
 from datetime import datetime
-from email.header import decode_header
-from telegram import Update, ParseMode
-from telegram.ext import Updater, CommandHandler, MessageHandler, Filters, CallbackContext
 from PIL import Image, ImageDraw, ImageFont
 from pay_gate.charset import sevenSegLarge
+from pay_gate.ledger import PaymentLedger
+from pay_gate.display import FrameDiff
+from pay_gate.savers import SaverCache
+from pay_gate.scheduler import Scheduler
+from pay_gate.journal import WorkJournal
+from pay_gate.gate import Gate
+from pay_gate.metrics import Registry, serveMetrics, DELAY_BUCKETS
+from pay_gate.outbox import Outbox
+from pay_gate.textcache import TextCache
+from pay_gate.settings import Settings, CONFIG_FILE, RESTART_FIELDS, SettingsWatcher, defaultParser, readSettings
+from pay_gate.upload import UploadError, checkDocument, download, toScreen, saveAtomic
+from pay_gate.logs import LogIndex, CompressingReader, RotatingLogHandler, startLogging, sizeText, tail, grep, RE_SINCE, GREP_LIMIT
 if sys.platform != 'win32':
     from OPi import GPIO
     from oled.device import ssd1306, sh1106 # pylint: disable=unused-import
 
-PIN_NUM = 26                                             # номер ноги на разъёме для реле
-INVERT_PIN = False                                       # инвертировать логику ноги
-LED_NUM = 0                                              # не используется пока
-TOKEN = ''                                               # токен бота
-CHANNEL_ID = 0                                           #куда слать широковещания
-SAVER_TIME = (60, 5)                                     #время статичной картинки, время чёрного экрана в секндах
-QR_NUM = 0                                               #номер QR для сравнения в EMAIL
-QR_CODE = ''                                             # ссылка внутри QR кода
-PAY_COEF = 0.8
-NOTIFY_INTERVAL = 60
-ADMINS = []                                              # список админов бота
-SUDO_KEY = '321456'                                      # пароль для всех не админов
-APPEND_TIME = 0                                          # время добавляемое к основному
-RE_SCRIPT = '^[\\w\\s]+\\:\\s*(\\d+)\\.\\s*[\\w\\s]+\\:\\s*(\\d+\\.\\d{2})\\s*RUB\\.\\s*QR\\s*:\\s*(\\d+)\\.\\r?$'
-#'^Код подтверждения\\:\\s*(\\d+)\\.\\s*Сумма\\:\\s*(\\d+\\.\\d{2})\\s*RUB\\.\\s*QR\\s*:\\s*(\\d+)\\.\\r?$'
-#'^TEXT\\s*\\:.*\\s(\\d+)\\..*\\:\\s*(\\d+\\.\\d{2})\\s*RUB\\.\\s*QR\\s*:\\s*(\\d+)\\.\r?$'
-
-IMAP_SERVER = ''
-EMAIL_LOGIN = ''
-EMAIL_PASSWORD = ''
-EMAIL_INTERVAL = 10
+LIVE_SECONDS = 5                                         # длительность записи /screen live по умолчанию
+LIVE_MAX = 30                                            # наибольшая длительность записи /screen live
 
 SCREENS_DIR = 'screens'
 LIB_DIR = '/var/lib/pay_gate' if sys.platform != 'win32' else 'lib' #папка  данными
@@ -64,14 +51,36 @@ logger = logging.getLogger()
 mail_thread = 0
 work_thread = 0
 bot = 0
-oled = 0
-logo_img = Image.new('1', (128, 64))
 serial = ''
-work_start = float(0)
-work_length = float(0)
 FONT2 = None
-static_image = 0
-screen = Image.new('1', (128, 64))
+text_cache = TextCache()                                 # строки FONT2, уже отрисованные в маски
+ledger = None
+savers = None
+gates = {}                                               # проезды по id, в порядке из настроек
+gates_by_qr = {}                                         # проезды по номеру QR для разбора оплат
+screen_photos = {}                                       # id проезда: (версия снимка экрана, file_id фото в Telegram)
+log_index = LogIndex(LOG_PATH)
+settings = Settings(parser=defaultParser())              # снимок настроек, при перечитывании заменяется целиком
+sudo_admins = set()                                      # кто вошёл по паролю, перечитывание настроек их не сбрасывает
+outbox = Outbox()                                        # сообщения в канал, отправляются своим потоком после запуска бота
+
+metrics = Registry()
+mail_cycle_time = metrics.histogram('pay_gate_mail_cycle_seconds', 'Search and processing of new mail per check')
+imap_failures = metrics.counter('pay_gate_imap_failures_total', 'IMAP connect and session errors', label='stage')
+payments_total = metrics.counter('pay_gate_payments_total', 'Credited payments', label='gate')
+payment_delay = metrics.histogram('pay_gate_payment_delay_seconds', 'Delay from mail arrival on the server to relay switch', DELAY_BUCKETS)
+frame_time = metrics.histogram('pay_gate_frame_render_seconds', 'Countdown frame render and display', label='gate')
+metrics.gauge('pay_gate_gate_working', 'Gate relay is on', label='gate',
+              fn=lambda: dict((gate.id, int(gate.working)) for gate in gates.values()))
+metrics.gauge('pay_gate_gate_remaining_seconds', 'Paid time left', label='gate',
+              fn=lambda: dict((gate.id, max(0, int(gate.work_length - gate.elapsed())) if gate.working else 0) for gate in gates.values()))
+metrics.counter('pay_gate_display_bytes_total', 'Bytes sent to display', label='gate',
+                fn=lambda: dict((gate.id, gate.oled.bytes_sent) for gate in gates.values() if isinstance(gate.oled, FrameDiff)))
+metrics.counter('pay_gate_telegram_messages_total', 'Channel messages by result', label='result', fn=lambda: outbox.stats())
+metrics.gauge('pay_gate_telegram_queue', 'Channel messages waiting to be sent', fn=lambda: outbox.pending())
+metrics.counter('pay_gate_text_cache_total', 'Rendered text cache lookups', label='result',
+                fn=lambda: dict((key, value) for key, value in text_cache.stats().items() if key in ('hits', 'misses')))
+metrics.gauge('pay_gate_text_cache_bytes', 'Memory taken by rendered text masks', fn=lambda: text_cache.stats()['bytes'])
 
 def get_ip_address():
     """Получение текущего IP адреса для сообщения о нём хозяину"""
@@ -80,7 +89,7 @@ def get_ip_address():
     s.connect(("8.8.8.8", 80))
     return s.getsockname()[0]
 
-def generate_logo(logo_file):
+def generate_logo(gate):
     """Генерация QR кода в случае отсутвия изображения заставки"""
     import qrcode # pylint: disable=import-outside-toplevel
 
@@ -90,7 +99,7 @@ def generate_logo(logo_file):
         box_size=2,
         border=0,
     )
-    qr.add_data(QR_CODE)
+    qr.add_data(gate.qr_code)
     qr.make(fit=True)
 
     qr_img = qr.make_image(fill_color="white", back_color="black")
@@ -98,60 +107,69 @@ def generate_logo(logo_file):
 
     del qr
 
-    logo_img.paste(qr_img, (int((screen.width/2)-(qr_img.width/2)), 0))
+    gate.logo_img.paste(qr_img, (int((gate.screen.width/2)-(qr_img.width/2)), 0))
 
     del qr_img
 
-    logo_img.convert("L")
-    logo_img.save(logo_file, "PNG")
-    logger.info("QR Generated")
-
-def turnRelayOn():
-    """Включение реле."""
-    logger.info('Relay On')
-    try:
-        GPIO.output(PIN_NUM, GPIO.HIGH if INVERT_PIN else GPIO.LOW)
-    except Exception:
-        pass
-
-def turnRelayOff():
-    """Выключение реле."""
-    logger.info('Relay Off')
-    try:
-        GPIO.output(PIN_NUM, GPIO.LOW if INVERT_PIN else GPIO.HIGH)
-    except Exception:
-        pass
-
-def saveWork(starter):
-    """Сохранение состояния работы."""
-    data = {
-        'starter': starter,
-        'start': int(work_start),
-        'length': int(work_length)
-    }
-    with open(os.path.join(LIB_DIR, 'work.json'), 'w') as outfile:
-        json.dump(data, outfile)
-
-def loadWork():
-    """Загрузка последнего сохраненого состояния работы"""
-    try:
-        with open(os.path.join(LIB_DIR, 'work.json')) as json_file:
-            data = json.load(json_file)
-            now = datetime.timestamp(datetime.now())
-            if data['start'] > 0 and data['length'] > 0 and (now - int(data['start'])) < int(data['length']):
-                global work_start, work_length, bot
-                work_start = data['start']
-                work_length = data['length']
-                turnRelayOn()
-                bot.send_message(chat_id=CHANNEL_ID, text=_("Restoring prev work!"), parse_mode=ParseMode.MARKDOWN, disable_web_page_preview=True)
-    except Exception:
-        pass
+    gate.logo_img.convert("L")
+    gate.logo_img.save(gate.logo_file, "PNG")
+    logger.info("QR Generated for gate %s", gate.id)
+
+def gateText(gate, text):
+    """Сообщение о проезде: при нескольких проездах с его id в начале."""
+    if len(gates) > 1:
+        return '[{}] {}'.format(gate.id, text)
+    return text
+
+def gateArgs(update, args):
+    """Проезд, к которому относится команда, и оставшиеся аргументы.
+
+    Если проездов несколько, id проезда передаётся первым аргументом.
+    """
+    if len(gates) == 1:
+        return next(iter(gates.values())), args
+    if len(args) > 0 and args[0] in gates:
+        return gates[args[0]], args[1:]
+    update.message.reply_text(_('Which gate? Known gates: {}').format(', '.join(gates)))
+    return None, args
+
+def showLogo(gate):
+    """Вывод логотипа проезда на экран."""
+    gate.layers.image('background', gate.logo_img)
+    gate.layers.only('background')
+    gate.show()
+
+def showMessage(gate, text, xy=(0, 0), align='left'):
+    """Сообщение FONT2 на чистом экране проезда. xy None - по центру экрана."""
+    def paint(image):
+        pos = xy
+        if pos is None:
+            width, height = text_cache.textsize(text, FONT2, align=align)
+            pos = ((image.width - width) / 2, (image.height - height) / 2)
+        text_cache.draw(image, pos, text, FONT2, align=align)
+    gate.layers.update('overlay', (text, xy, align), paint)
+    gate.layers.only('overlay')
+    gate.show()
+
+def notify(text, key=None):
+    """Сообщение в канал через очередь outbox, без ожидания сети.
+
+    Сообщение с ключом key заменяет ещё не отправленное с тем же ключом.
+    """
+    outbox.put(settings.channel_id, text, key)
+
+def sendMessage(chat_id, text):
+    """Отправка одного сообщения из очереди outbox."""
+    bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown", disable_web_page_preview=True)
 
 def checkIsAdmin(from_user):
     """Проверка на вхождение в список админов"""
-    if len(ADMINS)<=0:
+    admins = settings.admins
+    if len(admins)<=0:
         return True
-    return (from_user.id in ADMINS) or ((from_user.username is not None) and (from_user.username in ADMINS))
+    if from_user.id in sudo_admins:
+        return True
+    return (from_user.id in admins) or ((from_user.username is not None) and (from_user.username in admins))
 
 def user_name(from_user):
     """Форматирование имени отправителя комнады в читанемый вид"""
@@ -166,46 +184,101 @@ def start(update, _context):
 
 def help_command(update, _context):
     """Send a message when the command /help is issued."""
-    update.message.reply_text(_('My commands list is:\n\t/serial - my serial number\n\t/state - current gate state\n\t/turnon {minutes} - open gate for {minutes} time\n\t/turnoff - close gate immediately\n\t/logs {cmd} [params] - work with log files, where {cmd} is:\n\t\tlist [page] - list log files from {page}, where {page} is page number by 10 files\n\t\tget {file_name} - downlaod log file {filename}\n\t\tclear {file_name} - clear log {filename}\n\t/savers {cmd} [params] - work with screen savers files, where {cmd} is:\n\t\tadd - add new image file\t\tlist [page] - list files from {page}, where {page} is page number by 10 files\n\t\tget {file_name} - downlaod image file {filename}\n\t\tdel {file_name} - delete image file {filename}\n/logo {cmd} [params] - work with logo, where {cmd} is:\n\t\tadd - replace current logo with uploaded\n\t\tget - downlaod logo image file\n\t\tdel - delete logo image file and replace by QR code\n'))
+    update.message.reply_text(_('My commands list is:\n\t/serial - my serial number\n\t/metrics - counters and timings of mail, display and payments\n\t/state [gate] - current state of all gates or of {gate}\n\t/turnon {minutes} - open gate for {minutes} time\n\t/turnoff - close gate immediately\n\t/screen [live [seconds]] - picture of the gate screen, or its animation for {seconds}\n\t/logs {cmd} [params] - work with log files, where {cmd} is:\n\t\tlist [page] [mask] - list log files from {page}, where {page} is page number by 10 files, newest first, {mask} is file name mask like *.gz\n\t\tget {file_name} [gz|xz|raw] - downlaod log file {filename}, compressed by default\n\t\ttail [count] [file_name] - last {count} lines of log\n\t\tgrep {pattern} [since] [file_name] - log lines matching {pattern}, since is date like 2020-09-28T13:04\n\t\tclear {file_name} - clear log {filename}\n\t/savers {cmd} [params] - work with screen savers files, where {cmd} is:\n\t\tadd - add new image files, several can be sent in one message\t\tlist [page] - list files from {page}, where {page} is page number by 10 files\n\t\tget {file_name} - downlaod image file {filename}\n\t\tdel {file_name} - delete image file {filename}\n/logo {cmd} [params] - work with logo, where {cmd} is:\n\t\tadd - replace current logo with uploaded\n\t\tget - downlaod logo image file\n\t\tdel - delete logo image file and replace by QR code\nWith several gates the gate id goes first in /turnon, /turnoff, /screen and /logo, like /turnon {gate} {minutes}\n'))
+
+def bot_screen(update, context):
+    """Обработчик команды бота screen. С live [секунды] - запись экрана анимацией.
 
-def bot_screen(update, _context):
-    """Обработчик команды бота screen."""
+    Пока экран не менялся, фото отправляется повторно по file_id без
+    кодирования и загрузки.
+    """
     if (update.message is None):
         return
-    imgByteArr = io.BytesIO()
-    screen.save(imgByteArr, format='PNG')
-    imgByteArr.seek(0, 0)
-    update.message.reply_photo(imgByteArr)
+    gate, args = gateArgs(update, context.args)
+    if gate is None:
+        return
+    if len(args) >= 1 and args[0].lower() == 'live':
+        seconds = LIVE_SECONDS
+        if len(args) >= 2 and args[1].isdigit():
+            seconds = max(1, min(int(args[1]), LIVE_MAX))
+        # запись идёт в своём потоке, обработчик команд её не ждёт
+        threading.Thread(target=screenLive, args=(update.message, gate, seconds), name="screen_live", daemon=True).start()
+        return
+    version, data = gate.png_snapshot()
+    cached = screen_photos.get(gate.id)
+    if cached is not None and cached[0] == version:
+        try:
+            update.message.reply_photo(cached[1])
+            return
+        except Exception as e:
+            logger.warning('Unable to resend screen photo: %s', e)
+    message = update.message.reply_photo(io.BytesIO(data), filename='screen.png')
+    if message is not None and message.photo:
+        screen_photos[gate.id] = (version, message.photo[-1].file_id)
+
+def screenLive(message, gate, seconds):
+    """Запись снимков экрана проезда seconds секунд и отправка в GIF."""
+    snapshot = gate.snapshot
+    frames = [(snapshot, time.monotonic())]
+    deadline = frames[0][1] + seconds
+    while len(frames) < LIVE_MAX * 10:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            break
+        snapshot = gate.wait_snapshot(snapshot[0], left)
+        if snapshot is None:
+            break
+        frames.append((snapshot, time.monotonic()))
+    stamps = [stamp for _snapshot, stamp in frames] + [time.monotonic()]
+    # GIF хранит длительность кадра в сотых секунды, короче 20 мс браузеры не показывают
+    durations = [max(20, int((stamps[i + 1] - stamps[i]) * 1000)) for i in range(len(frames))]
+    images = [frame[1].convert('L') for frame, _stamp in frames]
+    data = io.BytesIO()
+    images[0].save(data, format='GIF', save_all=True, append_images=images[1:], duration=durations, loop=0)
+    data.seek(0)
+    try:
+        message.reply_animation(data, filename='screen.gif')
+    except Exception as e:
+        logger.warning('Unable to send screen animation: %s', e)
 
-def bot_state(update, _context):
-    """Обработчик команды бота state."""
+def bot_state(update, context):
+    """Обработчик команды бота state. Без id проезда - состояние всех проездов."""
     if (update.message is None):
         return
-    text = ""
     logger.info('State requested by %s', user_name(update.message.from_user))
-    if work_start != 0:
-        now = datetime.timestamp(datetime.now())
-        text = _('Elapsed time: {} of {}').format(int(now - work_start), int(work_length))
+    if len(context.args) > 0 and context.args[0] in gates:
+        selected = [gates[context.args[0]]]
     else:
-        text = _('On Idle')
-    update.message.reply_text(text)
+        selected = gates.values()
+    lines = []
+    for gate in selected:
+        if gate.work_start != 0:
+            text = _('Elapsed time: {} of {}').format(int(gate.elapsed()), int(gate.work_length))
+        else:
+            text = _('On Idle')
+        lines.append(gateText(gate, text))
+    update.message.reply_text('\n'.join(lines))
 
 def bot_turnon(update, context):
     """Обработчик команды бота turnoff."""
     if (update.message is None) or (not checkIsAdmin(update.message.from_user)):
         return
     logger.info('Turn on requested by %s', user_name(update.message.from_user))
-    if len(context.args) == 1 and context.args[0].isdigit():
-        global work_start, work_length, oled
-        if work_start == 0 or work_length == 0:
-            work_length = int(context.args[0])*60
-            work_start = datetime.timestamp(datetime.now())
-            logger.info('Starting work for %d sec', int(work_length))
-            turnRelayOn()
-            update.message.reply_text(_('Starting work').format(int(work_length/60)))
-            saveWork(user_name(update.message.from_user))
+    gate, args = gateArgs(update, context.args)
+    if gate is None:
+        return
+    if len(args) == 1 and args[0].isdigit():
+        with gate.lock:
+            started = not gate.working
+            if started:
+                gate.start(int(args[0])*60)
+                gate.save(user_name(update.message.from_user))
+        if started:
+            logger.info('Starting work of gate %s for %d sec', gate.id, int(args[0])*60)
+            wakeWork()
+            update.message.reply_text(gateText(gate, _('Starting work').format(int(args[0]))))
         else:
-            update.message.reply_text(_('I\'m already in work!'))
+            update.message.reply_text(gateText(gate, _('I\'m already in work!')))
     else:
         update.message.reply_text(_('What you want?'))
 
@@ -213,80 +286,79 @@ def bot_password(update, context):
     """Обработчик команды бота password."""
     if (update.message is None):
         return
-    if len(context.args) == 1 and type(context.args[0]) == str:
-        global ADMINS
-        if not (update.message.from_user.id in ADMINS) and not (update.message.from_user.username in ADMINS):
-            ADMINS.append(update.message.from_user.id)
+    if len(context.args) == 1 and type(context.args[0]) == str and context.args[0] == settings.password:
+        sudo_admins.add(update.message.from_user.id)
+
+def uploadImage(update, context, size=(128, 64)):
+    """Проверка загруженного документа и перевод его в 1-битный кадр экрана.
+
+    Размер и тип проверяются по данным Telegram до скачивания, файл
+    скачивается в память. При ошибке отвечает в чат и возвращает None.
+    """
+    document = update.message.document
+    try:
+        checkDocument(document)
+        image = toScreen(download(context.bot.getFile(document)), size)
+    except UploadError as e:
+        logger.warning('Upload %s rejected: %s', document.file_name, e)
+        if e.reason == 'size':
+            update.message.reply_text(_('Sorry, but file is too big'))
+        else:
+            update.message.reply_text(_('Sorry, but file must be a picture'))
+        return None
+    except Exception as e:
+        logger.error('Upload %s error: %s', document.file_name, e)
+        update.message.reply_text(_('Sorry, but file must be a picture'))
+        return None
+    return image
 
 def document_handler(update, context):
-    """Обработчик события загрузки файла."""
-    if 'saver_upload' in context.chat_data:
-        old_job = context.chat_data['saver_upload']
-        old_job.schedule_removal()
-        del context.chat_data['saver_upload']
-        new_file_name = os.path.join(SCREENS_DIR, update.message.document.file_name)
+    """Обработчик события загрузки файла.
+
+    Несколько заставок, отправленных одним сообщением (альбомом),
+    приходят отдельными событиями с общим media_group_id - ждём их все.
+    """
+    group = update.message.media_group_id
+    if 'saver_upload' in context.chat_data or (group is not None and context.chat_data.get('saver_group') == group):
+        if 'saver_upload' in context.chat_data:
+            old_job = context.chat_data['saver_upload']
+            old_job.schedule_removal()
+            del context.chat_data['saver_upload']
+            context.chat_data['saver_group'] = group
+        name = os.path.splitext(os.path.basename(update.message.document.file_name or 'screen'))[0] + '.png'
+        new_file_name = os.path.join(SCREENS_DIR, name)
         if os.path.isfile(new_file_name):
             update.message.reply_text(_('Sorry, but this file already exists'))
-        else:
-            file = context.bot.getFile(update.message.document)
-            file.download(custom_path=new_file_name)
-            try:
-                im = Image.open(new_file_name)
-                if im.width != 128 or im.height != 64 or im.mode not in set(['1', 'L', 'P']):
-                    im.close()
-                    del im
-                    update.message.reply_text(_('Sorry, but picture must be 128x64 mono color'))
-                    os.remove(new_file_name)
-                else:
-                    im.close()
-                    del im
-                    update.message.reply_text(_('Thx for new screen saver'))
-            except Exception:
-                update.message.reply_text(_('Sorry, but file must be a picture'))
-                os.remove(new_file_name)
+            return
+        image = uploadImage(update, context, savers.size)
+        if image is None:
+            return
+        try:
+            saveAtomic(image, new_file_name)
+        except Exception as e:
+            logger.error("Screen saver upload error: %s", e)
+            return
+        savers.update(name)
+        update.message.reply_text(_('Thx for new screen saver {}').format(name))
     elif 'logo_upload' in context.chat_data:
         old_job = context.chat_data['logo_upload']
         old_job.schedule_removal()
         del context.chat_data['logo_upload']
-
-        new_file_name = os.path.join('/tmp', LOGO_FILE)
-
-        file = context.bot.getFile(update.message.document)
-        file.download(custom_path=new_file_name)
+        gate = gates.get(context.chat_data.pop('logo_gate', None))
+        if gate is None:
+            return
+        image = uploadImage(update, context, gate.screen.size)
+        if image is None:
+            return
         try:
-            im = Image.open(new_file_name)
-            if im.width != 128 or im.height != 64 or im.mode not in set(['1', 'L', 'P']):
-                im.close()
-                del im
-                update.message.reply_text(_('Sorry, but picture must be 128x64 mono color'))
-                os.remove(new_file_name)
-            else:
-                im.close()
-                del im
-
-                update.message.reply_text(_('Thx for new logo'))
-
-                try:
-                    global work_start, logo_img, oled, screen
-                    logo_file_name = os.path.join(LIB_DIR, LOGO_FILE)
-                    if os.path.isfile(logo_file_name):
-                        os.remove(logo_file_name)
-                    shutil.move(new_file_name, logo_file_name)
-                    logo_img = Image.open(logo_file_name)
-
-                    if work_start == 0:
-                        draw = ImageDraw.Draw(screen)
-                        draw.rectangle([(0, 0), screen.size], fill=0)
-                        screen.paste(logo_img, (0, 0))
-                        try:
-                            oled.display(screen)
-                        except Exception:
-                            pass
-                except Exception as e:
-                    logger.error("Logo upload error: %s", e)
-        except Exception:
-            update.message.reply_text(_('Sorry, but file must be a picture'))
-            os.remove(new_file_name)
+            saveAtomic(image, gate.logo_file)
+        except Exception as e:
+            logger.error("Logo upload error: %s", e)
+            return
+        gate.logo_img = image
+        update.message.reply_text(gateText(gate, _('Thx for new logo')))
+        if gate.work_start == 0:
+            showLogo(gate)
 
 def saver_upload_timeout(_update, context):
     """Обработчик таймаута на загрузку изображения."""
@@ -298,8 +370,11 @@ def bot_logo(update, context):
     if (update.message is None) or (not checkIsAdmin(update.message.from_user)):
         return
     logger.info('Logo requested by %s', user_name(update.message.from_user))
-    if len(context.args) >= 1:
-        cmd = context.args[0].lower()
+    gate, args = gateArgs(update, context.args)
+    if gate is None:
+        return
+    if len(args) >= 1:
+        cmd = args[0].lower()
         if cmd == 'add':
             if 'saver_upload' in context.chat_data:
                 old_job = context.chat_data['saver_upload']
@@ -316,8 +391,9 @@ def bot_logo(update, context):
             chat_id = update.message.chat_id
             new_job = context.job_queue.run_once(saver_upload_timeout, 60, context=chat_id)
             context.chat_data['logo_upload'] = new_job
+            context.chat_data['logo_gate'] = gate.id
         elif cmd == 'get':
-            file_name = os.path.join(LIB_DIR, LOGO_FILE)
+            file_name = gate.logo_file
             if os.path.isfile(file_name):
                 try:
                     with open(file_name, 'rb') as f:
@@ -327,21 +403,14 @@ def bot_logo(update, context):
             else:
                 update.message.reply_text(_('Sorry, but this file is not exists'))
         elif cmd == 'del':
-            file_name = os.path.join(LIB_DIR, LOGO_FILE)
+            file_name = gate.logo_file
             if os.path.isfile(file_name):
-                global logo_img, screen, oled
                 os.remove(file_name)
-                logo_img = Image.new('1', (128, 64))
-                generate_logo(file_name)
-                if work_start == 0:
-                    draw = ImageDraw.Draw(screen)
-                    draw.rectangle([(0, 0), screen.size], fill=0)
-                    screen.paste(logo_img, (0, 0))
-                    try:
-                        oled.display(screen)
-                    except Exception:
-                        pass
-                update.message.reply_text(_('Custom logo removed'))
+                gate.logo_img = Image.new('1', (128, 64))
+                generate_logo(gate)
+                if gate.work_start == 0:
+                    showLogo(gate)
+                update.message.reply_text(gateText(gate, _('Custom logo removed')))
             else:
                 update.message.reply_text(_('Sorry, but this file is not exists'))
 
@@ -374,6 +443,7 @@ def bot_savers(update, context):
                 if os.path.isfile(file_name):
                     try:
                         os.remove(file_name)
+                        savers.update(context.args[1])
                         update.message.reply_text(_('Screen image file {} is deleted').format(context.args[1]))
                     except Exception:
                         pass
@@ -391,6 +461,16 @@ def bot_savers(update, context):
                 else:
                     update.message.reply_text(_('Sorry, but this file is not exists'))
 
+def replyLines(update, lines, file_name):
+    """Ответ строками лога: текстом, а если не влезает в сообщение - файлом."""
+    text = '\n'.join(lines)
+    if len(text) <= 0:
+        update.message.reply_text(_('Nothing found'))
+    elif len(text) <= 4000:
+        update.message.reply_text(text)
+    else:
+        update.message.reply_document(io.BytesIO(text.encode('utf-8')), filename=file_name)
+
 def bot_logs(update, context):
     """Обработчик команды бота logs."""
     if (update.message is None) or (not checkIsAdmin(update.message.from_user)):
@@ -400,20 +480,20 @@ def bot_logs(update, context):
         cmd = context.args[0].lower()
         if cmd == 'list':
             log_files = ''
-            cnt = 0
             page = 0
-            if len(context.args) >= 2 and context.args[1].isdigit():
-                page = int(context.args[1])
+            pattern = None
+            for arg in context.args[1:3]:
+                if arg.isdigit():
+                    page = int(arg)
+                else:
+                    pattern = arg
             if os.path.isdir(LOG_PATH):
-                for f in os.listdir(LOG_PATH):
-                    if os.path.isfile(os.path.join(LOG_PATH, f)):
-                        if cnt >= page*10:
-                            log_files += f + '\n'
-                        cnt += 1
-                        if cnt+(page*10) >= 10:
-                            log_files += _('({})...').format(page+1)
-                            break
-                if cnt <= 0:
+                items, more = log_index.page(page, pattern)
+                for name, size, mtime in items:
+                    log_files += '{} {} {}\n'.format(name, sizeText(size), datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M'))
+                if more:
+                    log_files += _('({})...').format(page+1)
+                if len(items) <= 0:
                     log_files += _('no more files')
             else:
                 log_files += _('no logs directory')
@@ -422,16 +502,54 @@ def bot_logs(update, context):
         elif cmd == 'get':
             if len(context.args) >= 2:
                 file_name = os.path.join(LOG_PATH, context.args[1])
+                method = context.args[2].lower() if len(context.args) >= 3 else 'gz'
                 if os.path.isfile(file_name):
                     try:
-                        doc = open(file_name, 'rb')
-                        update.message.reply_document(doc)
-                        doc.close()
+                        if method in ('gz', 'xz') and not file_name.endswith(('.gz', '.xz')):
+                            # сжимаем на лету при чтении, без копии на диске
+                            with CompressingReader(file_name, method) as doc:
+                                update.message.reply_document(doc, filename=doc.name)
+                        else:
+                            with open(file_name, 'rb') as doc:
+                                update.message.reply_document(doc)
                     except Exception as _e:
                         update.message.reply_text(_('Error: Unable to send file'))
                 else:
                     update.message.reply_text(_('Error: No such file'))
             return
+        elif cmd in ('tail', 'grep'):
+            file_name = os.path.join(LOG_PATH, 'pay_gate.log')
+            count = 20
+            since = None
+            params = []
+            args = context.args[1:]
+            # имя файла - только последним аргументом: у grep после шаблона, у tail вместо числа строк или после него
+            if len(args) >= (2 if cmd == 'grep' else 1) and not (cmd == 'tail' and args[-1].isdigit()):
+                if os.path.isfile(os.path.join(LOG_PATH, args[-1])):
+                    file_name = os.path.join(LOG_PATH, args[-1])
+                    args = args[:-1]
+            for arg in args:
+                if cmd == 'tail' and arg.isdigit():
+                    count = min(int(arg), GREP_LIMIT)
+                elif cmd == 'grep' and len(params) > 0 and RE_SINCE.match(arg):
+                    since = arg
+                else:
+                    params.append(arg)
+            if cmd == 'grep' and len(params) <= 0:
+                update.message.reply_text(_('What you want?'))
+                return
+            if not os.path.isfile(file_name):
+                update.message.reply_text(_('Error: No such file'))
+                return
+            try:
+                if cmd == 'tail':
+                    lines = tail(file_name, count)
+                else:
+                    lines = grep(file_name, ' '.join(params), since)
+                replyLines(update, lines, '{}-{}.txt'.format(os.path.basename(file_name), cmd))
+            except Exception as _e:
+                update.message.reply_text(_('Error: Unable to read file'))
+            return
         elif cmd == 'clear':
             if len(context.args) >= 2:
                 file_name = os.path.join(LOG_PATH, context.args[1])
@@ -453,247 +571,326 @@ def bot_serial(update, _context):
     logger.info('Serial requested by %s', user_name(update.message.from_user))
     update.message.reply_text(serial)
 
-def bot_turnoff(update, _context):
+def bot_metrics(update, _context):
+    """Обработчик команды бота metrics: сводка счётчиков и времени работы."""
+    if (update.message is None) or (not checkIsAdmin(update.message.from_user)):
+        return
+    logger.info('Metrics requested by %s', user_name(update.message.from_user))
+    replyLines(update, metrics.summary(), 'metrics.txt')
+
+def bot_turnoff(update, context):
     """Обработчик команды бота turnoff."""
     if (update.message is None) or (not checkIsAdmin(update.message.from_user)):
         return
-    global work_start, work_length, oled, screen
     logger.info('Turn off requested by %s', user_name(update.message.from_user))
-    if work_start != 0:
-        work_length = 0
-        work_start = 0
-        logger.info('Work stopped')
-        update.message.reply_text(_('Work stopped!'))
-        turnRelayOff()
-        draw = ImageDraw.Draw(screen)
-        draw.rectangle([(0, 0), screen.size], fill=0)
-        screen.paste(logo_img, (0, 0))
-        try:
-            oled.display(screen)
-        except Exception:
-            pass
-        saveWork(user_name(update.message.from_user))
+    gate, _args = gateArgs(update, context.args)
+    if gate is None:
+        return
+    with gate.lock:
+        stopped = gate.work_start != 0
+        if stopped:
+            gate.stop()
+            gate.save(user_name(update.message.from_user))
+    if stopped:
+        logger.info('Work of gate %s stopped', gate.id)
+        update.message.reply_text(gateText(gate, _('Work stopped!')))
+        # логотип нарисует рабочая петля, она же снимет часы
+        wakeWork()
     else:
-        update.message.reply_text(_('I\'m already do nothing...'))
+        update.message.reply_text(gateText(gate, _('I\'m already do nothing...')))
 
-def check_work():
-    """Основаня рабочая петля. Реализует конечный автомат состояний."""
-    global oled, static_image
-    last_notify = 0
+def wakeWork():
+    """Разбудить рабочую петлю после изменения состояния работы."""
+    if work_thread != 0:
+        work_thread.e.set()
 
+def check_work():
+    """Основаня рабочая петля. Реализует конечный автомат состояний.
+
+    Одна петля обслуживает все проезды. Она спит до ближайшего таймера
+    (конец работы, следующая секунда отсчёта, уведомление, смена
+    заставки) любого проезда или до вызова wakeWork(). Таймеры
+    именуются парами (id проезда, событие). Все сроки считаются по
+    монотонным часам.
+    """
+    timers = Scheduler()
     t = threading.currentThread()
     e = getattr(t, "e")
     while not getattr(t, "stop", False):
-        global work_start, work_length, logo_img, FONT2
-        now = datetime.timestamp(datetime.now())
-        if work_start > 0 and work_length > 0:
-            elapsed_time = now - work_start
-            if work_length <= elapsed_time:
-                logger.info('Work end by time')
-                turnRelayOff()
-
-                draw = ImageDraw.Draw(screen)
-                draw.rectangle([(0, 0), screen.size], fill=0)
-                draw.text((0, 0), _("Pay time: {:02d}:{:02d}").format(int(work_length/60), int(work_length%60)), font=FONT2, fill=255)
-                draw.text((0, 25), _("Time is elapsed"), font=FONT2, fill=255)
-                try:
-                    oled.display(screen)
-                except Exception:
-                    pass
+        e.clear()
+        now = time.monotonic()
+        due = {}
+        for gate_id, event in timers.due(now):
+            due.setdefault(gate_id, set()).add(event)
+        for gate in gates.values():
+            stepWork(gate, timers, due.get(gate.id, set()), now)
+        e.wait(timeout=timers.timeout())
+    logger.info("Work stopped")
 
-                time.sleep(5)
-                draw.rectangle([(0, 0), screen.size], fill=0)
-                screen.paste(logo_img, (0, 0))
-                try:
-                    oled.display(screen)
-                except Exception:
-                    pass
+def stopSession(gate, timers):
+    """Сброс сессии проезда, если она была, и логотип на экран."""
+    key = gate.id
+    if gate.session is not None:
+        gate.session = None
+        gate.frame = None
+        timers.cancel((key, 'end'), (key, 'frame'), (key, 'notify'))
+    showLogo(gate)
+    timers.after((key, 'saver'), settings.saver_time[0])
+    # сверка кэша заставок с папкой - пока на экране логотип, а не при смене заставки
+    if savers is not None:
+        savers.maybe_refresh()
+
+def stepWork(gate, timers, due, now):
+    """Шаг рабочей петли для одного проезда: обработка сработавших таймеров due."""
+    key = gate.id
+    if gate.work_start > 0 and gate.work_length > 0:
+        if gate.session is None or gate.session[0] != gate.work_start:
+            # новая сессия: переводим её начало на монотонные часы
+            gate.mono_start = now - (time.time() - gate.work_start)
+            timers.cancel((key, 'saver'), (key, 'logo'))
+            interval = settings.notify_interval
+            if interval > 0:
+                timers.at((key, 'notify'), gate.mono_start + interval * (int((now - gate.mono_start) / interval) + 1))
+        if gate.session != (gate.work_start, gate.work_length):
+            gate.session = (gate.work_start, gate.work_length)
+            timers.at((key, 'end'), gate.mono_start + gate.work_length)
+            due.add('frame')
+        elapsed_time = now - gate.mono_start
+        # оплата или команда могли изменить работу после проверок выше: решение и остановка под блокировкой
+        with gate.lock:
+            stopped = not gate.working
+            ended = not stopped and gate.work_start == gate.session[0] and gate.work_length <= elapsed_time
+            if ended:
+                work_length = gate.work_length
+                gate.stop()
+                gate.save(None)
+        if stopped:
+            # работу остановили командой уже после проверок выше
+            stopSession(gate, timers)
+        elif ended:
+            logger.info('Work of gate %s end by time', gate.id)
+
+            header = _("Pay time: {:02d}:{:02d}").format(int(work_length/60), int(work_length%60))
+            gate.layers.update('header', header, lambda image: text_cache.draw(image, (0, 0), header, FONT2))
+            gate.layers.update('overlay', 'elapsed', lambda image: text_cache.draw(image, (0, 25), _("Time is elapsed"), FONT2))
+            gate.layers.only('header', 'overlay')
+            gate.show()
+
+            gate.session = None
+            gate.frame = None
+            timers.cancel((key, 'end'), (key, 'frame'), (key, 'notify'))
+            # надпись держится 5 секунд, потом логотип
+            timers.after((key, 'logo'), 5)
+
+            # уведомление об оставшемся времени, не успевшее уйти, уже не нужно
+            outbox.cancel(settings.channel_id, (gate.id, 'elapsed'))
+            notify(gateText(gate, _("Stop work!")))
+        else:
+            if 'frame' in due:
+                frame_start = time.perf_counter()
+                if gate.frame != (gate.work_start, gate.work_length):
+                    # новая или продлённая сессия - слои часов и прогресса рисуются заново
+                    header = _("Pay time: {:02d}:{:02d}").format(int(gate.work_length/60), int(gate.work_length%60))
+                    gate.layers.update('header', header, lambda image: text_cache.draw(image, (0, 0), header, FONT2))
+                    gate.layers.only('header')
+                    gate.progress = None
+                    gate.frame = (gate.work_start, gate.work_length)
+                # символы часов перекрывают старые целиком, прогресс дорисовывается,
+                # слой меняется, только когда сменилось его значение
+                remaining = int(gate.work_length-elapsed_time)
+                gate.layers.update('clock', remaining, lambda image: drawTime(image, remaining, 0, 16, sevenSegLarge), clear=False)
+                filled = progressFilled(int(elapsed_time), int(gate.work_length))
+                if gate.progress is None or filled != gate.progress:
+                    def paint(image):
+                        gate.progress = drawProgress(image, int(elapsed_time), int(gate.work_length), gate.progress)
+                    gate.layers.update('progress', None, paint, clear=False)
+                gate.show()
+                frame_time.observe(time.perf_counter() - frame_start, gate.id)
+                if gate.journal is not None:
+                    gate.journal.tick()
+                # следующий кадр - когда сменится целая секунда
+                timers.at((key, 'frame'), gate.mono_start + int(elapsed_time) + 1)
+
+            if 'notify' in due:
+                elapsed = (gate.work_length-elapsed_time)
+                if settings.notify_interval > 0:
+                    timers.at((key, 'notify'), now + settings.notify_interval)
+                logger.info('Elapsed notification of gate %s %d', gate.id, int(elapsed))
+                elapsed = int(elapsed/60)
+                notify(gateText(gate, _('Elapsed time {} min').format(int(elapsed))), key=(gate.id, 'elapsed'))
+    else:
+        if gate.session is not None or 'logo' in due:
+            # работу остановили командой или пора вернуть логотип
+            stopSession(gate, timers)
+        elif 'saver' in due:
+            gate.layers.image('background', savers.choice() if savers is not None else None)
+            gate.layers.only('background')
+            gate.show()
+            timers.after((key, 'logo'), settings.saver_time[1])
+        elif not timers.pending((key, 'saver')) and not timers.pending((key, 'logo')):
+            timers.after((key, 'saver'), settings.saver_time[0])
+
+def headerText(value):
+    """Декодирование заголовка письма в строку."""
+    from email.header import decode_header, make_header # pylint: disable=import-outside-toplevel
+    try:
+        return str(make_header(decode_header(value)))
+    except (UnicodeDecodeError, LookupError, TypeError):
+        return value or ''
 
-                work_length = 0
-                work_start = 0
-                last_notify = 0
+def processPayment(headers, mail_content, uid_key=None, received=None):
+    """Поиск оплаты в тексте письма и запуск или продление работы проезда с её QR.
 
-                bot.send_message(chat_id=CHANNEL_ID, text=_("Stop work!"), parse_mode=ParseMode.MARKDOWN, disable_web_page_preview=True)
-                saveWork(None)
+    received - время прихода письма на сервер, для замера задержки до включения реле.
+    """
+    mail_from = headerText(headers['from'])
+    mail_subject = headerText(headers['subject'])
+    logger.info('EMAIL from %s with Subject: %s', mail_from, mail_subject)
 
-                static_image = now
-            else:
-                draw = ImageDraw.Draw(screen)
-                draw.rectangle([(0, 0), screen.size], fill=0)
-                draw.text((0, 0), _("Pay time: {:02d}:{:02d}").format(int(work_length/60), int(work_length%60)), font=FONT2, fill=255)
-                drawTime(screen, int(work_length-elapsed_time), 0, 16, sevenSegLarge)
-                drawProgress(screen, int(elapsed_time), int(work_length))
-                try:
-                    oled.display(screen)
-                except Exception:
-                    pass
+    payment = settings.parser.parse(mail_from, mail_subject, mail_content)
+    if payment is None:
+        return
+    code, pay, qr_num, template = payment
 
-                if NOTIFY_INTERVAL>0:
-                    if last_notify <= 0:
-                        last_notify = work_start
-                    if now-last_notify >= NOTIFY_INTERVAL:
-                        elapsed = (work_length-elapsed_time)
-                        last_notify = now
-                        logger.info('Elapsed notification %d', int(elapsed))
-                        elapsed = int(elapsed/60)
-                        bot.send_message(chat_id=CHANNEL_ID, text=_('Elapsed time {} min').format(int(elapsed)), parse_mode=ParseMode.MARKDOWN, disable_web_page_preview=True)
+    gate = gates_by_qr.get(qr_num)
+    if gate is None or pay <= 0:
+        if gate is None:
+            logger.info('Payment for unknown QR %s, skipping', qr_num)
+        return
+    if ledger.seen(code, uid_key):
+        logger.warning('Payment %s already credited, skipping', code)
+        return
+
+    length = gate.pay_length(pay)
+    logger.info('Payment detected %.2f for gate %s by template %s', pay, gate.id, template)
+    # решение и запись в журнал - под блокировкой проезда: рабочая петля может как раз остановить работу
+    with gate.lock:
+        started = gate.work_start == 0
+        if started:
+            gate.start(length)
         else:
-            if static_image == 0:
-                static_image = now
-            if static_image >= 0 and now-static_image >= SAVER_TIME[0]:
-                draw = ImageDraw.Draw(screen)
-                try:
-                    file = random.choice(os.listdir(SCREENS_DIR))
-                    im = Image.open(os.path.join(SCREENS_DIR, file))
-                    im.convert("L")
-                    screen.paste(im, (0, 0))
-                    im.close()
-                    del im
-                except Exception as _e:
-                    draw.rectangle([(0, 0), screen.size], fill=0)
-                try:
-                    oled.display(screen)
-                except Exception:
-                    pass
-                static_image = 0 - now
-            elif static_image < 0 and now - (0 - static_image) >= SAVER_TIME[1]:
-                static_image = now
-                draw = ImageDraw.Draw(screen)
-                draw.rectangle([(0, 0), screen.size], fill=0)
-                screen.paste(logo_img, (0, 0))
-                try:
-                    oled.display(screen)
-                except Exception:
-                    pass
-        e.wait(timeout=1)
-    logger.info("Work stopped")
+            # оплата во время работы продлевает текущую сессию
+            gate.extend(length)
+        wakeWork()
+        gate.save(code)
+    if not started:
+        logger.info('Work of gate %s extended by %d sec', gate.id, length)
+    if received is not None:
+        payment_delay.observe(max(0.0, time.time() - received))
+    payments_total.inc(label=gate.id)
+    ledger.add(code, uid_key, pay, qr_num, length)
+    notify(gateText(gate, _('Payment detected {}!').format(pay)))
+
+def processMail(session, uids):
+    """Обработка пачки непрочитанных писем: одна выборка, разбор по порядку, одна пометка."""
+    messages = session.fetch_texts(uids)
+    for uid, headers, mail_content, received in messages:
+        try:
+            processPayment(headers, mail_content, session.uid_key(uid), received)
+        except Exception as er:
+            logger.error("Unable to parse EMAIL %s: %s", uid.decode(), er)
+    session.mark_deleted([message[0] for message in messages])
 
 def check_mail():
-    """Поток проверки почты на сервере."""
+    """Поток проверки почты на сервере.
+
+    Соединение держится постоянно, новые письма ждём через IDLE,
+    переподключаемся только после ошибки или смены ящика в настройках.
+    """
+    from pay_gate.mail import MailSession # pylint: disable=import-outside-toplevel
     t = threading.currentThread()
     e = getattr(t, "e")
+    account = None
+    session = None
     while not getattr(t, "stop", False):
+        current = settings
+        if account != mailAccount(current):
+            if session is not None:
+                logger.info('IMAP account changed, reconnecting')
+                session.close()
+            account = mailAccount(current)
+            session = MailSession(current.imap_server, current.email_login, current.email_password, port=current.email_port, ssl=current.email_ssl)
+            t.session = session
+        if not session.connected:
+            try:
+                session.connect()
+            except Exception as er:
+                imap_failures.inc(label='connect')
+                session.fail(e, er)
+                continue
         try:
-            mail = imaplib.IMAP4_SSL(IMAP_SERVER)
-        except Exception as er:
-            logger.error("Connect to IMAP server: %s", er)
-            e.wait(timeout=60)
-            continue
-        try:
-            mail.login(EMAIL_LOGIN, EMAIL_PASSWORD)
+            with mail_cycle_time.time():
+                uids = session.search_unseen()
+                if len(uids) > 0:
+                    processMail(session, uids)
+            session.wait(e, current.email_interval)
         except Exception as er:
-            logger.error("Mail auth error: %s", er)
-            e.wait(timeout=60)
-            continue
-        mail.select("inbox")
-
-        result, data = mail.uid('search', None, "NOT SEEN")
-        if result.lower() == "ok":
-            uids = data[0].split()
-            if len(uids) > 0:
-                latest_email_uid = uids[-1]
-                result, data = mail.uid('fetch', latest_email_uid, '(RFC822)')
-                if result.lower() == "ok":
-                    message = email.message_from_bytes(data[0][1])
-
-                    mail_from, _from_encode = decode_header(message['from'])[0]
-                    mail_subject, _encoding = decode_header(message['subject'])[0]
-                    charset = message.get_param('charset', 'ascii')
-
-                    try:
-                        logger.info('EMAIL from %s with Subject: %s', mail_from.decode(_from_encode), mail_subject.decode(_encoding))
-                    except (UnicodeDecodeError, AttributeError):
-                        pass
-
-                    if message.is_multipart():
-                        mail_content = ''
-
-                        # on multipart we have the text message and
-                        # another things like annex, and html version
-                        # of the message, in that case we loop through
-                        # the email payload
-                        for part in message.get_payload():
-                            # if the content type is text/plain
-                            # we extract it
-                            if part.get_content_type() == 'text/plain':
-                                mail_content += part.get_payload(None, True).decode(charset)
-                    else:
-                        # if the message isn't multipart, just extract it
-                        mail_content = message.get_payload(None, True).decode(charset)
-
-                    # and then let's show its result
-                    # print(f'From: {mail_from}')
-                    # print(f'Subject: {mail_subject}')
-                    # print(f'Content: {mail_content}')
-
-                    mail.uid("STORE", latest_email_uid, '+FLAGS', '\\Seen \\Deleted')
-
-                    global bot, work_start, work_length, QR_NUM
-                    if work_start == 0:
-                        global RE_SCRIPT
-                        m = re.search(RE_SCRIPT, mail_content, re.MULTILINE | re.UNICODE)
-                        if m is not None:
-                            pay = float(m.groups()[1])
-                            _qr_num = int(m.groups()[2])
-
-                            if _qr_num == QR_NUM and pay > 0:
-                                logger.info('Payment detected %.2f', pay)
-                                bot.send_message(CHANNEL_ID, _('Payment detected {}!').format(pay), "Markdown", True)
-                                work_start = datetime.timestamp(datetime.now())
-                                work_length = int((60 * pay)*PAY_COEF) + APPEND_TIME
-                                turnRelayOn()
-                                saveWork(m.groups()[0])
-
-        mail.close()
-        mail.logout()
-        e.wait(timeout=EMAIL_INTERVAL)
+            imap_failures.inc(label='session')
+            session.fail(e, er)
+    if session is not None:
+        session.close()
     logger.info("Mail check stopped")
 
-def drawProgress(display, seconds, totalSeconds):
-    """Отрисовка прогресс бара."""
+def interruptMail():
+    """Прервать ожидание писем в IDLE: поток почты сразу заметит остановку или новый ящик."""
+    session = getattr(mail_thread, 'session', None)
+    if session is not None:
+        session.interrupt()
+
+def mailAccount(current):
+    """Параметры подключения к почте из снимка настроек, для сравнения."""
+    return (current.imap_server, current.email_login, current.email_password, current.email_port, current.email_ssl)
+
+def progressFilled(seconds, totalSeconds):
+    """Номер последнего закрашенного столбца прогресс бара, -1 если полосы нет."""
+    if seconds <= 0 or totalSeconds <= 0:
+        return -1
+    return min(int(float(seconds) / float(totalSeconds) * 107.0), 106)
+
+def drawProgress(display, seconds, totalSeconds, last=None):
+    """Отрисовка прогресс бара.
+
+    Возвращает номер последнего закрашенного столбца (-1, если полоса
+    не рисовалась). Если передать в last значение с прошлого кадра,
+    перерисовываются только изменившиеся столбцы, а рамка не трогается.
+    """
     if display.height < 64:
         y = 31
     else:
         y = 56
     draw = ImageDraw.Draw(display)
-    for py in range(y - 3, y + 4):
-        draw.point((10, py), fill=255)
-        draw.point((117, py), fill=255)
-    if seconds > 0 and totalSeconds > 0:
-        progress = float(float(seconds) / float(totalSeconds) * 107.0)
-        for x in range(107):
-            if x <= progress:
-                draw.point((x + 10, y - 1), fill=255)
-                draw.point((x + 10, y), fill=255)
-                draw.point((x + 10, y + 1), fill=255)
-            else:
-                draw.point((x + 10, y - 1), fill=0)
-                draw.point((x + 10, y), fill=0)
-                draw.point((x + 10, y + 1), fill=0)
-
-
-def _drawChar(display, char, x, y, cw, cbh, chset):
-    draw = ImageDraw.Draw(display)
-    for sx in range(0, cw):
-        for sy in range(0, cbh):
-            dy = y
-            chdata = chset[char][sx + sy * cw]
-            for bit in [0, 1, 2, 3, 4, 5, 6, 7]:
-                draw.point(((sx + x), ((8 * sy) + dy)), fill=(255 if ((chdata >> bit) & 0x01) != 0 else 0))
-                dy += 1
-
-
-def drawTime(display, seconds, x, y, charset, fullsize=True, center=True):
-    """Отрисовка времени."""
+    if last is None:
+        draw.rectangle([(10, y - 3), (10, y + 3)], fill=255)
+        draw.rectangle([(117, y - 3), (117, y + 3)], fill=255)
+    if seconds <= 0 or totalSeconds <= 0:
+        return -1 if last is None else last
+    filled = progressFilled(seconds, totalSeconds)
+    if last is None:
+        draw.rectangle([(10, y - 1), (10 + filled, y + 1)], fill=255)
+        if filled < 106:
+            draw.rectangle([(11 + filled, y - 1), (116, y + 1)], fill=0)
+    elif filled > last:
+        draw.rectangle([(11 + last, y - 1), (10 + filled, y + 1)], fill=255)
+    elif filled < last:
+        draw.rectangle([(11 + filled, y - 1), (10 + last, y + 1)], fill=0)
+    return filled
+
+
+def _drawChar(display, char, x, y, font):
+    # draw.point отбрасывал дробную часть координат, делаем так же
+    display.paste(font.glyph(char), (int(x), int(y)))
+
+
+def drawTime(display, seconds, x, y, font, fullsize=True, center=True):
+    """Отрисовка времени шрифтом часов font (цифры и двоеточие)."""
     hours = seconds // 3600
     seconds %= 3600
     minutes = seconds // 60
     seconds = seconds % 60
 
-    cw = charset[11][0]
-    ch = charset[11][1]
-    digit_stride = charset[11][2]
-    colon_stride = charset[11][3]
+    cw = font.width
+    digit_stride = font.advance('0')
+    colon_stride = font.advance(':')
 
     if fullsize and center:
         w = (digit_stride * 4) + colon_stride + colon_stride + cw
@@ -705,19 +902,19 @@ def drawTime(display, seconds, x, y, charset, fullsize=True, center=True):
 
     pos = x
     if fullsize:
-        _drawChar(display, hours, pos, y, cw, ch, charset)  # hours
+        _drawChar(display, str(hours % 10), pos, y, font)  # hours
         pos += digit_stride
-        _drawChar(display, 10, pos, y, cw, ch, charset)  # :
+        _drawChar(display, ':', pos, y, font)
         pos += colon_stride
-    _drawChar(display, minutes // 10, pos, y, cw, ch, charset)  # min 10
+    _drawChar(display, str(minutes // 10), pos, y, font)  # min 10
     pos += digit_stride
-    _drawChar(display, minutes % 10, pos, y, cw, ch, charset)  # min 1
+    _drawChar(display, str(minutes % 10), pos, y, font)  # min 1
     pos += digit_stride
-    _drawChar(display, 10, pos, y, cw, ch, charset)  # :
+    _drawChar(display, ':', pos, y, font)
     pos += colon_stride
-    _drawChar(display, seconds // 10, pos, y, cw, ch, charset)  # sec 10
+    _drawChar(display, str(seconds // 10), pos, y, font)  # sec 10
     pos += digit_stride
-    _drawChar(display, seconds % 10, pos, y, cw, ch, charset)  # sec 1
+    _drawChar(display, str(seconds % 10), pos, y, font)  # sec 1
 
 def getSerial():
     """Получение серийого номера платы."""
@@ -736,7 +933,7 @@ def getSerial():
     file1.close()
     return _serial
 
-def error_handler(update: Update, context: CallbackContext):
+def error_handler(update, context):
     """Log the error and send a telegram message to notify the developer."""
     # Log the error before we do anything else, so we can see it even if something breaks.
     logger.error(msg="Exception while handling an update:", exc_info=context.error)
@@ -765,87 +962,85 @@ def error_handler(update: Update, context: CallbackContext):
 
     try:
         # Finally, send the message
-        context.bot.send_message(chat_id=191835312, text=message, parse_mode=ParseMode.HTML)
+        context.bot.send_message(chat_id=191835312, text=message, parse_mode="HTML")
     except Exception:
         pass
 
+def loadGates(items):
+    """Создание проездов по кортежу GateSettings из настроек.
+
+    Первый проезд пользуется прежними файлами журнала и логотипа,
+    остальные - своими файлами.
+    """
+    gates.clear()
+    gates_by_qr.clear()
+    for item in items:
+        first = len(gates) == 0
+        gate = Gate(
+            item.id,
+            item.pin,
+            item.qr_num,
+            item.qr_code,
+            invert=item.invert,
+            coef=item.coef,
+            bonus=item.bonus,
+            journal=WorkJournal(os.path.join(LIB_DIR, 'work.journal' if first else 'work-{}.journal'.format(item.id)),
+                                legacy=os.path.join(LIB_DIR, 'work.json') if first else None),
+            logo_file=os.path.join(LIB_DIR, LOGO_FILE if first else 'logo-{}.png'.format(item.id)),
+            oled_address=item.display
+        )
+        gates[item.id] = gate
+        gates_by_qr[item.qr_num] = gate
+    logger.info('Gates: %s', ', '.join('{} (QR {}, pin {})'.format(gate.id, gate.qr_num, gate.pin) for gate in gates.values()))
+
 def loadSettings():
     """Загрузка настроек бота из файла"""
-    config_json = '/etc/pay-gate.json'
-    if os.path.isfile(config_json):
-        with open(config_json) as json_file:
-            config = json.load(json_file)
-
-            if 'hw' in config is not None:
-                global PIN_NUM, LED_NUM, INVERT_PIN
-                if 'relay_pin' in config['hw'] and type(config['hw']['relay_pin']) == int:
-                    PIN_NUM = int(config['hw']['relay_pin'])
-                if 'invert_relay' in config['hw'] and type(config['hw']['invert_relay']) in [int, bool]:
-                    INVERT_PIN = int(config['hw']['invert_relay'])!=0
-                if 'led_pin' in config['hw'] and type(config['hw']['led_pin']) == int:
-                    LED_NUM = int(config['hw']['led_pin'])
-
-            try:
-                global PAY_COEF
-                PAY_COEF = float(config['pay']['coeficient'])
-            except Exception:
-                logger.warning("Missing Pay Coeficient, using default %.2f", PAY_COEF)
-
-            if 'bonus' in config['pay'] and type(config['pay']['bonus']) in [int]:
-                global APPEND_TIME
-                APPEND_TIME = int(config['pay']['bonus'])
-
-            try:
-                global NOTIFY_INTERVAL
-                NOTIFY_INTERVAL = int(config['telegram']['notify_interval'])
-            except Exception:
-                logger.warning("Missing NOTIFY_INTERVAL, using default %u", NOTIFY_INTERVAL)
-
-            try:
-                global TOKEN, CHANNEL_ID, QR_NUM, QR_CODE, SAVER_TIME, IMAP_SERVER, EMAIL_LOGIN, EMAIL_PASSWORD, EMAIL_INTERVAL, ADMINS, RE_SCRIPT
-                TOKEN = config['telegram']['token']
-                CHANNEL_ID = config['telegram']['channel_id']
-
-                if 'admins' in config['telegram'] and type(config['telegram']['admins']) in [list, tuple]:
-                    ADMINS = []
-                    for adm_id in config['telegram']['admins']:
-                        ADMINS.append(adm_id)
-
-                if 'password' in config['telegram'] and type(config['telegram']['password']) == str:
-                    SUDO_KEY = config['telegram']['password']
-
-                QR_NUM = config['QR']['num']
-                QR_CODE = config['QR']['url'].format(QR_NUM)
-                if 'script' in config['email'] and type(config['email']['script']) == str:
-                    re_script = config['email']['script']
-                    try:
-                        re.compile(re_script)
-                        RE_SCRIPT = re_script
-                    except re.error:
-                        logger.warning("Wrong REGEXP script for E-MAIL '%s'", re_script)
-
-                SAVER_TIME = (int(config['saver']['delay']), int(config['saver']['show']))
-                IMAP_SERVER = config['email']['server']
-                EMAIL_LOGIN = config['email']['login']
-                EMAIL_PASSWORD = config['email']['password']
-                EMAIL_INTERVAL = int(config['email']['interval'])
-            except Exception as e:
-                logger.error("Missing config value: %s", e)
-                sys.exit()
-            else:
-                return
-    sys.exit()
+    global settings
+    try:
+        settings = readSettings(CONFIG_FILE)
+    except (OSError, ValueError) as e:
+        logger.error("Unable to load settings: %s", e)
+        sys.exit()
+    logger.info('E-MAIL templates: %s', ', '.join(t.name for t in settings.parser.templates))
+    loadGates(settings.gates)
+
+def applySettings(new):
+    """Замена снимка настроек на ходу, без перезапуска.
+
+    Коэффициент и бонус проездов меняются сразу, почта переподключается
+    сама, если сменился ящик. Бот, железо, набор проездов, метрики и логи
+    меняются только перезапуском - об этом пишется в лог.
+    """
+    global settings
+    old = settings
+    changed = [field for field in new._fields if field not in ('parser', 'gates') and getattr(new, field) != getattr(old, field)]
+    restart = [field for field in changed if field in RESTART_FIELDS]
+    if [(g.id, g.pin, g.qr_num, g.qr_code, g.invert, g.display) for g in new.gates] != [(g.id, g.pin, g.qr_num, g.qr_code, g.invert, g.display) for g in old.gates]:
+        restart.append('gates')
+    for item in new.gates:
+        gate = gates.get(item.id)
+        if gate is not None:
+            gate.coef = item.coef
+            gate.bonus = item.bonus
+    settings = new
+    if mailAccount(new) != mailAccount(old):
+        interruptMail()
+    logger.info('Settings reloaded, changed: %s', ', '.join(changed) or 'nothing')
+    logger.info('E-MAIL templates: %s', ', '.join(t.name for t in new.parser.templates))
+    if len(restart) > 0:
+        logger.warning('Restart is required to apply: %s', ', '.join(restart))
 
 def sig_handler(signum, _frame):
     """Обработчик системных сигналов"""
-    global oled, screen, FONT2, mail_thread, work_thread
+    global FONT2, mail_thread, work_thread
     logger.info("Received %s signal.", signum)
 
-    bot.send_message(CHANNEL_ID, _('Bot shutdown request...'), "Markdown", True)
+    notify(_('Bot shutdown request...'))
 
     if mail_thread.is_alive():
         mail_thread.stop = True
         mail_thread.e.set()
+        interruptMail()
     if work_thread.is_alive():
         work_thread.stop = True
         work_thread.e.set()
@@ -853,19 +1048,41 @@ def sig_handler(signum, _frame):
     mail_thread.join()
     work_thread.join()
 
-    draw = ImageDraw.Draw(screen)
-    draw.rectangle([(0, 0), screen.size], fill=0)
-    text = _("System\nShutdown")
-    text_width, text_height = draw.multiline_textsize(text, font=FONT2)
-    draw.multiline_text((((screen.width-text_width)/2), ((screen.height-text_height)/2)), text, font=FONT2, fill=255, align="center")
+    for gate in gates.values():
+        if gate.journal is not None:
+            gate.journal.flush()
+        showMessage(gate, _("System\nShutdown"), None, align="center")
+
+    # последние сообщения в канал ещё в очереди
+    outbox.stop()
+
+def prepareScreens(missing):
+    """Фоновая часть запуска: чтение заставок и генерация недостающих логотипов."""
+    savers.refresh()
+    for gate in missing:
+        try:
+            generate_logo(gate)
+        except Exception as e:
+            logger.error("Unable to generate QR for gate %s: %s", gate.id, e)
+            continue
+        if not gate.working:
+            showLogo(gate)
+
+def announceStart(restored):
+    """Приветствие в канал после запуска бота."""
+    notify(_('Bot Started'))
+
+    for gate in restored:
+        notify(gateText(gate, _("Restoring prev work!")))
+
     try:
-        oled.display(screen)
-    except Exception:
-        pass
+        notify(_('My IP: {}').format(get_ip_address()))
+    except OSError as e:
+        logger.warning('Unable to get IP address: %s', e)
 
 def main():
     """Start the bot."""
-    global bot, oled, logo_img, FONT2, serial, SCREENS_DIR, mail_thread, work_thread, FONT2
+    global bot, FONT2, serial, SCREENS_DIR, mail_thread, work_thread, ledger, savers
 
     # Проверяем есть ли папка для сохранения данных
     if not os.path.isdir(LIB_DIR):
@@ -880,16 +1097,19 @@ def main():
     if pkg_name is None:
         pkg_name = __name__
 
-    fileHandler = logging.FileHandler('{0}/{1}.log'.format(LOG_PATH, pkg_name))
-    fileHandler.setFormatter(logFormatter)
-    logger.addHandler(fileHandler)
-
+    # запись логов идёт в отдельном потоке, остальные потоки только кладут записи в очередь
     consoleHandler = logging.StreamHandler(sys.stdout)
-    consoleHandler.setFormatter(logFormatter)
-    logger.addHandler(consoleHandler)
+    log_listener = startLogging(logFormatter, consoleHandler)
 
     logger.setLevel(logging.INFO)
 
+    # настройки нужны для ротации, поэтому файловый лог подключается после них
+    loadSettings()
+
+    fileHandler = RotatingLogHandler('{0}/{1}.log'.format(LOG_PATH, pkg_name), max_bytes=settings.log_max_size, when=settings.log_rotate, backup_count=settings.log_backups, compress=settings.log_compress)
+    fileHandler.setFormatter(logFormatter)
+    log_listener.handlers = (fileHandler, consoleHandler)
+
     logger.info("Service started")
 
     #Проверяем можно ли писать в эту папку
@@ -904,9 +1124,13 @@ def main():
     SCREENS_DIR = os.path.join(LIB_DIR, SCREENS_DIR)
     if not os.path.isdir(SCREENS_DIR):
         os.mkdir(SCREENS_DIR)
+    # заставки читаются в фоне, до этого вместо них чёрный экран
+    savers = SaverCache(SCREENS_DIR)
 
-    loadSettings()
+    ledger = PaymentLedger(os.path.join(LIB_DIR, 'payments.log'))
+    ledger.load()
 
+    # первый этап: реле, дисплеи и прерванная работа - до всего сетевого
     try:
         model = None
         board_json = '/etc/board.json'
@@ -925,43 +1149,68 @@ def main():
             import orangepi.zeroplus2 # pylint: disable=unused-import, import-outside-toplevel
             GPIO.setmode(orangepi.zeroplus2.BOARD)
 
-        GPIO.setup(PIN_NUM, GPIO.OUT)
-        GPIO.output(PIN_NUM, GPIO.LOW if INVERT_PIN else GPIO.HIGH)
-
-        oled = ssd1306(port=0, address=0x3C)
+        for gate in gates.values():
+            gate.setup()
     except Exception as e:
         logger.error("Unable to init Hardware %s", e)
 
+    for gate in gates.values():
+        if gate.oled_address is None:
+            continue
+        try:
+            gate.oled = FrameDiff(ssd1306(port=0, address=gate.oled_address))
+        except Exception as e:
+            logger.error("Unable to init display of gate %s: %s", gate.id, e)
+
     try:
         FONT2 = ImageFont.truetype(os.path.join(os.path.dirname(__file__), 'fonts/C&C Red Alert [INET].ttf'), 15)
     except Exception as e:
         logger.error("Unable to Load font: %s", e)
 
-    logo_loaded = False
-    logo_file = os.path.join(LIB_DIR, LOGO_FILE)
-    if os.path.isfile(logo_file):
-        logo_img = Image.open(logo_file)
-        logo_img.convert("L")
-        logger.info("QR Loaded")
-        logo_loaded = True
-    if not logo_loaded:
-        generate_logo(logo_file)
+    missing = []
+    for gate in gates.values():
+        if os.path.isfile(gate.logo_file):
+            gate.logo_img = Image.open(gate.logo_file)
+            gate.logo_img.convert("L")
+            logger.info("QR Loaded for gate %s", gate.id)
+        else:
+            missing.append(gate)
+        showLogo(gate)
 
-    ImageDraw.Draw(screen).rectangle([(0, 0), screen.size], fill=0)
-    screen.paste(logo_img, (0, 0))
+    restored = [gate for gate in gates.values() if gate.load()]
 
-    try:
-        oled.display(screen)
-    except Exception:
-        pass
+    work_thread = threading.Thread(target=check_work, name="check_work")
+    work_thread.e = threading.Event()
+    work_thread.start()
+
+    # почта нужна для оплат и от Telegram не зависит: сообщения в канал копит outbox
+    mail_thread = threading.Thread(target=check_mail, name="check_mail")
+    mail_thread.e = threading.Event()
+    mail_thread.start()
+
+    logger.info("Hardware started")
+
+    if settings.metrics_port > 0:
+        try:
+            serveMetrics(metrics, settings.metrics_host, settings.metrics_port)
+            logger.info("Metrics on http://%s:%d/metrics", settings.metrics_host, settings.metrics_port)
+        except OSError as e:
+            logger.error("Unable to start metrics server: %s", e)
+
+    # второй этап в фоне: заставки и генерация недостающих QR кодов
+    threading.Thread(target=prepareScreens, args=(missing,), name="prepare", daemon=True).start()
 
     serial = getSerial()
     logger.info('My serial is : %s', serial)
 
+    # третий этап: бот, модули telegram импортируются только сейчас
+    from telegram.ext import Updater, CommandHandler, MessageHandler, Filters # pylint: disable=import-outside-toplevel
+    from telegram.error import NetworkError # pylint: disable=import-outside-toplevel
+
     # Create the Updater and pass it your bot's token.
     # Make sure to set use_context=True to use the new context based callbacks
     # Post version 12 this will no longer be necessary
-    updater = Updater(TOKEN, use_context=True, user_sig_handler=sig_handler)
+    updater = Updater(settings.token, use_context=True, user_sig_handler=sig_handler)
 
     # Get the dispatcher to register handlers
     dp = updater.dispatcher
@@ -975,6 +1224,7 @@ def main():
     dp.add_handler(CommandHandler("turnoff", bot_turnoff))
     dp.add_handler(CommandHandler("logs", bot_logs, pass_args=True))
     dp.add_handler(CommandHandler("serial", bot_serial))
+    dp.add_handler(CommandHandler("metrics", bot_metrics))
     dp.add_handler(CommandHandler("screen", bot_screen))
     dp.add_handler(CommandHandler("savers", bot_savers, pass_args=True, pass_job_queue=True, pass_chat_data=True))
     dp.add_handler(CommandHandler("logo", bot_logo, pass_args=True, pass_job_queue=True, pass_chat_data=True))
@@ -984,33 +1234,23 @@ def main():
     # ...and the error handler
     dp.add_error_handler(error_handler)
 
-    logger.info("Bot started")
-
     # Start the Bot
+    # без сети start_polling сам повторяет подключение в своём потоке, почта и реле его не ждут
     updater.start_polling()
+    logger.info("Bot started")
 
     bot = updater.bot
+    # сообщения, накопленные до запуска бота, уходят первыми
+    outbox.start(sendMessage, retry=(NetworkError,))
 
-    mail_thread = threading.Thread(target=check_mail, name="check_mail")
-    mail_thread.e = threading.Event()
-    work_thread = threading.Thread(target=check_work, name="check_work")
-    work_thread.e = threading.Event()
-
-    loadWork()
-
-    mail_thread.start()
-    work_thread.start()
-
-    while True:
-        try:
-            bot.send_message(CHANNEL_ID, _('Bot Started'), "Markdown", True)
-        except Exception:
-            time.sleep(10)
-            continue
-        else:
-            break
+    # определение IP ждёт сеть в своём потоке и не задерживает обработку сигналов
+    threading.Thread(target=announceStart, args=(restored,), name="announce", daemon=True).start()
 
-    bot.send_message(CHANNEL_ID, _('My IP: {}').format(get_ip_address()), "Markdown", True)
+    # настройки перечитываются при изменении файла и по SIGHUP, без перезапуска
+    watcher = SettingsWatcher(CONFIG_FILE, applySettings)
+    watcher.start()
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda _signum, _frame: watcher.reload())
 
     # Run the bot until you press Ctrl-C or the process receives SIGINT,
     # SIGTERM or SIGABRT. This should be used most of the time, since
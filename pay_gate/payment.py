@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Разбор писем банка с помощью набора заранее скомпилированных шаблонов."""
+
+import re
+import logging
+from collections import namedtuple
+from email.utils import parseaddr
+
+Payment = namedtuple('Payment', ['code', 'pay', 'qr_num', 'template'])
+
+logger = logging.getLogger()
+
+class PaymentTemplate:
+    """Один формат письма: отправитель, тема, обязательные подстроки и регулярное выражение.
+
+    Группы выражения берутся по именам code, sum и qr, если они есть,
+    иначе по порядку: код подтверждения, сумма, номер QR.
+    """
+
+    def __init__(self, name, script, sender=None, subject=None, require=()):
+        self.name = name
+        self.regex = re.compile(script, re.MULTILINE | re.UNICODE)
+        self.sender = sender.lower() if sender else None
+        self.subject = subject
+        self.require = tuple(require)
+        names = self.regex.groupindex
+        self.groups = tuple(names.get(key, i + 1) for i, key in enumerate(('code', 'sum', 'qr')))
+
+    @classmethod
+    def from_config(cls, config, name):
+        """Создание шаблона из словаря настроек."""
+        return cls(
+            config.get('name', name),
+            config['script'],
+            sender=config.get('from'),
+            subject=config.get('subject'),
+            require=config.get('require', ())
+        )
+
+    def parse(self, subject, content):
+        """Проверка письма шаблоном. Возвращает Payment или None."""
+        if self.subject is not None and self.subject not in (subject or ''):
+            return None
+        # дешёвая проверка подстрок до запуска регулярного выражения
+        for literal in self.require:
+            if literal not in content:
+                return None
+        m = self.regex.search(content)
+        if m is None:
+            return None
+        code, pay, qr_num = (m.group(group) for group in self.groups)
+        return Payment(code, float(pay), int(qr_num), self.name)
+
+class PaymentParser:
+    """Упорядоченный набор шаблонов с индексом по отправителю."""
+
+    def __init__(self, templates):
+        self.templates = list(templates)
+        self.by_sender = {}
+        self.generic = []
+        for template in self.templates:
+            if template.sender is None:
+                self.generic.append(template)
+            else:
+                self.by_sender.setdefault(template.sender, []).append(template)
+
+    def candidates(self, sender):
+        """Шаблоны, которые имеет смысл пробовать для данного отправителя."""
+        addr = parseaddr(sender or '')[1].lower()
+        domain = addr.rpartition('@')[2]
+        return self.by_sender.get(addr, []) + self.by_sender.get(domain, []) + self.generic
+
+    def parse(self, sender, subject, content):
+        """Поиск оплаты в письме первым подходящим шаблоном."""
+        for template in self.candidates(sender):
+            try:
+                payment = template.parse(subject, content)
+            except (ValueError, IndexError) as e:
+                logger.warning("Template '%s' matched but failed: %s", template.name, e)
+                continue
+            if payment is not None:
+                return payment
+        return None
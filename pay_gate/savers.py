@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Кэш заставок, заранее декодированных в 1-битные кадры."""
+
+import os
+import time
+import random
+import logging
+import threading
+from PIL import Image
+
+MAX_SAVERS = 256                                         # больше заставок в памяти не держим (~1 КБ на штуку)
+RESCAN_INTERVAL = 600                                    # как часто сверять кэш с папкой, секунд
+
+logger = logging.getLogger()
+
+class SaverCache:
+    """Заставки из папки в виде готовых кадров.
+
+    Выбор заставки не обращается к диску. Папка перечитывается при
+    загрузке, по вызову update() из команд бота и не чаще раза в
+    RESCAN_INTERVAL через maybe_refresh(); файлы с прежним mtime
+    повторно не декодируются.
+    """
+
+    def __init__(self, path, size=(128, 64), limit=MAX_SAVERS):
+        self.path = path
+        self.size = size
+        self.limit = limit
+        self.frames = {}
+        self.last_scan = 0
+        self.lock = threading.Lock()
+
+    def _decode(self, name, mtime):
+        try:
+            with Image.open(os.path.join(self.path, name)) as im:
+                if im.size != self.size:
+                    logger.warning('Screen saver %s is %dx%d, skipped', name, im.width, im.height)
+                    return (mtime, None)
+                return (mtime, im.convert('1').tobytes())
+        except Exception as e:
+            # негодный файл запоминаем, чтобы не разбирать его при каждой сверке
+            logger.warning('Unable to load screen saver %s: %s', name, e)
+            return (mtime, None)
+
+    def refresh(self):
+        """Сверка кэша с папкой: новые и изменённые файлы декодируются, удалённые забываются."""
+        frames = {}
+        try:
+            entries = sorted((entry for entry in os.scandir(self.path) if entry.is_file()), key=lambda entry: entry.name)
+        except OSError as e:
+            logger.warning('Unable to scan screen savers: %s', e)
+            entries = []
+        for entry in entries[:self.limit]:
+            mtime = entry.stat().st_mtime
+            with self.lock:
+                cached = self.frames.get(entry.name)
+            if cached is not None and cached[0] == mtime:
+                frames[entry.name] = cached
+                continue
+            frames[entry.name] = self._decode(entry.name, mtime)
+        with self.lock:
+            self.frames = frames
+        self.last_scan = time.monotonic()
+
+    def maybe_refresh(self):
+        """Сверка с папкой, если с прошлой прошло больше RESCAN_INTERVAL."""
+        if time.monotonic() - self.last_scan >= RESCAN_INTERVAL:
+            self.refresh()
+
+    def update(self, name):
+        """Перечитать один файл после добавления или удаления через бота."""
+        file_name = os.path.join(self.path, name)
+        frame = None
+        if os.path.isfile(file_name):
+            frame = self._decode(name, os.stat(file_name).st_mtime)
+        with self.lock:
+            if frame is not None and (name in self.frames or len(self.frames) < self.limit):
+                self.frames[name] = frame
+            else:
+                self.frames.pop(name, None)
+
+    def choice(self):
+        """Случайная заставка в виде 1-битного изображения или None."""
+        with self.lock:
+            frames = [data for _mtime, data in self.frames.values() if data is not None]
+        if len(frames) <= 0:
+            return None
+        return Image.frombytes('1', self.size, random.choice(frames))
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Именованные таймеры на куче с монотонным временем."""
+
+import time
+import heapq
+import itertools
+
+class Scheduler:
+    """Набор таймеров, каждый под своим именем.
+
+    Повторная установка таймера заменяет прежний срок, отменённые и
+    заменённые записи выбрасываются из кучи лениво. Не потокобезопасен:
+    таймерами управляет только поток, который их ждёт.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.heap = []
+        self.timers = {}
+        self.seq = itertools.count()
+
+    def at(self, key, deadline):
+        """Установка таймера на момент deadline по монотонным часам."""
+        seq = next(self.seq)
+        self.timers[key] = (deadline, seq)
+        heapq.heappush(self.heap, (deadline, seq, key))
+
+    def after(self, key, delay):
+        """Установка таймера через delay секунд."""
+        self.at(key, self.clock() + delay)
+
+    def cancel(self, *keys):
+        """Отмена таймеров."""
+        for key in keys:
+            self.timers.pop(key, None)
+
+    def pending(self, key):
+        """Установлен ли таймер."""
+        return key in self.timers
+
+    def _clean(self):
+        while len(self.heap) > 0:
+            deadline, seq, key = self.heap[0]
+            if self.timers.get(key) == (deadline, seq):
+                return
+            heapq.heappop(self.heap)
+
+    def due(self, now=None):
+        """Снятие и возврат имён всех сработавших таймеров."""
+        now = self.clock() if now is None else now
+        keys = set()
+        self._clean()
+        while len(self.heap) > 0 and self.heap[0][0] <= now:
+            _deadline, _seq, key = heapq.heappop(self.heap)
+            del self.timers[key]
+            keys.add(key)
+            self._clean()
+        return keys
+
+    def timeout(self, now=None):
+        """Сколько секунд до ближайшего таймера, None если таймеров нет."""
+        self._clean()
+        if len(self.heap) <= 0:
+            return None
+        now = self.clock() if now is None else now
+        return max(self.heap[0][0] - now, 0)
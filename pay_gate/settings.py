@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""Настройки демона: неизменяемый снимок из /etc/pay-gate.json и его перечитывание на ходу."""
+
+import os
+import json
+import re
+import logging
+import threading
+from collections import namedtuple
+from pay_gate.payment import PaymentParser, PaymentTemplate
+
+CONFIG_FILE = '/etc/pay-gate.json'
+POLL_INTERVAL = 5                                        # как часто сверять время изменения файла настроек, секунд
+
+OLED_ADDRESS = 0x3C                                      # адрес дисплея на шине I2C
+RE_SCRIPT = '^[\\w\\s]+\\:\\s*(\\d+)\\.\\s*[\\w\\s]+\\:\\s*(\\d+\\.\\d{2})\\s*RUB\\.\\s*QR\\s*:\\s*(\\d+)\\.\\r?$'
+#'^Код подтверждения\\:\\s*(\\d+)\\.\\s*Сумма\\:\\s*(\\d+\\.\\d{2})\\s*RUB\\.\\s*QR\\s*:\\s*(\\d+)\\.\\r?$'
+#'^TEXT\\s*\\:.*\\s(\\d+)\\..*\\:\\s*(\\d+\\.\\d{2})\\s*RUB\\.\\s*QR\\s*:\\s*(\\d+)\\.\r?$'
+RE_REQUIRE = ('RUB', 'QR')                               # подстроки, без которых RE_SCRIPT не запускается
+
+# поля и значения по умолчанию
+Settings = namedtuple('Settings', [
+    'relay_pin',                                         # номер ноги на разъёме для реле
+    'invert_relay',                                      # инвертировать логику ноги
+    'led_pin',                                           # не используется пока
+    'metrics_host',                                      # адрес HTTP сервера метрик
+    'metrics_port',                                      # порт HTTP сервера метрик, 0 - не запускать
+    'log_max_size',                                      # размер лога, после которого он ротируется
+    'log_rotate',                                        # ротация по времени: 'midnight', число секунд или None
+    'log_backups',                                       # сколько старых логов хранить
+    'log_compress',                                      # сжимать старые логи в gzip
+    'pay_coef',                                          # коэффициент оплаты
+    'bonus',                                             # время, добавляемое к оплаченному
+    'notify_interval',                                   # как часто сообщать об оставшемся времени, секунд
+    'token',                                             # токен бота
+    'channel_id',                                        # куда слать широковещания
+    'admins',                                            # id и имена админов бота, пусто - админы все
+    'password',                                          # пароль для всех не админов
+    'qr_num',                                            # номер QR для сравнения в EMAIL
+    'qr_url',                                            # шаблон ссылки внутри QR кода
+    'saver_time',                                        # время статичной картинки, время чёрного экрана в секундах
+    'imap_server',
+    'email_login',
+    'email_password',
+    'email_interval',
+    'email_port',                                        # порт IMAP сервера, None - стандартный
+    'email_ssl',                                         # подключаться к IMAP через SSL
+    'parser',                                            # шаблоны писем, уже скомпилированные
+    'gates',                                             # GateSettings всех проездов
+], defaults=[
+    26, False, 0,
+    '127.0.0.1', 9108,
+    5 * 1024 * 1024, 'midnight', 30, True,
+    0.8, 0, 60,
+    '', 0, frozenset(), '321456',
+    0, '', (60, 5),
+    '', '', '', 10, None, True,
+    None, (),
+])
+
+GateSettings = namedtuple('GateSettings', ['id', 'pin', 'qr_num', 'qr_code', 'invert', 'coef', 'bonus', 'display'])
+
+# что меняется только перезапуском: бот, железо, набор проездов, метрики и логи
+RESTART_FIELDS = ('token', 'relay_pin', 'invert_relay', 'led_pin', 'metrics_host', 'metrics_port',
+                  'log_max_size', 'log_rotate', 'log_backups', 'log_compress')
+
+logger = logging.getLogger()
+
+def defaultParser():
+    """Разбор писем единственным шаблоном по умолчанию."""
+    return PaymentParser([PaymentTemplate('default', RE_SCRIPT, require=RE_REQUIRE)])
+
+def parseSettings(config):
+    """Проверка настроек config (словарь из JSON) и сборка снимка Settings.
+
+    Необязательные значения неверного типа заменяются значениями по
+    умолчанию, при отсутствии обязательных - ValueError.
+    """
+    values = {}
+
+    hw = config.get('hw') or {}
+    if 'relay_pin' in hw and type(hw['relay_pin']) == int:
+        values['relay_pin'] = int(hw['relay_pin'])
+    if 'invert_relay' in hw and type(hw['invert_relay']) in [int, bool]:
+        values['invert_relay'] = int(hw['invert_relay'])!=0
+    if 'led_pin' in hw and type(hw['led_pin']) == int:
+        values['led_pin'] = int(hw['led_pin'])
+
+    metrics = config.get('metrics') or {}
+    if 'host' in metrics and type(metrics['host']) == str:
+        values['metrics_host'] = metrics['host']
+    if 'port' in metrics and type(metrics['port']) == int:
+        values['metrics_port'] = int(metrics['port'])
+
+    log = config.get('log') or {}
+    if 'max_size' in log and type(log['max_size']) == int:
+        values['log_max_size'] = int(log['max_size'])
+    if 'rotate' in log and (log['rotate'] in ['midnight', None] or type(log['rotate']) == int):
+        values['log_rotate'] = log['rotate']
+    if 'backups' in log and type(log['backups']) == int:
+        values['log_backups'] = int(log['backups'])
+    if 'compress' in log and type(log['compress']) in [int, bool]:
+        values['log_compress'] = int(log['compress'])!=0
+
+    try:
+        values['pay_coef'] = float(config['pay']['coeficient'])
+    except Exception:
+        logger.warning("Missing Pay Coeficient, using default %.2f", Settings().pay_coef)
+    pay = config.get('pay') or {}
+    if 'bonus' in pay and type(pay['bonus']) in [int]:
+        values['bonus'] = int(pay['bonus'])
+
+    try:
+        values['notify_interval'] = int(config['telegram']['notify_interval'])
+    except Exception:
+        logger.warning("Missing NOTIFY_INTERVAL, using default %u", Settings().notify_interval)
+
+    try:
+        telegram = config['telegram']
+        values['token'] = telegram['token']
+        values['channel_id'] = telegram['channel_id']
+        if 'admins' in telegram and type(telegram['admins']) in [list, tuple]:
+            values['admins'] = frozenset(telegram['admins'])
+        if 'password' in telegram and type(telegram['password']) == str:
+            values['password'] = telegram['password']
+
+        values['qr_num'] = int(config['QR']['num'])
+        values['qr_url'] = config['QR']['url']
+
+        email = config['email']
+        templates = []
+        if 'templates' in email and type(email['templates']) in [list, tuple]:
+            for num, template in enumerate(email['templates']):
+                try:
+                    templates.append(PaymentTemplate.from_config(template, 'template{}'.format(num)))
+                except (re.error, KeyError, TypeError, AttributeError) as e:
+                    logger.warning("Wrong E-MAIL template #%d: %s", num, e)
+        if 'script' in email and type(email['script']) == str:
+            try:
+                templates.append(PaymentTemplate('default', email['script']))
+            except re.error:
+                logger.warning("Wrong REGEXP script for E-MAIL '%s'", email['script'])
+        values['parser'] = PaymentParser(templates) if len(templates) > 0 else defaultParser()
+
+        values['saver_time'] = (int(config['saver']['delay']), int(config['saver']['show']))
+        values['imap_server'] = email['server']
+        values['email_login'] = email['login']
+        values['email_password'] = email['password']
+        values['email_interval'] = int(email['interval'])
+        if 'port' in email and type(email['port']) == int:
+            values['email_port'] = int(email['port'])
+        if 'ssl' in email and type(email['ssl']) in [int, bool]:
+            values['email_ssl'] = int(email['ssl'])!=0
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError('Missing config value: {}'.format(e))
+
+    settings = Settings(**values)
+    try:
+        return settings._replace(gates=gateSettings(config, settings))
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError('Wrong gates config: {}'.format(e))
+
+def gateSettings(config, settings):
+    """Проезды из секции gates настроек в виде кортежа GateSettings.
+
+    Без секции gates проезд один, с параметрами из секций hw, QR и pay.
+    Незаданные параметры проезда берутся оттуда же. Дисплей по умолчанию
+    только у первого проезда, остальные - только если он указан.
+    """
+    items = config.get('gates')
+    if type(items) not in [list, tuple] or len(items) <= 0:
+        items = [{}]
+    gates = []
+    ids = set()
+    qrs = set()
+    for num, item in enumerate(items):
+        gate_id = str(item.get('id', num + 1))
+        if gate_id in ids:
+            raise ValueError('duplicate gate id {}'.format(gate_id))
+        qr_num = int(item.get('qr', settings.qr_num))
+        if qr_num in qrs:
+            raise ValueError('duplicate QR {} of gate {}'.format(qr_num, gate_id))
+        gates.append(GateSettings(
+            gate_id,
+            int(item.get('relay_pin', settings.relay_pin)),
+            qr_num,
+            item['url'].format(qr_num) if 'url' in item else config['QR']['url'].format(qr_num),
+            int(item.get('invert_relay', settings.invert_relay)) != 0,
+            float(item.get('coeficient', settings.pay_coef)),
+            int(item.get('bonus', settings.bonus)),
+            item.get('display', OLED_ADDRESS if num == 0 else None)
+        ))
+        ids.add(gate_id)
+        qrs.add(qr_num)
+    return tuple(gates)
+
+def readSettings(path=CONFIG_FILE):
+    """Чтение и проверка файла настроек. OSError, ValueError при ошибке."""
+    with open(path) as json_file:
+        config = json.load(json_file)
+    if not isinstance(config, dict):
+        raise ValueError('{} is not a JSON object'.format(path))
+    return parseSettings(config)
+
+class SettingsWatcher:
+    """Перечитывание файла настроек при его изменении или по reload().
+
+    Поток раз в interval секунд сверяет время изменения, размер и inode
+    файла (замена файла переименованием тоже видна). Новые настройки
+    проверяются целиком и передаются в apply(settings), с ошибкой -
+    остаются прежние. reload() можно звать из обработчика сигнала.
+    """
+
+    def __init__(self, path, apply, interval=POLL_INTERVAL):
+        self.path = path
+        self.apply = apply
+        self.interval = interval
+        self.e = threading.Event()
+        self.stamp = self._stamp()
+        self.thread = None
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def start(self):
+        """Запуск потока слежения."""
+        self.thread = threading.Thread(target=self._run, name='settings', daemon=True)
+        self.thread.start()
+
+    def reload(self):
+        """Перечитать настройки сейчас, не дожидаясь изменения файла."""
+        self.e.set()
+
+    def _run(self):
+        while True:
+            forced = self.e.wait(self.interval)
+            self.e.clear()
+            stamp = self._stamp()
+            if not forced and (stamp is None or stamp == self.stamp):
+                continue
+            # снимок запоминается и при ошибке: недописанный файл перечитаем, когда он снова изменится
+            self.stamp = stamp
+            try:
+                settings = readSettings(self.path)
+            except (OSError, ValueError) as e:
+                logger.error('Settings are not reloaded, keeping previous: %s', e)
+                continue
+            try:
+                self.apply(settings)
+            except Exception as e:
+                logger.error('Unable to apply settings: %s', e)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Кэш строк, заранее отрисованных шрифтом TrueType в 1-битные маски."""
+
+import math
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
+
+MAX_BYTES = 64 * 1024                                    # сколько памяти занимают маски в кэше, не больше
+
+class TextCache:
+    """LRU кэш отрисованных строк.
+
+    Строка растеризуется FreeType один раз в маску размером со свою
+    рамку, дальше вывод - одна вставка цветом по маске. Ключ - строка,
+    файл и размер шрифта, выравнивание. Вставка по маске даёт те же
+    точки, что и ImageDraw.text на 1-битной картинке. Если маски
+    занимают больше max_bytes, выбрасываются давно не нужные.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(text, font, align):
+        if font is None:
+            return (text, None, None, align)
+        return (text, getattr(font, 'path', id(font)), getattr(font, 'size', None), align)
+
+    def render(self, text, font, align='left'):
+        """Маска строки: (смещение рамки от точки вывода, 1-битная маска)."""
+        key = self._key(text, font, align)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = self._rasterize(text, font, align)
+        cost = (entry[1].width + 7) // 8 * entry[1].height
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = entry
+                self.size += cost
+                while self.size > self.max_bytes and len(self.entries) > 1:
+                    _key, (_offset, mask) = self.entries.popitem(last=False)
+                    self.size -= (mask.width + 7) // 8 * mask.height
+        return entry
+
+    @staticmethod
+    def _rasterize(text, font, align):
+        if font is None:
+            font = ImageFont.load_default()
+        draw = ImageDraw.Draw(Image.new('1', (1, 1)))
+        left, top, right, bottom = draw.multiline_textbbox((0, 0), text, font=font, align=align)
+        # при выравнивании по центру рамка бывает дробной
+        left, top, right, bottom = math.floor(left), math.floor(top), math.ceil(right), math.ceil(bottom)
+        mask = Image.new('1', (max(1, right - left), max(1, bottom - top)))
+        ImageDraw.Draw(mask).multiline_text((-left, -top), text, font=font, fill=255, align=align)
+        return (left, top), mask
+
+    def textsize(self, text, font, align='left'):
+        """Размер строки от точки вывода до правого нижнего края, как у прежнего textsize."""
+        (left, top), mask = self.render(text, font, align)
+        return left + mask.width, top + mask.height
+
+    def draw(self, image, xy, text, font, fill=255, align='left'):
+        """Вывод строки на image, как ImageDraw.text с левым верхним углом xy (дробная часть отбрасывается)."""
+        (left, top), mask = self.render(text, font, align)
+        image.paste(fill, (int(xy[0]) + left, int(xy[1]) + top), mask)
+
+    def stats(self):
+        """Счётчики попаданий и промахов, число строк и занятые байты."""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries), 'bytes': self.size}
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Проверка и подготовка картинок, загруженных через бота."""
+
+import io
+import os
+import mimetypes
+from PIL import Image
+
+MAX_UPLOAD = 1024 * 1024                                 # больше скачивать не станем, байт
+MAX_PIXELS = 4096 * 4096                                 # больше точек не раскодируем (защита от "бомб")
+IMAGE_TYPES = ('image/png', 'image/bmp', 'image/x-ms-bmp', 'image/gif', 'image/jpeg', 'image/webp')
+IMAGE_FORMATS = ('PNG', 'BMP', 'GIF', 'JPEG', 'WEBP')
+
+class UploadError(Exception):
+    """Файл не годится. reason: 'size' - слишком большой, 'type' - не картинка."""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+def checkDocument(document, limit=MAX_UPLOAD):
+    """Проверка размера и типа документа по данным Telegram, до скачивания."""
+    if document.file_size is not None and document.file_size > limit:
+        raise UploadError('size', 'file is {} bytes'.format(document.file_size))
+    mime_type = document.mime_type
+    if not mime_type and document.file_name:
+        mime_type = mimetypes.guess_type(document.file_name)[0]
+    if mime_type not in IMAGE_TYPES:
+        raise UploadError('type', 'MIME type is {}'.format(mime_type))
+
+def download(file, limit=MAX_UPLOAD):
+    """Скачивание файла Telegram в память, без записи на диск."""
+    if file.file_size is not None and file.file_size > limit:
+        raise UploadError('size', 'file is {} bytes'.format(file.file_size))
+    buffer = io.BytesIO()
+    file.download(out=buffer)
+    if buffer.tell() > limit:
+        raise UploadError('size', 'file is {} bytes'.format(buffer.tell()))
+    buffer.seek(0)
+    return buffer
+
+def toScreen(data, size=(128, 64)):
+    """1-битный кадр size из картинки в data.
+
+    Сначала по заголовку проверяются формат и размер, раскодируется
+    картинка только после этого. Кадр нужного размера переводится в
+    1 бит как есть, другие вписываются с сохранением пропорций по центру
+    чёрного поля, полутона передаются смешением точек.
+    """
+    try:
+        im = Image.open(data)
+    except Exception as e:
+        raise UploadError('type', str(e))
+    with im:
+        if im.format not in IMAGE_FORMATS:
+            raise UploadError('type', 'format is {}'.format(im.format))
+        if im.width * im.height > MAX_PIXELS:
+            raise UploadError('size', 'picture is {}x{}'.format(im.width, im.height))
+        try:
+            if im.size == tuple(size):
+                return im.convert('1')
+            scale = min(size[0] / im.width, size[1] / im.height)
+            scaled = im.convert('RGBA').resize((max(1, round(im.width * scale)), max(1, round(im.height * scale))), Image.LANCZOS)
+        except Exception as e:
+            raise UploadError('type', str(e))
+    # прозрачные места остаются чёрными, как фон экрана
+    frame = Image.new('L', size)
+    frame.paste(scaled.convert('L'), ((size[0] - scaled.width) // 2, (size[1] - scaled.height) // 2), scaled.getchannel('A'))
+    return frame.convert('1')
+
+def saveAtomic(image, path):
+    """Запись картинки в PNG через временный файл и переименование."""
+    tmp = path + '.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            image.save(f, 'PNG')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise